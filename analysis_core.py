@@ -1,185 +1,12 @@
 import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
-import seaborn as sns
-from urllib.request import urlopen
-import json
-import os
-import requests
-import psycopg2
-import pandas as pd
-import io
-
-# Configurações do banco de dados
-DB_NAME = os.getenv("DB_NAME", "f1_stats")
-DB_USER = os.getenv("DB_USER", "postgres")
-DB_PASSWORD = os.getenv("DB_PASSWORD", "403800")
-DB_HOST = os.getenv("DB_HOST", "localhost")
-
-# Conectar ao banco de dados
-conn = psycopg2.connect(
-    dbname=DB_NAME,
-    user=DB_USER,
-    password=DB_PASSWORD,
-    host=DB_HOST
-)
-cursor = conn.cursor()
-
-# 🔹 Inserção dos Drivers
-url_drivers = "https://api.openf1.org/v1/drivers"
-response = requests.get(url_drivers)
-
-if response.status_code == 200:
-    drivers = response.json()
-    for driver in drivers:
-        driver_id = driver.get("driver_number")  # ID do piloto
-        name = driver.get("full_name")  # Nome completo
-        nationality = driver.get("country_code")  # Código do país
-        birthdate = driver.get("dob")  # Data de nascimento
-
-        cursor.execute(
-            """
-            INSERT INTO drivers (driver_id, name, nationality, birthdate)
-            VALUES (%s, %s, %s, %s)
-            ON CONFLICT (driver_id) DO NOTHING
-            """,
-            (driver_id, name, nationality, birthdate)
-        )
-
-    conn.commit()
-    print("✅ Dados dos drivers inseridos com sucesso!")
-
-
-else:
-    print(f"❌ Erro ao acessar a API de drivers. Código: {response.status_code}")
-
-# 🔹 Inserção das Sessões
-url_sessions = "https://api.openf1.org/v1/sessions"
-response = requests.get(url_sessions)
-
-if response.status_code == 200:
-    sessions = response.json()
-    for session in sessions:
-        cursor.execute(
-            """
-            INSERT INTO sessions (session_key, meeting_key, circuit_key, circuit_short_name,
-                                  country_code, country_key, country_name, date_start, date_end,
-                                  gmt_offset, location, session_name, session_type, year)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            ON CONFLICT (session_key) DO NOTHING
-            """,
-            (
-                session.get("session_key"),
-                session.get("meeting_key"),
-                session.get("circuit_key"),
-                session.get("circuit_short_name"),
-                session.get("country_code"),
-                session.get("country_key"),
-                session.get("country_name"),
-                session.get("date_start"),
-                session.get("date_end"),
-                session.get("gmt_offset"),
-                session.get("location"),
-                session.get("session_name"),
-                session.get("session_type"),
-                session.get("year")
-            )
-        )
-
-    conn.commit()
-    print("✅ Dados das sessões inseridos com sucesso!")
-
-else:
-    print(f"❌ Erro ao acessar a API de sessões. Código: {response.status_code}")
-
-
-
-# 🔹 Inserção das Posições
-url_position = "https://api.openf1.org/v1/position?csv=true"
-response = requests.get(url_position)
-
-if response.status_code == 200:
-    # Lendo CSV da API
-    positions_df = pd.read_csv(io.StringIO(response.text))
-    
-    # Convertendo data para formato correto
-    positions_df["date"] = pd.to_datetime(positions_df["date"], format='ISO8601')
-
-    # Query de inserção
-    insert_query = """
-    INSERT INTO positions (date, driver_number, meeting_key, position, session_key)
-    VALUES (%s, %s, %s, %s, %s)
-    ON CONFLICT DO NOTHING;
-    """
-
-    # Converter DataFrame para lista de tuplas
-    records = [tuple(row) for row in positions_df.itertuples(index=False, name=None)]
-
-    # Inserir no banco de dados
-    cursor.executemany(insert_query, records)
-    conn.commit()
-    print("✅ Dados das posições inseridos com sucesso!")
-
-else:
-    print(f"❌ Erro ao acessar a API de posições. Código: {response.status_code}")
-
-
-# 🏆 Piloto com Mais Vitórias, Pódios e Pole Positions
-query = """
-WITH race_sessions AS (
-    SELECT session_key::INTEGER AS session_key
-    FROM sessions
-    WHERE session_type = 'Race' AND year IN (2023, 2024)
-),
-qualifying_sessions AS (
-    SELECT session_key::INTEGER AS session_key
-    FROM sessions
-    WHERE session_type = 'Qualifying' AND year IN (2023, 2024)
-),
-race_results AS (
-    SELECT 
-        p.driver_number,
-        COUNT(*) FILTER (WHERE p.position = 1) AS victories,
-        COUNT(*) FILTER (WHERE p.position IN (1, 2, 3)) AS podiums
-    FROM positions p
-    JOIN race_sessions rs ON p.session_key = rs.session_key
-    GROUP BY p.driver_number
-),
-pole_positions AS (
-    SELECT 
-        p.driver_number,
-        COUNT(*) AS pole_positions
-    FROM positions p
-    JOIN qualifying_sessions qs ON p.session_key = qs.session_key
-    WHERE p.position = 1
-    GROUP BY p.driver_number
-)
-SELECT 
-    d.name AS piloto,
-    COALESCE(r.victories, 0) AS vitorias,
-    COALESCE(r.podiums, 0) AS podios,
-    COALESCE(p.pole_positions, 0) AS pole_positions
-FROM drivers d
-LEFT JOIN race_results r ON d.driver_id = r.driver_number
-LEFT JOIN pole_positions p ON d.driver_id = p.driver_number
-ORDER BY vitorias DESC, pole_positions DESC, podios DESC
-LIMIT 1;
-"""
+from matplotlib.colors import LinearSegmentedColormap
+import metrics
+import rendering
+import scoring
 
-cursor.execute(query)
-top_driver = cursor.fetchone()
-
-if top_driver:
-    print(f"🏆 Piloto com mais vitórias, pódios e poles: {top_driver[0]}")
-    print(f"   - Vitórias: {top_driver[1]}")
-    print(f"   - Pódios: {top_driver[2]}")
-    print(f"   - Pole Positions: {top_driver[3]}")
-else:
-    print("❌ Nenhum piloto encontrado")
-
-# 🔹 Fechar conexão
-cursor.close()
-conn.close()
+# A ingestão da OpenF1 no PostgreSQL fica em 'etl.py' (python etl.py);
+# este módulo contém apenas funções de análise e plotagem, sem efeitos no import.
 
 
 def highlight_max(s):
@@ -202,7 +29,10 @@ def format_time(td):
     return f"{minutes}:{seconds:06.3f}"
 
 def calculate_points(row):
-    """Calcula pontos com base na posição (lógica do seu 'APEX-data.py')."""
+    """
+    Calcula pontos com base na posição (lógica do seu 'APEX-data.py').
+    Versão linha a linha; para DataFrames inteiros use scoring.compute_points.
+    """
     pos = row['Position']
     sprint = row['Sprint']
     fastest_lap = row['Fastest Lap']
@@ -240,42 +70,124 @@ def calculate_points(row):
 
 # --- Funções de Processamento e Plotagem ---
 
-def get_driver_performance(df):
+# Como combinar agregações parciais por piloto (ver driver_aggregates)
+AGGREGATE_REDUCERS = {
+    'total_pontos': 'sum',
+    'soma_posicao': 'sum',
+    'n_posicao': 'sum',
+    'melhor_posicao': 'min',
+    'pior_posicao': 'max',
+    'poles': 'sum',
+    'podiums': 'sum',
+    'corridas_disputadas': 'sum',
+    'soma_tempo': 'sum',
+    'n_tempo': 'sum',
+}
+
+def driver_aggregates(df, categorical=False):
     """
-    Recebe o DataFrame limpo e calcula o desempenho dos pilotos.
-    Retorna um novo DataFrame com os resultados.
-    (Lógica do seu 'APEX-data.py')
+    Agregados por piloto em forma acumulável (somas, contagens, mín/máx),
+    para que novos dados possam ser somados sem recalcular tudo
+    (ver combine_driver_aggregates e finalize_driver_performance).
+
+    Não copia o DataFrame de entrada: monta só as colunas usadas na agregação,
+    com poles/pódios como colunas booleanas somadas pelas reduções nativas do groupby.
+    categorical=True converte Driver/Circuit para 'category' (mais rápido em muitas temporadas).
     """
-    df_copy = df.copy()
+    position = pd.to_numeric(df['Position'], errors='coerce')
+    if isinstance(position.dtype, pd.api.extensions.ExtensionDtype):
+        position = position.astype('float64') # Int64/Float64 anuláveis: NA -> NaN
     
     # Assumindo que 'Sprint' e 'Fastest Lap' precisam ser criadas
     # Adicione sua lógica real aqui, por enquanto vou simular
-    if 'Sprint' not in df_copy.columns:
+    if 'Sprint' in df.columns:
+        sprint = df['Sprint']
+    else:
         # Simulação: Apenas corridas com 'Sprint' no nome
-        df_copy['Sprint'] = df_copy['Circuit'].str.contains('Sprint', case=False, na=False)
-    if 'Fastest Lap' not in df_copy.columns:
+        # (o teste de texto roda uma vez por circuito, não por linha)
+        codes, circuits = pd.factorize(df['Circuit'])
+        is_sprint = pd.Series(circuits).astype(str).str.contains('Sprint', case=False).to_numpy()
+        sprint = np.where(codes >= 0, is_sprint[codes], False)
+    if 'Fastest Lap' in df.columns:
+        fastest_lap = df['Fastest Lap']
+    else:
         # Simulação: Piloto na P1 ou P2
-        df_copy['Fastest Lap'] = df_copy['Position'].isin([1, 2])
-    
+        fastest_lap = position.isin([1, 2])
     
-    df_copy['pontos'] = df_copy.apply(calculate_points, axis=1)
+    work = pd.DataFrame({
+        'Driver': df['Driver'],
+        'Circuit': df['Circuit'],
+        'Position': position,
+        'Time': df['Time'],
+        # Pontuação vetorizada (tabela por temporada se houver coluna 'Season')
+        'pontos': scoring.compute_points(
+            position, sprint, fastest_lap,
+            season=df['Season'] if 'Season' in df.columns else None
+        ),
+        'is_pole': (position == 1).to_numpy(),
+        'is_podium': (position <= 3).to_numpy(),
+    }, index=df.index)
+    driver_dtype = work['Driver'].dtype
+    if categorical:
+        work['Driver'] = work['Driver'].astype('category')
+        work['Circuit'] = work['Circuit'].astype('category')
     
-    df_pilotos = df_copy.groupby('Driver').agg(
+    aggregates = work.groupby('Driver', observed=True).agg(
         total_pontos=('pontos', 'sum'),
-        media_posicao=('Position', 'mean'),
+        soma_posicao=('Position', 'sum'),
+        n_posicao=('Position', 'count'),
         melhor_posicao=('Position', 'min'),
         pior_posicao=('Position', 'max'),
-        poles=('Position', lambda x: (x == 1).sum()),
-        podiums=('Position', lambda x: (x <= 3).sum()),
+        poles=('is_pole', 'sum'),
+        podiums=('is_podium', 'sum'),
         corridas_disputadas=('Circuit', 'nunique'),
-        media_tempo_qualify=('Time', 'mean') # Média do timedelta
-    ).sort_values(by='total_pontos', ascending=False)
+        soma_tempo=('Time', 'sum'),
+        n_tempo=('Time', 'count'),
+    )
+    if categorical and not isinstance(driver_dtype, pd.CategoricalDtype):
+        # Devolve o índice no tipo original dos nomes
+        aggregates.index = aggregates.index.astype(driver_dtype)
+    return aggregates
+
+def combine_driver_aggregates(*parts):
+    """
+    Soma agregados parciais de driver_aggregates.
+    'corridas_disputadas' só é somável se as partes não repetem (Circuito, Piloto),
+    o que vale para dados limpos pelo data_loader.
+    """
+    combined = pd.concat([p for p in parts if p is not None])
+    return combined.groupby(level=0, observed=True, sort=True).agg(AGGREGATE_REDUCERS)
+
+def finalize_driver_performance(aggregates):
+    """
+    Converte os agregados acumuláveis na tabela de desempenho exibida (médias, ordenação).
+    """
+    df_pilotos = pd.DataFrame({
+        'total_pontos': aggregates['total_pontos'],
+        'media_posicao': aggregates['soma_posicao'] / aggregates['n_posicao'],
+        'melhor_posicao': aggregates['melhor_posicao'],
+        'pior_posicao': aggregates['pior_posicao'],
+        'poles': aggregates['poles'],
+        'podiums': aggregates['podiums'],
+        'corridas_disputadas': aggregates['corridas_disputadas'],
+        'media_tempo_qualify': aggregates['soma_tempo'] / aggregates['n_tempo'], # Média do timedelta
+    }).sort_values(by='total_pontos', ascending=False)
     
     # Formata a média de tempo para exibição
     df_pilotos['media_tempo_qualify_str'] = df_pilotos['media_tempo_qualify'].apply(format_time)
     
     return df_pilotos
 
+@metrics.timed('transform', step='driver_performance')
+def get_driver_performance(df, categorical=False):
+    """
+    Recebe o DataFrame limpo e calcula o desempenho dos pilotos.
+    Retorna um novo DataFrame com os resultados.
+    (Lógica do seu 'APEX-data.py')
+    """
+    return finalize_driver_performance(driver_aggregates(df, categorical=categorical))
+
+@metrics.timed('figure_build', plot='driver_performance')
 def plot_driver_performance_grid(df_pilotos):
     """
     Recebe o DataFrame de desempenho e retorna uma Figura Matplotlib.
@@ -294,7 +206,10 @@ def plot_driver_performance_grid(df_pilotos):
     
     cmap = LinearSegmentedColormap.from_list("custom_cmap", ["#f44336", "#FFEB3B", "#4CAF50"])
     
-    fig, ax = plt.subplots(figsize=(15, 10))
+    # seaborn só nos processos que desenham (o processo web usa só os agregados deste módulo)
+    import seaborn as sns
+
+    fig, ax = rendering.subplots(figsize=(15, 10))
     sns.heatmap(
         df_normalized, 
         annot=df_heatmap,  # Mostra os valores reais
@@ -306,13 +221,16 @@ def plot_driver_performance_grid(df_pilotos):
     ax.set_title('Grid de Desempenho dos Pilotos (Análise position.csv)', fontsize=16)
     ax.set_xlabel('Métricas')
     ax.set_ylabel('Pilotos')
-    plt.xticks(rotation=45, ha='right')
-    plt.yticks(rotation=0)
-    plt.tight_layout()
+    ax.tick_params(axis='x', rotation=45)
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment('right')
+    ax.tick_params(axis='y', rotation=0)
+    fig.tight_layout()
     
-    # Em vez de plt.savefig(...), retorne a figura
+    # Em vez de plt.savefig(...), retorne a figura (rendering.render_png codifica e libera)
     return fig
 
+@metrics.timed('figure_build', plot='temporal_evolution')
 def plot_temporal_evolution(df, driver_name):
     """
     Recebe o DataFrame limpo e o nome de um piloto, retorna a figura da evolução.
@@ -321,11 +239,11 @@ def plot_temporal_evolution(df, driver_name):
     df_piloto = df[df['Driver'] == driver_name].sort_values(by='Circuit') # Simplificado
     
     if df_piloto.empty:
-        fig, ax = plt.subplots()
+        fig, ax = rendering.subplots()
         ax.text(0.5, 0.5, f'Piloto "{driver_name}" não encontrado.', horizontalalignment='center', verticalalignment='center')
         return fig
 
-    fig, ax1 = plt.subplots(figsize=(15, 7))
+    fig, ax1 = rendering.subplots(figsize=(15, 7))
     
     # Eixo 1: Posição
     color = 'tab:blue'
@@ -1,26 +1,288 @@
-from flask import Flask, render_template, Response, request, redirect, url_for
-import io
-from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
+from flask import Flask, render_template, Response, request, redirect, url_for, jsonify, g
+import os
+import time
 import matplotlib
 matplotlib.use('Agg') # Usa um backend não-interativo
 
 # Importe SEUS módulos
 import data_loader
-import analysis_core
-import openf1_api # Módulo da OpenF1 (telemetria)
+import f1_api as openf1_api # Módulo da OpenF1 (telemetria)
+import overtakes
+import pace
+import columnar
+import db
+import standings
+import live
+import metrics
+import season
+import rendering
+from render_cache import PngCache, make_etag
+import render_queue
+from render_queue import RenderQueue, RenderError, NoFigureError
+from dataset import DatasetStore
 
 app = Flask(__name__)
 
+# Os pools de processos (renderização, temporadas) usam 'spawn': com `python app.py`,
+# cada worker reexecuta este script como '__mp_main__'. Lá não há requisições a
+# atender, então o estado do processo web (CSV carregado e observado, cache e fila
+# de imagens, lote das temporadas) só é criado no processo web.
+WEB_PROCESS = __name__ != '__mp_main__'
+
+# --- Cache de Imagens Renderizadas ---
+png_cache = PngCache() if WEB_PROCESS else None
+PLOT_MAX_AGE = int(os.getenv("APEX_PLOT_MAX_AGE", 3600))  # Cache-Control (segundos)
+
+# --- Fila de Renderização (processos separados) ---
+# Tempo que a requisição espera pela imagem antes de responder 202 + URL de polling
+RENDER_WAIT = float(os.getenv("APEX_RENDER_WAIT_SECONDS", 3))
+# Espera de quem não sabe fazer polling (tags <img>, links "Ver como imagem")
+RENDER_SYNC_WAIT = float(os.getenv("APEX_RENDER_SYNC_WAIT_SECONDS", 120))
+plot_queue = None
+if WEB_PROCESS:
+    plot_queue = RenderQueue(on_done=lambda etag, png, last_modified, max_age:
+                             png_cache.put(etag, png, last_modified, max_age))
+
 # --- Cache de Dados (Para sua análise do CSV) ---
-try:
-    print("Carregando e limpando dados do position.csv...")
-    df_global = data_loader.get_cleaned_data()
-    df_pilotos_global = analysis_core.get_driver_performance(df_global)
-    print("Dados locais (position.csv) prontos.")
-except Exception as e:
-    print(f"Aviso: Não foi possível carregar 'position.csv'. A análise local está desativada. Erro: {e}")
-    df_global = None
-    df_pilotos_global = None
+# O DatasetStore observa o CSV e troca o snapshot quando chegam dados novos (sem reiniciar)
+dataset_store = None
+if WEB_PROCESS:
+    dataset_store = DatasetStore(data_loader.DATA_FILE)
+    try:
+        print("Carregando e limpando dados do position.csv...")
+        dataset_store.load()
+        print("Dados locais (position.csv) prontos.")
+    except Exception as e:
+        print(f"Aviso: Não foi possível carregar 'position.csv'. A análise local está desativada. Erro: {e}")
+    dataset_store.start_watcher()
+
+# --- Análise em lote das temporadas (pool de processos em segundo plano) ---
+season_batch = season.BatchRunner() if WEB_PROCESS else None
+
+
+# --- Métricas (/metrics e Server-Timing) ---
+
+def _gauges():
+    """Valores já mantidos por outros módulos, lidos a cada coleta do /metrics."""
+    memory = rendering.memory_stats()
+    queue = plot_queue.stats()
+    yield ('apex_web_rss_bytes', 'gauge', 'RSS atual do processo web', {}, memory['rss_bytes'])
+    yield ('apex_web_peak_rss_bytes', 'gauge', 'Pico de RSS do processo web', {}, memory['peak_rss_bytes'])
+    # As figuras são criadas e renderizadas nos workers: valores relatados a cada job, por pid
+    for worker in plot_queue.worker_memory():
+        labels = {'pid': worker['pid']}
+        yield ('apex_render_rss_bytes', 'gauge', 'RSS do worker de renderização (no fim do último job)',
+               labels, worker['rss_bytes'])
+        yield ('apex_render_peak_rss_bytes', 'gauge', 'Pico de RSS do worker de renderização',
+               labels, worker['peak_rss_bytes'])
+        yield ('apex_render_live_figures', 'gauge', 'Figuras Matplotlib ainda abertas no worker',
+               labels, worker['live_figures'])
+        yield ('apex_render_figures_total', 'counter', 'Figuras renderizadas pelo worker',
+               labels, worker['figures_rendered'])
+    yield ('apex_render_queue_pending', 'gauge', 'Jobs de renderização em andamento', {}, queue['pending'])
+    for result in ('submitted', 'deduplicated', 'completed', 'failed'):
+        yield ('apex_render_jobs_total', 'counter', 'Jobs da fila de renderização por resultado',
+               {'result': result}, queue[result])
+    for session in live.stats()['sessions']:
+        yield ('apex_live_subscribers', 'gauge', 'Espectadores por sessão ao vivo',
+               {'session_key': session['session_key']}, session['subscribers'])
+
+
+if WEB_PROCESS:
+    metrics.register_gauges(_gauges)
+
+
+@app.before_request
+def _start_request_metrics():
+    g.metrics_started = time.perf_counter()
+    g.metrics_token = metrics.begin_request()
+
+
+@app.after_request
+def _finish_request_metrics(response):
+    """Tempo total por rota e os tempos por etapa no cabeçalho Server-Timing."""
+    started = g.pop('metrics_started', None)
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    endpoint = request.endpoint or 'not_found'
+    metrics.observe('apex_request_seconds', elapsed, endpoint=endpoint)
+    metrics.inc('apex_requests_total', endpoint=endpoint, method=request.method, status=response.status_code)
+    timings = metrics.request_timings()
+    timings['total'] = elapsed
+    response.headers['Server-Timing'] = metrics.server_timing(timings)
+    return response
+
+
+@app.teardown_request
+def _end_request_metrics(_error=None):
+    token = g.pop('metrics_token', None)
+    if token is not None:
+        metrics.end_request(token)
+
+
+def _png_entry_response(etag, entry, max_age=None):
+    """
+    Resposta com um PNG do cache: ETag forte, Last-Modified e Cache-Control (ou 304).
+    Sem max_age, vale o da rota que pediu a imagem (guardado na entrada).
+    """
+    if entry is None:
+        response = Response(status=304)
+    else:
+        png, modified, entry_max_age = entry
+        response = Response(png, mimetype='image/png')
+        response.last_modified = modified
+        if max_age is None:
+            max_age = entry_max_age
+    if max_age is None:
+        max_age = PLOT_MAX_AGE
+
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    return response.make_conditional(request)
+
+
+def _pending_response(etag):
+    """202 com a URL para acompanhar a renderização em andamento."""
+    poll_url = url_for('render_status', key=etag)
+    response = jsonify({'status': 'pending', 'poll': poll_url})
+    response.status_code = 202
+    response.headers['Location'] = poll_url
+    response.headers['Retry-After'] = '1'
+    return response
+
+
+def _accepts_polling():
+    """
+    O cliente sabe lidar com 202 + URL de polling? Só quem pede JSON (fetch com
+    'Accept: application/json') ou passa ?async=1; uma tag <img> não sabe.
+    """
+    if request.args.get('async') == '1':
+        return True
+    return request.accept_mimetypes.best_match(['image/png', 'application/json']) == 'application/json'
+
+
+def _render_error_response(error):
+    """500 com a mensagem do job que falhou (não é falta de dados: não responde 404)."""
+    return f"Erro ao renderizar o gráfico: {error}", 500
+
+
+def _png_response(endpoint, params, version, job, args=(), last_modified=None, max_age=PLOT_MAX_AGE,
+                  prepare=None):
+    """
+    Responde um PNG a partir do cache de imagens renderizadas.
+    Envia ETag forte, Last-Modified e Cache-Control, e responde 304 quando o
+    navegador/proxy já tem a imagem. Se a imagem não está pronta, `job(*args)`
+    vai para a fila de renderização (processos separados), depois de `prepare()`
+    buscar aqui os dados que o job vai ler do cache. Clientes que fazem
+    polling (_accepts_polling) esperam até RENDER_WAIT segundos e, se não der
+    tempo, recebem 202 com a URL de polling; os demais (<img>) esperam a imagem.
+    Retorna None se não houver figura para os parâmetros (404 na rota) e 500
+    se a renderização falhar.
+    """
+    etag = make_etag(endpoint, params, version)
+
+    # O ETag não depende da imagem, então o 304 sai sem renderizar nada
+    if request.if_none_match.contains(etag):
+        return _png_entry_response(etag, None, max_age)
+
+    entry = png_cache.get(etag)
+    if entry is None:
+        if prepare is not None and plot_queue.status(etag) != 'pending':
+            with metrics.timer('prepare'):
+                prepare()
+        future = plot_queue.submit(etag, job, *args, last_modified=last_modified, max_age=max_age)
+        try:
+            with metrics.timer('render_wait'):
+                png = plot_queue.wait(future, RENDER_WAIT if _accepts_polling() else RENDER_SYNC_WAIT)
+        except NoFigureError:
+            return None
+        except RenderError as e:
+            return _render_error_response(e)
+        if png is None:
+            return _pending_response(etag)
+        entry = png_cache.get(etag) or png_cache.put(etag, png, last_modified, max_age)
+    return _png_entry_response(etag, entry, max_age)
+
+
+def _json_response(endpoint, params, version, build, max_age=PLOT_MAX_AGE):
+    """
+    Resposta JSON com ETag derivado de (endpoint, parâmetros, versão dos dados),
+    como os PNGs: o 304 sai sem montar o payload. `build()` retorna o payload (ou None).
+    Retorna None se não houver dados para os parâmetros.
+    """
+    etag = make_etag(endpoint, params, version)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        payload = build()
+        if payload is None:
+            return None
+        response = jsonify(payload)
+
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    return response.make_conditional(request)
+
+
+def _session_version(session_key):
+    """
+    (versão dos dados, max-age) de uma sessão para o ETag e o Cache-Control.
+    Sessões encerradas não mudam: a session_key basta. Nas que ainda não
+    assentaram, a versão muda a cada LIVE_SESSION_TTL, junto com o cache dos dados.
+    """
+    if openf1_api.is_session_settled(session_key):
+        return session_key, PLOT_MAX_AGE
+    window = int(time.time() // openf1_api.LIVE_SESSION_TTL)
+    return f"{session_key}-{window}", openf1_api.LIVE_SESSION_TTL
+
+
+def _telemetry_json(endpoint, build, **extra_params):
+    """
+    Rotas /api/telemetry/*: valida ano/local, resolve a session_key (versão dos dados)
+    e responde build(year, location) em JSON.
+    """
+    year = request.args.get('year')
+    location = request.args.get('location')
+    if not year or not year.isdigit() or not location:
+        return jsonify({'error': 'Ano e Localização são necessários.'}), 400
+
+    try:
+        session_key = openf1_api._get_session_key(int(year), location)
+        response = None
+        if session_key:
+            params = {'year': year, 'location': location, **extra_params}
+            version, max_age = _session_version(session_key)
+            response = _json_response(endpoint, params, version, lambda: build(int(year), location),
+                                      max_age=max_age)
+        if response is None:
+            return jsonify({'error': f'Dados não encontrados para {location} {year}.'}), 404
+        return response
+    except Exception as e:
+        print(f"Erro ao montar {endpoint}: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/render/<key>')
+def render_status(key):
+    """
+    Polling de uma renderização: 200 com o PNG quando pronto (com o max-age da
+    rota que o pediu), 202 enquanto
+    está na fila, 404 se terminou sem imagem (ou a chave é desconhecida) e
+    500 se a renderização falhou.
+    """
+    entry = png_cache.get(key)
+    if entry is not None:
+        return _png_entry_response(key, entry)
+    status = plot_queue.status(key)
+    if status == 'pending':
+        return _pending_response(key)
+    if status is not None:
+        kind, message = status
+        return jsonify({'status': kind, 'error': message}), 500 if kind == 'failed' else 404
+    return jsonify({'status': 'unknown'}), 404
 
 
 @app.route('/')
@@ -37,7 +299,7 @@ def analysis_csv():
     """
     Página dedicada à SUA análise do 'position.csv'.
     """
-    if df_pilotos_global is None:
+    if dataset_store.current() is None:
         return "Erro: Dados de análise do 'position.csv' não puderam ser carregados.", 500
         
     return render_template('analysis_csv.html')
@@ -47,14 +309,19 @@ def plot_driver_performance():
     """
     Endpoint que gera o gráfico da SUA análise (position.csv).
     """
-    if df_pilotos_global is None:
+    # Um único snapshot por requisição, mesmo que uma atualização chegue no meio
+    snapshot = dataset_store.current()
+    if snapshot is None:
         return "Erro: Dados de análise não carregados.", 500
 
-    fig = analysis_core.plot_driver_performance_grid(df_pilotos_global)
-    
-    output = io.BytesIO()
-    FigureCanvas(fig).print_png(output)
-    return Response(output.getvalue(), mimetype='image/png')
+    response = _png_response(
+        'driver_performance', {}, snapshot.version,
+        render_queue.render_driver_performance, (snapshot.df_pilotos,),
+        last_modified=snapshot.version
+    )
+    if response is None:
+        return "Erro: Não há dados para o gráfico de desempenho.", 404
+    return response
 
 # --- Rotas para Análise de Telemetria (OpenF1) ---
 
@@ -67,23 +334,46 @@ def telemetry():
         # Pega os dados do formulário
         year = request.form.get('year')
         location = request.form.get('location')
+        live_mode = request.form.get('live') == '1'
         
         # Redireciona para a mesma página com os parâmetros na URL
+        if live_mode:
+            return redirect(url_for('telemetry', year=year, location=location, live=1))
         return redirect(url_for('telemetry', year=year, location=location))
 
     # Se for GET, verifica se há parâmetros na URL
     year = request.args.get('year')
     location = request.args.get('location')
+    live_mode = request.args.get('live') == '1'
     plot_urls = {}
+    data_urls = {}
 
-    if year and location:
+    if year and location and live_mode:
+        # Sessão em andamento: só o gráfico de posições, alimentado pelo stream SSE
+        # (os demais gráficos seriam refeitos a cada LIVE_SESSION_TTL)
+        data_urls = {'live': url_for('api_telemetry_live', year=year, location=location)}
+    elif year and location:
+        # Começa a buscar posições e voltas em paralelo enquanto a página carrega
+        try:
+            openf1_api.prefetch_session_async(int(year), location)
+        except ValueError:
+            pass
         # Se houver parâmetros, gera as URLs dos gráficos
         plot_urls = {
             'position': url_for('plot_telemetry_position', year=year, location=location),
-            'overtakes': url_for('plot_telemetry_overtakes', year=year, location=location)
+            'overtakes': url_for('plot_telemetry_overtakes', year=year, location=location),
+            'overtake_events': url_for('plot_telemetry_overtake_events', year=year, location=location),
+            'stints': url_for('plot_telemetry_stints', year=year, location=location)
+        }
+        # Séries em JSON para os gráficos desenhados no navegador
+        data_urls = {
+            'positions': url_for('api_telemetry_positions', year=year, location=location),
+            'laps': url_for('api_telemetry_laps', year=year, location=location),
+            'stints': url_for('api_telemetry_stints', year=year, location=location)
         }
 
-    return render_template('telemetry.html', plot_urls=plot_urls, year=year, location=location)
+    return render_template('telemetry.html', plot_urls=plot_urls, data_urls=data_urls,
+                           year=year, location=location, live_mode=live_mode)
 
 
 @app.route('/plot/telemetry/position.png')
@@ -98,13 +388,18 @@ def plot_telemetry_position():
         return "Erro: Ano e Localização são necessários.", 400
 
     try:
-        fig = openf1_api.get_position_plot(year=int(year), location=location)
-        if fig is None:
+        session_key = openf1_api._get_session_key(int(year), location)
+        response = None
+        if session_key:
+            version, max_age = _session_version(session_key)
+            response = _png_response(
+                'telemetry/position', {'year': year, 'location': location}, version,
+                render_queue.render_telemetry_position, (int(year), location), max_age=max_age,
+                prepare=lambda: openf1_api.prefetch_plot(session_key, 'position')
+            )
+        if response is None:
              return f"Erro: Não foi possível gerar o gráfico. Dados não encontrados para {location} {year}?", 404
-
-        output = io.BytesIO()
-        FigureCanvas(fig).print_png(output)
-        return Response(output.getvalue(), mimetype='image/png')
+        return response
     except Exception as e:
         print(f"Erro ao gerar gráfico de posição: {e}")
         return f"Erro interno ao gerar gráfico: {e}", 500
@@ -121,17 +416,290 @@ def plot_telemetry_overtakes():
         return "Erro: Ano e Localização são necessários.", 400
 
     try:
-        fig = openf1_api.get_overtakes_plot(year=int(year), location=location)
-        if fig is None:
+        session_key = openf1_api._get_session_key(int(year), location)
+        response = None
+        if session_key:
+            version, max_age = _session_version(session_key)
+            response = _png_response(
+                'telemetry/overtakes', {'year': year, 'location': location}, version,
+                render_queue.render_telemetry_overtakes, (int(year), location), max_age=max_age,
+                prepare=lambda: openf1_api.prefetch_plot(session_key, 'overtakes')
+            )
+        if response is None:
              return f"Erro: Não foi possível gerar o gráfico. Dados não encontrados para {location} {year}?", 404
-             
-        output = io.BytesIO()
-        FigureCanvas(fig).print_png(output)
-        return Response(output.getvalue(), mimetype='image/png')
+        return response
     except Exception as e:
         print(f"Erro ao gerar gráfico de ultrapassagem: {e}")
         return f"Erro interno ao gerar gráfico: {e}", 500
 
+@app.route('/plot/telemetry/overtake_events.png')
+def plot_telemetry_overtake_events():
+    """
+    Endpoint que gera o gráfico da tabela de ultrapassagens (por volta e por piloto).
+    """
+    year = request.args.get('year')
+    location = request.args.get('location')
+
+    if not year or not location:
+        return "Erro: Ano e Localização são necessários.", 400
+
+    try:
+        session_key = openf1_api._get_session_key(int(year), location)
+        response = None
+        if session_key:
+            version, max_age = _session_version(session_key)
+            response = _png_response(
+                'telemetry/overtake_events', {'year': year, 'location': location}, version,
+                render_queue.render_telemetry_overtake_events, (int(year), location), max_age=max_age,
+                prepare=lambda: openf1_api.prefetch_plot(session_key, 'overtake_events')
+            )
+        if response is None:
+             return f"Erro: Não foi possível gerar o gráfico. Dados não encontrados para {location} {year}?", 404
+        return response
+    except Exception as e:
+        print(f"Erro ao gerar gráfico da tabela de ultrapassagens: {e}")
+        return f"Erro interno ao gerar gráfico: {e}", 500
+
+@app.route('/plot/telemetry/stints.png')
+def plot_telemetry_stints():
+    """
+    Endpoint que gera o gráfico de stints (ritmo e degradação) e do gap para o líder.
+    """
+    year = request.args.get('year')
+    location = request.args.get('location')
+
+    if not year or not location:
+        return "Erro: Ano e Localização são necessários.", 400
+
+    try:
+        session_key = openf1_api._get_session_key(int(year), location)
+        response = None
+        if session_key:
+            version, max_age = _session_version(session_key)
+            response = _png_response(
+                'telemetry/stints',
+                {'year': year, 'location': location, 'analytics': pace.ANALYTICS_FORMAT_VERSION}, version,
+                render_queue.render_telemetry_stints, (int(year), location), max_age=max_age,
+                prepare=lambda: openf1_api.prefetch_plot(session_key, 'stints')
+            )
+        if response is None:
+             return f"Erro: Não foi possível gerar o gráfico. Dados não encontrados para {location} {year}?", 404
+        return response
+    except Exception as e:
+        print(f"Erro ao gerar gráfico de stints: {e}")
+        return f"Erro interno ao gerar gráfico: {e}", 500
+
+@app.route('/api/driver_performance')
+def api_driver_performance():
+    """
+    Tabela de desempenho dos pilotos (position.csv) em formato colunar,
+    para o gráfico desenhado no navegador. Tempos em milissegundos.
+    """
+    snapshot = dataset_store.current()
+    if snapshot is None:
+        return jsonify({'error': 'Dados de análise não carregados.'}), 500
+
+    return _json_response(
+        'api/driver_performance', {}, snapshot.version,
+        lambda: columnar.frame_to_columns(snapshot.df_pilotos, index_name='Driver')
+    )
+
+@app.route('/api/telemetry/positions')
+def api_telemetry_positions():
+    """
+    Séries de posição por piloto (tempo em ms desde 't0').
+    steps=0 devolve todas as amostras; o padrão mantém só as mudanças de posição.
+    max_points=N limita os pontos por piloto (LTTB).
+    """
+    downsample = request.args.get('steps', '1') != '0'
+    max_points = request.args.get('max_points', 0, type=int)
+    if max_points < 0:
+        return jsonify({'error': "Parâmetro inválido: 'max_points' deve ser >= 0."}), 400
+    return _telemetry_json(
+        'api/telemetry/positions',
+        lambda year, location: openf1_api.get_position_series(
+            year, location, downsample=downsample, max_points=max_points),
+        steps=int(downsample), max_points=max_points
+    )
+
+@app.route('/api/telemetry/laps')
+def api_telemetry_laps():
+    """
+    Posição de cada piloto ao fim de cada volta.
+    max_points=N limita os pontos por piloto (LTTB).
+    """
+    max_points = request.args.get('max_points', 0, type=int)
+    if max_points < 0:
+        return jsonify({'error': "Parâmetro inválido: 'max_points' deve ser >= 0."}), 400
+    return _telemetry_json(
+        'api/telemetry/laps',
+        lambda year, location: openf1_api.get_lap_positions(year, location, max_points=max_points),
+        max_points=max_points
+    )
+
+@app.route('/api/telemetry/stints')
+def api_telemetry_stints():
+    """
+    Ritmo por stint (composto, ritmo médio, degradação em s/volta), melhores
+    setores por piloto e gap para o líder volta a volta.
+    """
+    return _telemetry_json('api/telemetry/stints', openf1_api.get_lap_analytics,
+                           analytics=pace.ANALYTICS_FORMAT_VERSION)
+
+@app.route('/api/telemetry/overtakes')
+def api_telemetry_overtakes():
+    """
+    Tabela de ultrapassagens de uma corrida em JSON.
+    """
+    def build(year, location):
+        events = openf1_api.get_overtake_events(year, location)
+        if events is None:
+            return None
+        return {
+            'year': year,
+            'location': location,
+            'count': len(events),
+            'events': overtakes.events_to_records(events),
+        }
+
+    return _telemetry_json('api/telemetry/overtakes', build, events=overtakes.EVENTS_FORMAT_VERSION)
+
+@app.route('/api/telemetry/live')
+def api_telemetry_live():
+    """
+    Posições de uma sessão em andamento via Server-Sent Events: 'snapshot' com o
+    estado atual e depois um 'delta' com as amostras novas a cada busca na OpenF1.
+    Todos os espectadores da mesma sessão compartilham um único poller.
+    """
+    year = request.args.get('year')
+    location = request.args.get('location')
+    if not year or not year.isdigit() or not location:
+        return jsonify({'error': 'Ano e Localização são necessários.'}), 400
+
+    session_key = openf1_api._get_session_key(int(year), location)
+    if not session_key:
+        return jsonify({'error': f'Sessão não encontrada para {location} {year}.'}), 404
+
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    response = Response(live.events(session_key, last_event_id), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # nginx: não segurar o stream em buffer
+    return response
+
+
+RANGE_ARGS_ERROR = ("Parâmetros inválidos: 'from' (ano) é obrigatório; 'to' e 'limit' são inteiros, "
+                    "com from <= to e limit >= 0.")
+
+
+def _year_range_args(args, with_limit=True):
+    """
+    (from, to, limit) de /api/standings, /api/season e do lote. Levanta KeyError
+    sem 'from' e ValueError para valores não inteiros, from > to ou limit negativo
+    (LIMIT -1 chegaria ao PostgreSQL como erro 500).
+    """
+    year_from = int(args['from'])
+    year_to = int(args.get('to', year_from))
+    if year_from > year_to:
+        raise ValueError('from > to')
+    limit = None
+    if with_limit and 'limit' in args:
+        limit = int(args['limit'])
+        if limit < 0:
+            raise ValueError('limit < 0')
+    return year_from, year_to, limit
+
+
+@app.route('/api/standings')
+def api_standings():
+    """
+    Vitórias, pódios e poles por piloto num intervalo de anos (PostgreSQL).
+    Ex: /api/standings?from=2023&to=2024&limit=10
+    """
+    try:
+        year_from, year_to, limit = _year_range_args(request.args)
+    except (KeyError, ValueError):
+        return jsonify({'error': RANGE_ARGS_ERROR}), 400
+
+    try:
+        with db.pooled_connection() as conn:
+            rows = standings.driver_standings(conn, year_from, year_to, limit)
+        return jsonify({'from': year_from, 'to': year_to, 'drivers': rows})
+    except Exception as e:
+        print(f"Erro ao consultar a classificação: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/season')
+def api_season():
+    """
+    Tabela consolidada por temporada (pontos, vitórias, pódios, poles, posições
+    ganhas) gerada pelo processamento em lote. Ex: /api/season?from=2023&to=2024&limit=10
+    """
+    try:
+        year_from, year_to, limit = _year_range_args(request.args)
+    except (KeyError, ValueError):
+        return jsonify({'error': RANGE_ARGS_ERROR}), 400
+
+    rows = season.load_season_drivers(year_from, year_to, limit=limit)
+    if rows is None:
+        return jsonify({'error': 'Tabelas ainda não geradas. Use POST /api/season/batch.'}), 404
+    return jsonify({'from': year_from, 'to': year_to, 'drivers': rows})
+
+
+@app.route('/api/season/batch', methods=['GET', 'POST'])
+def api_season_batch():
+    """
+    POST inicia o processamento em lote de um intervalo de anos (from, to, force=1)
+    e responde 202 com a URL de acompanhamento; GET mostra o progresso.
+    Só um lote roda por vez (409 se já houver um em andamento).
+    """
+    if request.method == 'GET':
+        return jsonify(season_batch.status())
+
+    try:
+        year_from, year_to, _limit = _year_range_args(request.values, with_limit=False)
+    except (KeyError, ValueError):
+        return jsonify({'error': "Parâmetros inválidos: 'from' (ano) é obrigatório; 'to' é inteiro, com from <= to."}), 400
+
+    if not season_batch.start(year_from, year_to, force=request.values.get('force') == '1'):
+        return jsonify({'error': 'Já existe um processamento em andamento.', **season_batch.status()}), 409
+    status_url = url_for('api_season_batch')
+    response = jsonify({'status': 'running', 'poll': status_url})
+    response.status_code = 202
+    response.headers['Location'] = status_url
+    return response
+
+
+@app.route('/stats/render')
+def render_stats():
+    """
+    Métricas de memória da renderização (figuras vivas, RSS atual e pico) de
+    cada worker do pool, as do processo web e as da fila de renderização
+    (jobs pendentes, unificados, concluídos).
+    """
+    stats = {
+        'workers': plot_queue.worker_memory(),
+        'web': rendering.memory_stats(),
+        'queue': plot_queue.stats(),
+    }
+    return jsonify(stats)
+
+
+@app.route('/stats/live')
+def live_stats():
+    """Sessões ao vivo acompanhadas: espectadores, amostras e buscas feitas na OpenF1."""
+    return jsonify(live.stats())
+
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """
+    Contadores e histogramas por etapa (busca HTTP, parse, transformações,
+    figura, PNG), acertos dos caches e tempos por rota, no formato do Prometheus.
+    Cada processo expõe os próprios valores.
+    """
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,76 @@
+"""
+Benchmark de analysis_core.get_driver_performance contra a implementação anterior
+(df.copy() + apply(calculate_points) + lambdas no groupby).
+
+Uso:
+    python benchmarks/bench_driver_performance.py [--seasons 20] [--drivers 24] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import analysis_core  # noqa: E402
+from synthetic import make_results  # noqa: E402
+
+
+def legacy_driver_performance(df):
+    """Implementação anterior, mantida aqui apenas como referência de desempenho."""
+    df_copy = df.copy()
+    if 'Sprint' not in df_copy.columns:
+        df_copy['Sprint'] = df_copy['Circuit'].str.contains('Sprint', case=False, na=False)
+    if 'Fastest Lap' not in df_copy.columns:
+        df_copy['Fastest Lap'] = df_copy['Position'].isin([1, 2])
+    df_copy['pontos'] = df_copy.apply(analysis_core.calculate_points, axis=1)
+    df_pilotos = df_copy.groupby('Driver').agg(
+        total_pontos=('pontos', 'sum'),
+        media_posicao=('Position', 'mean'),
+        melhor_posicao=('Position', 'min'),
+        pior_posicao=('Position', 'max'),
+        poles=('Position', lambda x: (x == 1).sum()),
+        podiums=('Position', lambda x: (x <= 3).sum()),
+        corridas_disputadas=('Circuit', 'nunique'),
+        media_tempo_qualify=('Time', 'mean')
+    ).sort_values(by='total_pontos', ascending=False)
+    df_pilotos['media_tempo_qualify_str'] = df_pilotos['media_tempo_qualify'].apply(analysis_core.format_time)
+    return df_pilotos
+
+
+def best_of(func, repeat: int) -> tuple:
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seasons', type=int, default=20)
+    parser.add_argument('--drivers', type=int, default=24)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    df = make_results(args.seasons, args.drivers)
+    print(f"{len(df)} linhas ({args.seasons} temporadas x {args.drivers} pilotos)")
+
+    legacy_time, legacy = best_of(lambda: legacy_driver_performance(df), args.repeat)
+    new_time, new = best_of(lambda: analysis_core.get_driver_performance(df), args.repeat)
+    cat_time, cat = best_of(lambda: analysis_core.get_driver_performance(df, categorical=True), args.repeat)
+
+    pd.testing.assert_frame_equal(legacy.sort_index(), new.sort_index())
+    pd.testing.assert_frame_equal(legacy.sort_index(), cat.sort_index())
+
+    print(f"anterior:             {legacy_time * 1000:9.1f} ms")
+    print(f"vetorizado:           {new_time * 1000:9.1f} ms ({legacy_time / new_time:5.1f}x)")
+    print(f"vetorizado+category:  {cat_time * 1000:9.1f} ms ({legacy_time / cat_time:5.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
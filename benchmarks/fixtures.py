@@ -0,0 +1,242 @@
+"""
+Respostas gravadas dos endpoints da OpenF1 e um servidor local que as serve.
+
+Gravar uma corrida real (uma vez, com rede):
+    python benchmarks/fixtures.py record 9158 --out benchmarks/fixtures/monza-2023
+
+Gerar fixtures sintéticas no mesmo formato:
+    python benchmarks/fixtures.py synthetic --out /tmp/fixtures --samples 20000
+
+Reproduzir uma sessão gravada como se estivesse ao vivo (modo ao vivo do app):
+    python benchmarks/fixtures.py replay benchmarks/fixtures/monza-2023 --speed 10 --port 8765
+    OPENF1_API_URL=http://127.0.0.1:8765/v1 python app.py
+
+Os benchmarks apontam OPENF1_API_URL para FixtureServer, então o caminho medido
+(HTTP, cache, parsing, plotagem) é o mesmo de produção, sem depender da API.
+"""
+import argparse
+import gzip
+import json
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote_plus, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import synthetic  # noqa: E402
+
+ENDPOINTS = ('sessions', 'position', 'laps', 'stints', 'drivers')
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Campo de tempo dos endpoints que crescem durante a sessão (usado no replay)
+TIME_FIELDS = {'position': 'date', 'laps': 'date_start'}
+
+
+def save(responses: dict, directory: str) -> None:
+    os.makedirs(directory, exist_ok=True)
+    for endpoint, records in responses.items():
+        with gzip.open(os.path.join(directory, f'{endpoint}.json.gz'), 'wt', encoding='utf-8') as f:
+            json.dump(records, f)
+
+
+def load(directory: str) -> dict:
+    responses = {}
+    for endpoint in ENDPOINTS:
+        path = os.path.join(directory, f'{endpoint}.json.gz')
+        if os.path.exists(path):
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                responses[endpoint] = json.load(f)
+    return responses
+
+
+def record(session_key: int, directory: str, base_url: str = "https://api.openf1.org/v1") -> dict:
+    """Baixa sessions/position/laps/stints/drivers de uma sessão e grava em `directory`."""
+    import requests
+
+    responses = {}
+    for endpoint in ENDPOINTS:
+        response = requests.get(f"{base_url}/{endpoint}", params={'session_key': session_key}, timeout=120)
+        response.raise_for_status()
+        responses[endpoint] = response.json()
+        print(f"{endpoint}: {len(responses[endpoint])} registros")
+    save(responses, directory)
+    return responses
+
+
+def _parse_filters(query: str) -> list:
+    """
+    Filtros da query string como (campo, operador, valor).
+    A OpenF1 aceita comparações direto na query (ex: 'date>2024-03-02T15:10:00'),
+    que parse_qsl não separa.
+    """
+    filters = []
+    for part in filter(None, query.split('&')):
+        part = unquote_plus(part)
+        match = re.match(r'^([^<>=]+)(>=|<=|>|<|=)(.*)$', part)
+        if match:
+            filters.append(match.groups())
+    return filters
+
+
+def _parse_time(value) -> datetime:
+    """Data ISO 8601 da OpenF1 como datetime com fuso (sem fuso = UTC)."""
+    parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _comparable(current, value: str) -> tuple:
+    """Os dois lados como datas, números ou, em último caso, texto."""
+    for parse in (_parse_time, float):
+        try:
+            return parse(current), parse(value)
+        except (TypeError, ValueError):
+            pass
+    return str(current), value
+
+
+def _matches(record: dict, field: str, op: str, value: str) -> bool:
+    current = record.get(field)
+    if op == '=':
+        return str(current).lower() == value.lower()
+    current, value = _comparable(current, value)
+    return {'>': current > value, '>=': current >= value,
+            '<': current < value, '<=': current <= value}[op]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    responses = {}
+
+    def _records(self, endpoint: str):
+        return self.responses.get(endpoint)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        endpoint = url.path.rstrip('/').rsplit('/', 1)[-1]
+        records = self._records(endpoint)
+        if records is None:
+            self.send_error(404)
+            return
+        for field, op, value in _parse_filters(url.query):
+            records = [r for r in records if _matches(r, field, op, value)]
+        body = json.dumps(records).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FixtureServer:
+    """
+    Servidor HTTP local (porta livre) com as respostas gravadas.
+    Uso: with FixtureServer(responses) as base_url: ...
+    """
+
+    def __init__(self, responses: dict, port: int = 0):
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), self._handler(responses))
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def __enter__(self) -> str:
+        self._thread.start()
+        return self.base_url
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self, responses: dict):
+        return type('FixtureHandler', (_Handler,), {'responses': responses})
+
+
+class _ReplayHandler(_Handler):
+    times = {}      # endpoint -> datas (datetime) alinhadas com os registros
+    clock = None    # () -> datetime do instante simulado
+
+    def _records(self, endpoint: str):
+        records = self.responses.get(endpoint)
+        times = self.times.get(endpoint)
+        if records is None or times is None:
+            return records
+        now = self.clock()
+        return [r for r, t in zip(records, times) if t is not None and t <= now]
+
+
+class ReplayServer(FixtureServer):
+    """
+    Como FixtureServer, mas position e laps só mostram os registros até um
+    relógio simulado que começa na primeira amostra da sessão (mais `offset`
+    segundos) e anda `speed` vezes mais rápido que o relógio real.
+    Uso: with ReplayServer(responses, speed=10) as base_url: ...
+    """
+
+    def __init__(self, responses: dict, speed: float = 1.0, offset: float = 0.0, port: int = 0):
+        self.speed = speed
+        self.times = {}
+        for endpoint, field in TIME_FIELDS.items():
+            if endpoint in responses:
+                self.times[endpoint] = [_parse_time(r[field]) if r.get(field) else None
+                                        for r in responses[endpoint]]
+        known = [t for times in self.times.values() for t in times if t is not None]
+        self.start = (min(known) if known else datetime.now(timezone.utc)) + timedelta(seconds=offset)
+        self._started = time.monotonic()
+        super().__init__(responses, port)
+
+    def now(self) -> datetime:
+        """Instante simulado da sessão."""
+        return self.start + timedelta(seconds=(time.monotonic() - self._started) * self.speed)
+
+    def _handler(self, responses: dict):
+        return type('ReplayHandler', (_ReplayHandler,), {
+            'responses': responses, 'times': self.times, 'clock': staticmethod(self.now),
+        })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fixtures da OpenF1 para os benchmarks")
+    sub = parser.add_subparsers(dest='command', required=True)
+    rec = sub.add_parser('record', help="Grava as respostas reais de uma sessão")
+    rec.add_argument('session_key', type=int)
+    rec.add_argument('--out', required=True)
+    rec.add_argument('--base-url', default=os.getenv("OPENF1_API_URL", "https://api.openf1.org/v1"))
+    syn = sub.add_parser('synthetic', help="Gera fixtures sintéticas")
+    syn.add_argument('--out', required=True)
+    syn.add_argument('--drivers', type=int, default=20)
+    syn.add_argument('--samples', type=int, default=5_000, help="Amostras de /position na corrida")
+    syn.add_argument('--laps', type=int, default=57)
+    rep = sub.add_parser('replay', help="Serve uma sessão gravada como se estivesse ao vivo")
+    rep.add_argument('directory')
+    rep.add_argument('--speed', type=float, default=1.0, help="Velocidade do relógio simulado")
+    rep.add_argument('--offset', type=float, default=0.0, help="Segundos de sessão já decorridos no início")
+    rep.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        record(args.session_key, args.out, args.base_url)
+    elif args.command == 'replay':
+        with ReplayServer(load(args.directory), args.speed, args.offset, args.port) as base_url:
+            print(f"Replay em {base_url} (velocidade {args.speed}x). Ctrl+C para sair.")
+            try:
+                threading.Event().wait()
+            except KeyboardInterrupt:
+                pass
+    else:
+        responses = synthetic.make_openf1_session(args.drivers, args.samples, args.laps)
+        save(responses, args.out)
+        print({endpoint: len(records) for endpoint, records in responses.items()})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+"""
+Benchmarks dos caminhos críticos: carga do CSV, análise, plotagem local e
+os gráficos/séries da OpenF1 (servidos por fixtures locais).
+
+Uso:
+    python benchmarks/run.py                                 # dados sintéticos, tamanho padrão
+    python benchmarks/run.py --seasons 30 --samples 50000    # tamanho de produção
+    python benchmarks/run.py --fixtures benchmarks/fixtures/monza-2023
+    python benchmarks/run.py --save baseline.json            # grava o resultado
+    python benchmarks/run.py --baseline baseline.json        # falha (exit 1) se regredir
+
+Cada etapa reporta o melhor tempo de parede entre --repeat execuções, o pico de
+memória alocada (tracemalloc, numa execução separada) e a vazão (itens/s).
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fixtures  # noqa: E402
+import synthetic  # noqa: E402
+
+# Diferenças abaixo disso não contam como regressão (ruído de medição)
+MIN_DELTA_SECONDS = 0.005
+MIN_DELTA_BYTES = 1024 * 1024
+
+
+def measure(func, repeat: int, setup=None) -> dict:
+    """Melhor tempo de parede entre `repeat` execuções e pico de memória de uma execução."""
+    best = float('inf')
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    try:
+        func()
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'seconds': best, 'peak_bytes': peak}
+
+
+def run_stages(args, workdir: str, responses: dict) -> dict:
+    # Importados só depois de OPENF1_API_URL/APEX_CACHE_DIR apontarem para o ambiente do benchmark
+    import analysis_core
+    import data_loader
+    import f1_api
+    import overtakes
+    import pace
+    import rendering
+    from cache import default_cache
+    from telemetry_store import TelemetryStore, default_store as telemetry_store
+
+    session = responses['sessions'][0]
+    session_key, year, location = session['session_key'], session['year'], session['location']
+    n_positions, n_laps = len(responses['position']), len(responses['laps'])
+
+    def clear_caches():
+        default_cache.clear()
+        telemetry_store.clear()
+
+    csv_path = os.path.join(workdir, 'position.csv')
+    csv_rows = synthetic.write_position_csv(csv_path, args.seasons, args.drivers, args.races)
+    data_loader.DATA_FILE = csv_path
+    data_loader.get_cleaned_data()  # grava o cache binário para a etapa 'load_csv_cached'
+    df = data_loader.get_cleaned_data()
+    df_pilotos = analysis_core.get_driver_performance(df)
+
+    f1_api.prefetch_session(session_key)
+    pos_data = f1_api._fetch_position_data(session_key)
+    laps_data = f1_api._fetch_laps(session_key)
+    stints_data = f1_api._fetch_stints(session_key)
+
+    stages = [
+        # nome, função, itens processados, setup
+        ('load_csv', lambda: data_loader.get_cleaned_data(use_cache=False), csv_rows, None),
+        ('load_csv_cached', data_loader.get_cleaned_data, csv_rows, None),
+        ('driver_performance', lambda: analysis_core.get_driver_performance(df), len(df), None),
+        ('plot_performance_grid',
+         lambda: rendering.render_png(analysis_core.plot_driver_performance_grid(df_pilotos)), len(df_pilotos), None),
+        ('fetch_position_cold', lambda: f1_api._fetch_position_data(session_key), n_positions,
+         clear_caches),
+        # Store novo a cada execução: mede a abertura dos arquivos mapeados, não o cache de tabelas
+        ('read_position_stored', lambda: TelemetryStore(telemetry_store.directory).read(session_key, 'position'),
+         n_positions, None),
+        ('overtake_events', lambda: overtakes.compute_overtake_events(pos_data, laps_data), n_positions, None),
+        ('lap_analytics', lambda: pace.compute_lap_analytics(laps_data, stints_data), n_laps, None),
+        ('position_plot', lambda: rendering.render_png(f1_api.get_position_plot(year, location)), n_positions,
+         lambda: f1_api.prefetch_session(session_key)),
+        ('overtakes_plot', lambda: rendering.render_png(f1_api.get_overtakes_plot(year, location)), n_laps, None),
+        ('position_series', lambda: f1_api.get_position_series(year, location), n_positions, None),
+    ]
+
+    results = {}
+    for name, func, items, setup in stages:
+        if args.only and name not in args.only:
+            continue
+        result = measure(func, args.repeat, setup)
+        result['items'] = items
+        result['items_per_second'] = items / result['seconds'] if result['seconds'] > 0 else 0.0
+        results[name] = result
+    return results
+
+
+def print_results(results: dict) -> None:
+    print(f"{'etapa':<24}{'tempo (ms)':>12}{'pico (MB)':>12}{'itens':>10}{'itens/s':>14}")
+    for name, r in results.items():
+        print(f"{name:<24}{r['seconds'] * 1000:>12.1f}{r['peak_bytes'] / 2**20:>12.1f}"
+              f"{r['items']:>10}{r['items_per_second']:>14,.0f}")
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Etapas que ficaram mais de `threshold` (fração) mais lentas ou maiores que o baseline."""
+    regressions = []
+    for name, r in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for metric, floor in (('seconds', MIN_DELTA_SECONDS), ('peak_bytes', MIN_DELTA_BYTES)):
+            limit = base[metric] * (1 + threshold)
+            if r[metric] > limit and r[metric] - base[metric] > floor:
+                regressions.append(f"{name}.{metric}: {r[metric]:.4g} > {base[metric]:.4g} (+{threshold:.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks do Apex-Insights")
+    parser.add_argument('--seasons', type=int, default=10)
+    parser.add_argument('--drivers', type=int, default=20)
+    parser.add_argument('--races', type=int, default=22, help="Corridas por temporada")
+    parser.add_argument('--samples', type=int, default=10_000, help="Amostras de /position por corrida")
+    parser.add_argument('--laps', type=int, default=57)
+    parser.add_argument('--fixtures', help="Diretório com respostas gravadas (fixtures.py record)")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', nargs='*', help="Roda só as etapas indicadas")
+    parser.add_argument('--verbose', action='store_true', help="Mostra os logs do app")
+    parser.add_argument('--save', help="Grava o resultado em JSON")
+    parser.add_argument('--baseline', help="JSON de uma execução anterior para comparar")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="Piora máxima aceita em relação ao baseline (fração)")
+    args = parser.parse_args()
+
+    if args.fixtures:
+        responses = fixtures.load(args.fixtures)
+    else:
+        responses = synthetic.make_openf1_session(args.drivers, args.samples, args.laps)
+
+    with tempfile.TemporaryDirectory(prefix='apex-bench-') as workdir, \
+            fixtures.FixtureServer(responses) as base_url:
+        os.environ['OPENF1_API_URL'] = base_url
+        os.environ['APEX_CACHE_DIR'] = os.path.join(workdir, 'cache')
+        os.environ['APEX_TELEMETRY_DIR'] = os.path.join(workdir, 'telemetry')
+        # Os módulos do app logam com print; o relatório fica só com a tabela final
+        with open(os.devnull, 'w') as devnull, \
+                contextlib.redirect_stdout(sys.stdout if args.verbose else devnull):
+            results = run_stages(args, workdir, responses)
+
+    print_results(results)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'args': vars(args), 'results': results}, f, indent=2)
+        print(f"Resultado gravado em {args.save}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print("❌ Regressões:")
+            for line in regressions:
+                print(f"   - {line}")
+            sys.exit(1)
+        print(f"✅ Nenhuma etapa piorou mais de {args.threshold:.0%} em relação ao baseline.")
+
+
+if __name__ == '__main__':
+    main()
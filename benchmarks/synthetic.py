@@ -0,0 +1,120 @@
+"""
+Geradores de dados sintéticos para os benchmarks.
+
+- make_results: resultados por piloto/corrida já no formato limpo de
+  data_loader.get_cleaned_data (posição numérica, tempo como timedelta).
+- write_position_csv: os mesmos resultados num position.csv no formato bruto
+  lido por data_loader (com tempos 'M:SS.fff', DNFs e linhas repetidas para a
+  deduplicação).
+- make_openf1_session: respostas dos endpoints da OpenF1 (sessions, position,
+  laps, stints, drivers) para uma corrida, no formato JSON da API.
+"""
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+SESSION_KEY = 9999
+YEAR = 2024
+LOCATION = 'Benchmark'
+
+
+def make_results(seasons: int, drivers: int, races_per_season: int = 22, seed: int = 0,
+                 rng: np.random.Generator | None = None) -> pd.DataFrame:
+    """
+    Uma linha por piloto/corrida (Circuit, Driver, Position, Time), no formato de
+    data_loader.get_cleaned_data. `rng` permite continuar a mesma sequência aleatória.
+    """
+    rng = rng if rng is not None else np.random.default_rng(seed)
+    races = seasons * races_per_season
+    circuits = np.repeat([f"GP {s:02d}-{r:02d}" for s in range(seasons) for r in range(races_per_season)], drivers)
+    driver_names = np.tile([f"Piloto {d:02d}" for d in range(drivers)], races)
+    positions = np.concatenate([rng.permutation(drivers) + 1 for _ in range(races)])
+    times = pd.to_timedelta(rng.normal(85_000, 2_500, len(circuits)).round(), unit='ms')
+    return pd.DataFrame({'Circuit': circuits, 'Driver': driver_names, 'Position': positions, 'Time': times})
+
+
+def write_position_csv(path: str, seasons: int, drivers: int, races_per_season: int = 22,
+                       duplicate_rate: float = 0.05, dnf_rate: float = 0.03, seed: int = 0) -> int:
+    """Grava o CSV (resultados de make_results no formato bruto) e retorna o número de linhas."""
+    rng = np.random.default_rng(seed)
+    results = make_results(seasons, drivers, races_per_season, rng=rng)
+    ms = (results['Time'] // pd.Timedelta(milliseconds=1)).to_numpy(dtype=np.int64)
+    times = np.array([f"{m // 60_000}:{(m % 60_000) / 1000:06.3f}" for m in ms], dtype=object)
+    positions = results['Position'].to_numpy().astype(object)
+
+    dnf = rng.random(len(results)) < dnf_rate
+    positions[dnf] = 'DNF'
+    times[dnf] = ''
+
+    df = pd.DataFrame({'Circuit': results['Circuit'], 'Driver': results['Driver'],
+                       'Time': times, 'Position': positions})
+    # Tentativas repetidas do mesmo piloto/circuito (data_loader fica com o melhor tempo)
+    repeated = df.sample(frac=duplicate_rate, random_state=seed)
+    df = pd.concat([df, repeated]).sample(frac=1, random_state=seed)
+    df.to_csv(path, index=False)
+    return len(df)
+
+
+def make_openf1_session(drivers: int = 20, samples_per_race: int = 5_000, laps: int = 57,
+                        pit_lap: int = 20, seed: int = 0) -> dict:
+    """
+    Respostas {endpoint: [registros]} de uma corrida sintética.
+    samples_per_race é o total de amostras de /position (todas as trocas de posição).
+    """
+    rng = np.random.default_rng(seed)
+    numbers = list(range(1, drivers + 1))
+    start = datetime(YEAR, 3, 2, 15, 0, tzinfo=timezone.utc)
+    duration = timedelta(seconds=90 * laps)
+
+    sessions = [{
+        'session_key': SESSION_KEY, 'meeting_key': 1, 'year': YEAR, 'location': LOCATION,
+        'circuit_short_name': LOCATION, 'country_name': LOCATION, 'session_type': 'Race',
+        'session_name': 'Race', 'date_start': start.isoformat(), 'date_end': (start + duration).isoformat(),
+    }]
+
+    # Grid e depois trocas entre vizinhos (cada troca gera duas amostras)
+    order = list(numbers)
+    position = [{'date': start.isoformat(), 'driver_number': d, 'position': i + 1,
+                 'session_key': SESSION_KEY, 'meeting_key': 1} for i, d in enumerate(order)]
+    swaps = max((samples_per_race - drivers) // 2, 0)
+    offsets = np.sort(rng.uniform(0, duration.total_seconds(), swaps))
+    for offset, i in zip(offsets, rng.integers(1, drivers, swaps)):
+        order[i - 1], order[i] = order[i], order[i - 1]
+        date = (start + timedelta(seconds=float(offset))).isoformat()
+        position.append({'date': date, 'driver_number': order[i - 1], 'position': int(i),
+                         'session_key': SESSION_KEY, 'meeting_key': 1})
+        position.append({'date': date, 'driver_number': order[i], 'position': int(i) + 1,
+                         'session_key': SESSION_KEY, 'meeting_key': 1})
+
+    lap_rows = []
+    for lap in range(1, laps + 1):
+        for i, d in enumerate(numbers):
+            lap_rows.append({
+                'session_key': SESSION_KEY, 'meeting_key': 1, 'driver_number': d, 'lap_number': lap,
+                'position': (i + lap) % drivers + 1,
+                'lap_duration': float(88 + rng.random() * 3),
+                'duration_sector_1': float(29 + rng.random()),
+                'duration_sector_2': float(30 + rng.random()),
+                'duration_sector_3': float(29 + rng.random()),
+                'is_pit_out_lap': lap == pit_lap + (i % 3),
+                'date_start': (start + timedelta(seconds=90 * (lap - 1) + 0.4 * i)).isoformat(),
+            })
+
+    # Dois stints por piloto, com a troca na volta de saída dos boxes de cada um
+    stint_rows = []
+    for i, d in enumerate(numbers):
+        stop = pit_lap + (i % 3)
+        stint_rows.append({'session_key': SESSION_KEY, 'meeting_key': 1, 'driver_number': d, 'stint_number': 1,
+                           'lap_start': 1, 'lap_end': stop - 1, 'compound': 'MEDIUM', 'tyre_age_at_start': 0})
+        stint_rows.append({'session_key': SESSION_KEY, 'meeting_key': 1, 'driver_number': d, 'stint_number': 2,
+                           'lap_start': stop, 'lap_end': laps, 'compound': 'HARD', 'tyre_age_at_start': 0})
+
+    driver_rows = [{
+        'session_key': SESSION_KEY, 'driver_number': d, 'name_acronym': f"P{d:02d}",
+        'full_name': f"Piloto {d:02d}", 'team_colour': f"{(d * 2654435761) % 0xFFFFFF:06X}",
+        'team_name': f"Equipe {d % 10}",
+    } for d in numbers]
+
+    return {'sessions': sessions, 'position': position, 'laps': lap_rows, 'stints': stint_rows,
+            'drivers': driver_rows}
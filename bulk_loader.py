@@ -0,0 +1,127 @@
+"""
+Carga em massa de posições no PostgreSQL via COPY.
+
+Em vez de um INSERT por linha (executemany), cada lote é enviado com
+`COPY ... FROM STDIN` para uma tabela temporária de staging e incorporado
+em 'positions' com um único `INSERT ... SELECT ... ON CONFLICT DO NOTHING`.
+
+Uso avulso (útil para testar contra um PostgreSQL local):
+    python bulk_loader.py arquivo_positions.csv [--batch-size 50000]
+"""
+import argparse
+import io
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+POSITION_COLUMNS = ["date", "driver_number", "meeting_key", "position", "session_key"]
+
+# Linhas por COPY + merge
+BATCH_SIZE = int(os.getenv("COPY_BATCH_SIZE", 50_000))
+
+_COLUMNS_SQL = ", ".join(POSITION_COLUMNS)
+
+# Staging com os mesmos tipos de 'positions', mas sem constraints/defaults
+STAGING_DDL = f"""
+CREATE TEMP TABLE IF NOT EXISTS positions_staging AS
+SELECT {_COLUMNS_SQL} FROM positions WITH NO DATA
+"""
+
+COPY_SQL = f"COPY positions_staging ({_COLUMNS_SQL}) FROM STDIN WITH (FORMAT csv)"
+
+MERGE_SQL = f"""
+INSERT INTO positions ({_COLUMNS_SQL})
+SELECT {_COLUMNS_SQL} FROM positions_staging
+ON CONFLICT DO NOTHING
+"""
+
+
+def _iter_batches(frames, batch_size: int):
+    """Reagrupa um DataFrame (ou uma sequência deles) em lotes de até batch_size linhas."""
+    if isinstance(frames, pd.DataFrame):
+        frames = [frames]
+    for frame in frames:
+        for start in range(0, len(frame), batch_size):
+            yield frame.iloc[start:start + batch_size]
+
+
+def _csv_frame(batch: pd.DataFrame) -> pd.DataFrame:
+    """
+    Seleciona as colunas do COPY e formata datas com fuso como texto ISO em UTC.
+    (o to_csv do pandas formata datetimes com fuso linha a linha, o que domina o tempo de carga)
+    Datas ausentes (NaT) viram campo vazio, que o COPY em formato csv lê como NULL.
+    """
+    frame = batch[POSITION_COLUMNS]
+    dates = frame["date"]
+    if isinstance(dates.dtype, pd.DatetimeTZDtype):
+        utc = dates.dt.tz_convert("UTC").dt.tz_localize(None).to_numpy()
+        text = np.char.add(np.datetime_as_string(utc, unit="us"), "+00:00").astype(object)
+        text[np.isnat(utc)] = None
+        frame = frame.assign(date=text)
+    return frame
+
+
+def copy_positions(conn, frames, batch_size: int = BATCH_SIZE, commit: bool = False,
+                   on_batch=None) -> dict:
+    """
+    Carrega posições (DataFrame ou iterável de DataFrames com POSITION_COLUMNS).
+    - commit=False: quem chama decide quando confirmar (ex: junto com o high-water mark);
+    - commit=True: confirma a cada lote.
+    - on_batch(batch): chamado depois de cada lote incorporado.
+    Retorna estatísticas: linhas lidas, inseridas, lotes, segundos e linhas/s.
+    """
+    stats = {"rows": 0, "inserted": 0, "batches": 0}
+    started = time.perf_counter()
+    with conn.cursor() as cursor:
+        cursor.execute(STAGING_DDL)
+        for batch in _iter_batches(frames, batch_size):
+            if batch.empty:
+                continue
+            buffer = io.StringIO()
+            _csv_frame(batch).to_csv(buffer, index=False, header=False)
+            buffer.seek(0)
+
+            cursor.copy_expert(COPY_SQL, buffer)
+            cursor.execute(MERGE_SQL)
+            stats["inserted"] += max(cursor.rowcount, 0)
+            cursor.execute("TRUNCATE positions_staging")
+
+            stats["rows"] += len(batch)
+            stats["batches"] += 1
+            if commit:
+                conn.commit()
+            if on_batch is not None:
+                on_batch(batch)
+
+    stats["seconds"] = time.perf_counter() - started
+    stats["rows_per_second"] = stats["rows"] / stats["seconds"] if stats["seconds"] > 0 else 0.0
+    return stats
+
+
+def format_stats(stats: dict) -> str:
+    """Resumo de throughput para os logs."""
+    return (f"{stats['rows']} linhas em {stats['batches']} lotes, {stats['inserted']} novas, "
+            f"{stats['seconds']:.2f}s ({stats['rows_per_second']:,.0f} linhas/s)")
+
+
+def main():
+    import db
+
+    parser = argparse.ArgumentParser(description="Carga em massa de um CSV de posições (formato OpenF1)")
+    parser.add_argument("csv_path", help="CSV com as colunas " + ", ".join(POSITION_COLUMNS))
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    conn = db.get_connection()
+    try:
+        frames = pd.read_csv(args.csv_path, chunksize=args.batch_size)
+        stats = copy_positions(conn, frames, batch_size=args.batch_size, commit=True)
+        print(f"✅ Posições carregadas: {format_stats(stats)}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
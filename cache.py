@@ -0,0 +1,209 @@
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+
+# Configurações do cache local (podem ser sobrescritas por variáveis de ambiente)
+CACHE_DIR = os.getenv(
+    "APEX_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "openf1")
+)
+CACHE_MAX_BYTES = int(os.getenv("APEX_CACHE_MAX_BYTES", 512 * 1024 * 1024))  # 512 MB em disco
+CACHE_MEMORY_BYTES = int(os.getenv("APEX_CACHE_MEMORY_BYTES", 128 * 1024 * 1024))  # 128 MB em memória
+
+
+def make_key(endpoint: str, params: dict | None = None) -> str:
+    """
+    Gera a chave (endereçada por conteúdo) de uma consulta: endpoint + query ordenada.
+    Ex: ('position', {'session_key': 9158}) -> sha256('position?session_key=9158')
+    """
+    params = params or {}
+    query = "&".join(f"{k}={params[k]}" for k in sorted(params))
+    canonical = f"{endpoint.strip('/')}?{query}"
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class DiskCache:
+    """
+    Cache em dois níveis para os dados da OpenF1:
+      - memória: LRU limitado por bytes (acessos repetidos no mesmo worker);
+      - disco: um arquivo binário (pickle dos DataFrames, já colunares) por chave,
+        com despejo LRU quando o diretório passa de `max_bytes`.
+    Dados de corridas encerradas não mudam, então por padrão as entradas não expiram;
+    use `ttl` (segundos) para consultas que podem mudar (ex: lista de sessões do ano).
+    """
+
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES,
+                 memory_bytes: int = CACHE_MEMORY_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.memory_bytes = memory_bytes
+        self._memory = OrderedDict()  # key -> (created_at, value, nbytes)
+        self._memory_size = 0
+        self._lock = threading.RLock()
+        self._disk_size = None  # calculado sob demanda
+
+    # --- Caminhos e tamanho em disco ---
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.pkl")
+
+    def _iter_files(self):
+        if not os.path.isdir(self.directory):
+            return
+        for root, _dirs, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".pkl"):
+                    yield os.path.join(root, name)
+
+    def _current_disk_size(self) -> int:
+        if self._disk_size is None:
+            self._disk_size = sum(os.path.getsize(p) for p in self._iter_files())
+        return self._disk_size
+
+    # --- Nível de memória ---
+
+    def _memory_get(self, key: str):
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+        return entry
+
+    def _memory_put(self, key: str, entry: tuple):
+        nbytes = entry[2]
+        if nbytes > self.memory_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_size -= old[2]
+        self._memory[key] = entry
+        self._memory_size += nbytes
+        while self._memory_size > self.memory_bytes and self._memory:
+            _key, evicted = self._memory.popitem(last=False)
+            self._memory_size -= evicted[2]
+
+    # --- API pública ---
+
+    def get(self, key: str, ttl: float | None = None):
+        """
+        Retorna o valor em cache ou None (ausente ou expirado).
+        O lock só protege o LRU em memória: a leitura do arquivo e o unpickle
+        (lentos para telemetria grande) rodam fora dele, sem bloquear as outras chaves.
+        """
+        with self._lock:
+            entry = self._memory_get(key)
+        result = 'memory_hit'
+        if entry is None:
+            path = self._path(key)
+            try:
+                with open(path, "rb") as f:
+                    payload = f.read()
+                created_at, value = pickle.loads(payload)
+            except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+                metrics.cache_result('openf1', 'miss')
+                return None
+            result = 'disk_hit'
+            # Marca o arquivo como usado recentemente (LRU do disco)
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            entry = (created_at, value, len(payload))
+            with self._lock:
+                current = self._memory.get(key)
+                # Um set() concorrente pode ter gravado um valor mais novo enquanto líamos
+                if current is not None and current[0] >= created_at:
+                    entry = current
+                else:
+                    self._memory_put(key, entry)
+
+        created_at, value, _nbytes = entry
+        if ttl is not None and time.time() - created_at > ttl:
+            metrics.cache_result('openf1', 'expired')
+            return None
+        metrics.cache_result('openf1', result)
+        return _copy_value(value)
+
+    def set(self, key: str, value) -> None:
+        """Grava o valor em memória e em disco (escrita atômica; pickle e escrita fora do lock)."""
+        created_at = time.time()
+        payload = pickle.dumps((created_at, value), protocol=pickle.HIGHEST_PROTOCOL)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+        with self._lock:
+            size = self._current_disk_size()
+            previous = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+            self._disk_size = size - previous + len(payload)
+            self._memory_put(key, (created_at, value, len(payload)))
+            self._evict_disk()
+
+    def get_or_fetch(self, endpoint: str, params: dict | None, fetch, ttl: float | None = None):
+        """
+        Busca (endpoint, params) no cache; se ausente, chama `fetch()` e armazena o resultado.
+        Resultados None não são armazenados (ex: sessão ainda sem dados).
+        """
+        key = make_key(endpoint, params)
+        value = self.get(key, ttl=ttl)
+        if value is not None:
+            return value
+        value = fetch()
+        if value is not None:
+            self.set(key, value)
+        return value
+
+    def clear(self) -> None:
+        """Remove todas as entradas (memória e disco)."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_size = 0
+            for path in list(self._iter_files()):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._disk_size = 0
+
+    def _evict_disk(self) -> None:
+        """Remove os arquivos menos usados até o diretório caber em `max_bytes`."""
+        if self._current_disk_size() <= self.max_bytes:
+            return
+        files = []
+        for path in self._iter_files():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+        total = sum(size for _mtime, size, _path in files)
+        for _mtime, size, path in files:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            key = os.path.basename(path)[:-len(".pkl")]
+            entry = self._memory.pop(key, None)
+            if entry is not None:
+                self._memory_size -= entry[2]
+        self._disk_size = total
+
+
+def _copy_value(value):
+    """Evita que quem chama altere o objeto guardado no nível de memória."""
+    copy = getattr(value, "copy", None)
+    return copy() if callable(copy) else value
+
+
+# Instância compartilhada pelo módulo f1_api
+default_cache = DiskCache()
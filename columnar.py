@@ -0,0 +1,35 @@
+"""
+Formato colunar compacto para as rotas /api/* (gráficos desenhados no navegador).
+
+Em vez de uma lista de objetos (nomes das colunas repetidos em toda linha),
+cada coluna vira uma lista: {"columns": [...], "index": [...], "data": {coluna: [...]}}.
+"""
+import numpy as np
+import pandas as pd
+
+
+def json_values(values) -> list:
+    """
+    Converte uma coluna em lista serializável: NaN/NA -> None, numpy -> Python,
+    timedelta -> milissegundos e datas -> ISO 8601.
+    """
+    series = pd.Series(values)
+    if pd.api.types.is_timedelta64_dtype(series.dtype):
+        series = series.dt.total_seconds() * 1000
+    elif pd.api.types.is_datetime64_any_dtype(series.dtype):
+        series = series.map(lambda ts: ts.isoformat(), na_action='ignore')
+    if pd.api.types.is_float_dtype(series.dtype):
+        # Reduz o ruído de ponto flutuante no JSON (ex: médias)
+        series = series.round(6)
+    out = series.astype(object).where(series.notna(), None)
+    return [value.item() if isinstance(value, np.generic) else value for value in out]
+
+
+def frame_to_columns(df: pd.DataFrame, index_name: str | None = None) -> dict:
+    """DataFrame -> {"index_name", "index", "columns", "data"} no formato colunar."""
+    return {
+        'index_name': index_name or df.index.name,
+        'index': json_values(df.index.to_series()),
+        'columns': [str(column) for column in df.columns],
+        'data': {str(column): json_values(df[column]) for column in df.columns},
+    }
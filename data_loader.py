@@ -1,38 +1,154 @@
+import hashlib
+import os
+import pickle
+
+import numpy as np
 import pandas as pd
 
+import metrics
+
 DATA_FILE = 'position.csv'
 
-def get_cleaned_data():
+# Tipos declarados (sem inferência): nomes repetidos viram 'category'
+CSV_DTYPES = {
+    'Circuit': 'category',
+    'Driver': 'category',
+    'Time': 'string',
+    'Position': 'string',
+}
+
+# Versão do formato limpo; mude quando a limpeza mudar para invalidar caches antigos
+CLEAN_FORMAT_VERSION = 1
+
+
+def _cache_path(data_file: str) -> str:
+    """Cache binário do DataFrame limpo, ao lado do CSV (pasta .cache)."""
+    folder = os.path.join(os.path.dirname(os.path.abspath(data_file)), '.cache')
+    return os.path.join(folder, os.path.basename(data_file) + '.clean.pkl')
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _load_cached(data_file: str, stat: os.stat_result):
+    """
+    Retorna o DataFrame em cache se ainda corresponde ao CSV.
+    Compara mtime/tamanho e, se diferirem, o hash do conteúdo (ex: arquivo apenas 'tocado').
     """
-    Lê o CSV 'position.csv' e aplica a limpeza básica.
+    path = _cache_path(data_file)
+    try:
+        with open(path, 'rb') as f:
+            cached = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+        return None
+    if cached.get('version') != CLEAN_FORMAT_VERSION:
+        return None
+    if cached['mtime_ns'] == stat.st_mtime_ns and cached['size'] == stat.st_size:
+        return cached['df']
+    if cached['size'] == stat.st_size and cached['sha256'] == _file_sha256(data_file):
+        save_cleaned_cache(data_file, stat, cached['df'], cached['sha256'])
+        return cached['df']
+    return None
+
+
+def save_cleaned_cache(data_file: str, stat: os.stat_result, df: pd.DataFrame, sha256: str | None = None):
+    path = _cache_path(data_file)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        payload = {
+            'version': CLEAN_FORMAT_VERSION,
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'sha256': sha256 or _file_sha256(data_file),
+            'df': df,
+        }
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Aviso: não foi possível gravar o cache de '{data_file}': {e}")
+
+
+def parse_lap_times_ms(times: pd.Series) -> pd.Series:
+    """
+    Converte tempos 'M:SS.fff' (ou 'SS.fff') em milissegundos (float, NaN se inválido).
+    Separa minutos/segundos pelo último ':' e converte cada parte numericamente;
+    a limpeza por regex só é aplicada às linhas que falharem nessa conversão direta.
+    """
+    def split_ms(values: pd.Series) -> pd.Series:
+        parts = values.str.rpartition(':')
+        minutes = pd.to_numeric(parts[0].replace('', '0'), errors='coerce')
+        seconds = pd.to_numeric(parts[2], errors='coerce')
+        return (minutes * 60_000 + seconds * 1000).round(3)
+
+    times = times.astype('string')
+    ms = split_ms(times)
+
+    # Remove caracteres não numéricos, exceto ':' e '.', só onde foi preciso
+    bad = times.notna() & ms.isna()
+    if bad.any():
+        cleaned = times[bad].str.replace(r'[^\d:.]', '', regex=True)
+        ms[bad] = split_ms(cleaned)
+    return ms.astype('float64')
+
+
+def clean_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aplica a limpeza a um DataFrame bruto (como lido do CSV).
+    Usada na carga completa e nos trechos novos anexados ao CSV (dataset.py).
+    """
+    # Tempo em ms (numérico) e como timedelta para a análise
+    df['Time_ms'] = parse_lap_times_ms(df['Time'])
+    df['Time'] = pd.to_timedelta(df['Time_ms'], unit='ms').astype('timedelta64[ns]')
+
+    # Garante que a Posição é numérica
+    df['Position'] = pd.to_numeric(df['Position'], errors='coerce').astype('float64')
+
+    # Remove duplicatas (pegando o melhor tempo por piloto/circuito) sem ordenar o frame todo:
+    # idxmin por grupo; tempos ausentes contam como 'infinito' para nunca vencer um tempo válido
+    best_time = df['Time_ms'].fillna(np.inf)
+    best_rows = best_time.groupby([df['Circuit'], df['Driver']], observed=True, dropna=False, sort=True).idxmin()
+    return df.loc[best_rows.to_numpy()]
+
+
+def _read_and_clean(data_file: str) -> pd.DataFrame:
+    with metrics.timer('csv_parse', source='position.csv'):
+        raw = pd.read_csv(data_file, dtype=CSV_DTYPES)
+    with metrics.timer('transform', step='clean_frame'):
+        return clean_frame(raw)
+
+
+def get_cleaned_data(use_cache: bool = True, data_file: str | None = None):
+    """
+    Lê o CSV 'position.csv' (ou `data_file`) e aplica a limpeza básica.
     Retorna um DataFrame pronto para análise.
     (Lógica baseada no seu 'calculo.py' original)
+
+    O resultado limpo fica em cache binário (.cache/position.csv.clean.pkl) e é
+    reaproveitado enquanto o CSV não mudar (mtime/tamanho ou hash do conteúdo).
     """
+    data_file = data_file or DATA_FILE
     try:
-        df = pd.read_csv(DATA_FILE)
+        stat = os.stat(data_file)
     except FileNotFoundError:
-        print(f"ERRO: O arquivo '{DATA_FILE}' não foi encontrado.")
+        print(f"ERRO: O arquivo '{data_file}' não foi encontrado.")
         print("Certifique-se de que ele está na mesma pasta que 'app.py'.")
         raise
-        
-    # Remove caracteres não numéricos, exceto ':' e '.'
-    df['Time'] = df['Time'].str.replace(r'[^\d:.]', '', regex=True)
-    
-    # Converte o tempo para timedelta (assumindo formato M:SS.fff)
-    # O prefixo '00:' o transforma em 'HH:MM:SS.fff'
-    try:
-        df['Time'] = pd.to_timedelta('00:' + df['Time'])
-    except Exception as e:
-        print(f"Erro ao converter coluna 'Time': {e}")
-        print("Verifique o formato dos tempos no CSV. Esperado algo como '1:23.456'.")
-        # Continua mesmo assim, mas a coluna 'Time' pode estar com problemas
-        df['Time'] = pd.NaT 
-
-    # Ordena e remove duplicatas (pegando o melhor tempo por piloto/circuito)
-    df.sort_values(by=['Circuit', 'Driver', 'Time'], inplace=True)
-    df.drop_duplicates(subset=['Circuit', 'Driver'], keep='first', inplace=True)
-    
-    # Garante que a Posição é numérica
-    df['Position'] = pd.to_numeric(df['Position'], errors='coerce')
-    
+
+    if use_cache:
+        with metrics.timer('cache_load', source='position.csv'):
+            df = _load_cached(data_file, stat)
+        metrics.cache_result('csv_clean', 'miss' if df is None else 'hit')
+        if df is not None:
+            return df
+
+    df = _read_and_clean(data_file)
+    if use_cache:
+        save_cleaned_cache(data_file, stat, df)
     return df
@@ -0,0 +1,191 @@
+import io
+import os
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+import analysis_core
+import data_loader
+
+# Intervalo entre verificações do CSV (segundos)
+POLL_INTERVAL = float(os.getenv("APEX_DATA_POLL_SECONDS", 5))
+
+# Bytes anteriores ao ponto já lido usados para detectar se o arquivo foi reescrito
+_SIGNATURE_BYTES = 256
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """
+    Versão imutável dos dados locais. Requisições em andamento continuam usando
+    o snapshot que pegaram; uma atualização só troca a referência em DatasetStore.
+    """
+    df: pd.DataFrame            # dados limpos (uma linha por Circuito/Piloto)
+    df_pilotos: pd.DataFrame    # tabela de desempenho (analysis_core)
+    aggregates: pd.DataFrame    # agregados acumuláveis por piloto
+    version: float              # mtime do CSV (entra no ETag dos gráficos)
+    offset: int                 # bytes do CSV já incorporados
+    signature: bytes            # últimos bytes antes de 'offset'
+    columns: tuple              # cabeçalho do CSV
+
+
+class DatasetStore:
+    """
+    Mantém os dados do position.csv em memória e os atualiza sem reiniciar o app.
+    Se o CSV só cresceu (linhas anexadas), lê apenas o trecho novo e atualiza
+    os agregados por piloto de forma incremental; se foi reescrito, recarrega tudo.
+    """
+
+    def __init__(self, data_file: str = data_loader.DATA_FILE, poll_interval: float = POLL_INTERVAL):
+        self.data_file = data_file
+        self.poll_interval = poll_interval
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._stop = threading.Event()
+
+    def current(self) -> Snapshot | None:
+        """Snapshot atual (leitura sem lock: a troca da referência é atômica)."""
+        return self._snapshot
+
+    # --- Carga completa ---
+
+    def _signature(self, offset: int) -> bytes:
+        with open(self.data_file, 'rb') as f:
+            f.seek(max(0, offset - _SIGNATURE_BYTES))
+            return f.read(min(offset, _SIGNATURE_BYTES))
+
+    def load(self) -> Snapshot:
+        """Carrega o CSV inteiro (usando o cache binário do data_loader)."""
+        with self._lock:
+            stat = os.stat(self.data_file)
+            df = data_loader.get_cleaned_data(data_file=self.data_file)
+            aggregates = analysis_core.driver_aggregates(df)
+            with open(self.data_file, 'rb') as f:
+                header = f.readline().decode('utf-8').strip()
+            snapshot = Snapshot(
+                df=df,
+                df_pilotos=analysis_core.finalize_driver_performance(aggregates),
+                aggregates=aggregates,
+                version=stat.st_mtime,
+                offset=stat.st_size,
+                signature=self._signature(stat.st_size),
+                columns=tuple(pd.read_csv(io.StringIO(header), nrows=0).columns),
+            )
+            self._snapshot = snapshot
+            return snapshot
+
+    # --- Atualização incremental ---
+
+    def refresh(self) -> bool:
+        """
+        Verifica o CSV e incorpora mudanças. Retorna True se um novo snapshot foi publicado.
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            if not os.path.exists(self.data_file):
+                return False
+            self.load()
+            return True
+        try:
+            stat = os.stat(self.data_file)
+        except FileNotFoundError:
+            return False
+        if stat.st_size == snapshot.offset and stat.st_mtime == snapshot.version:
+            return False
+
+        appended = stat.st_size > snapshot.offset and self._signature(snapshot.offset) == snapshot.signature
+        if not appended:
+            print(f"'{self.data_file}' foi reescrito; recarregando tudo...")
+            self.load()
+            return True
+
+        with self._lock:
+            with open(self.data_file, 'rb') as f:
+                f.seek(snapshot.offset)
+                tail = f.read(stat.st_size - snapshot.offset)
+            # Só linhas completas; uma linha ainda sendo escrita fica para a próxima verificação
+            end = tail.rfind(b'\n') + 1
+            if end == 0:
+                return False
+            new_snapshot = self._append(snapshot, tail[:end], stat.st_mtime, snapshot.offset + end)
+            self._snapshot = new_snapshot
+
+        if new_snapshot.offset == stat.st_size:
+            # Mantém o cache do data_loader em dia para a próxima subida do app
+            data_loader.save_cleaned_cache(self.data_file, stat, new_snapshot.df)
+        print(f"Dados locais atualizados: +{new_snapshot.offset - snapshot.offset} bytes incorporados.")
+        return True
+
+    def _append(self, snapshot: Snapshot, tail: bytes, version: float, offset: int) -> Snapshot:
+        raw = pd.read_csv(io.BytesIO(tail), header=None, names=list(snapshot.columns),
+                          dtype=data_loader.CSV_DTYPES)
+        new = data_loader.clean_frame(raw)
+        old = snapshot.df
+
+        # Rótulos únicos continuando os do snapshot anterior
+        start = int(old.index.max()) + 1 if len(old) else 0
+        new.index = pd.RangeIndex(start, start + len(new))
+
+        old_keys = pd.MultiIndex.from_arrays([old['Circuit'].astype(object), old['Driver'].astype(object)])
+        new_keys = pd.MultiIndex.from_arrays([new['Circuit'].astype(object), new['Driver'].astype(object)])
+        repeated = np.asarray(new_keys.isin(old_keys))
+
+        fresh = new[~repeated]
+        winners = new.iloc[0:0]
+        replaced = old.index[0:0]
+        if repeated.any():
+            # Mesmo (Circuito, Piloto) já existente: só substitui se o tempo novo for melhor
+            contested = new[repeated]
+            previous = old.iloc[old_keys.get_indexer(new_keys[repeated])]
+            better = (contested['Time_ms'].fillna(np.inf).to_numpy()
+                      < previous['Time_ms'].fillna(np.inf).to_numpy())
+            winners = contested[better]
+            replaced = previous.index[better]
+
+        df = pd.concat([old.drop(replaced), fresh, winners])
+        for column in ('Circuit', 'Driver'):
+            if not isinstance(df[column].dtype, pd.CategoricalDtype):
+                df[column] = df[column].astype('category')
+
+        # Agregados: soma direta para linhas novas; pilotos com linha substituída
+        # (mín/máx não podem ser 'desfeitos') são recalculados só a partir das suas linhas
+        affected = pd.Index(winners['Driver'].astype(object).unique())
+        parts = [snapshot.aggregates.drop(affected, errors='ignore')]
+        rest = fresh[~fresh['Driver'].astype(object).isin(affected)]
+        if len(rest):
+            parts.append(analysis_core.driver_aggregates(rest))
+        if len(affected):
+            parts.append(analysis_core.driver_aggregates(df[df['Driver'].astype(object).isin(affected)]))
+        aggregates = analysis_core.combine_driver_aggregates(*parts)
+
+        return Snapshot(
+            df=df,
+            df_pilotos=analysis_core.finalize_driver_performance(aggregates),
+            aggregates=aggregates,
+            version=version,
+            offset=offset,
+            signature=tail[-_SIGNATURE_BYTES:] if len(tail) >= _SIGNATURE_BYTES else self._signature(offset),
+            columns=snapshot.columns,
+        )
+
+    # --- Observação em segundo plano ---
+
+    def start_watcher(self) -> None:
+        """Inicia a thread que verifica o CSV a cada poll_interval segundos."""
+        if self.poll_interval <= 0 or self._watcher is not None:
+            return
+        self._watcher = threading.Thread(target=self._watch_loop, name='dataset-watcher', daemon=True)
+        self._watcher.start()
+
+    def _watch_loop(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Erro ao atualizar os dados locais: {e}")
+
+    def stop(self) -> None:
+        self._stop.set()
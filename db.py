@@ -0,0 +1,59 @@
+import os
+import threading
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
+
+# Configurações do banco de dados
+DB_NAME = os.getenv("DB_NAME", "f1_stats")
+DB_USER = os.getenv("DB_USER", "postgres")
+DB_PASSWORD = os.getenv("DB_PASSWORD", "403800")
+DB_HOST = os.getenv("DB_HOST", "localhost")
+DB_PORT = os.getenv("DB_PORT", "5432")
+
+# Conexões reaproveitadas pelo app web (consultas curtas)
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", 8))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_connection():
+    """
+    Abre uma conexão com o PostgreSQL usando as variáveis de ambiente DB_*.
+    """
+    return psycopg2.connect(
+        dbname=DB_NAME,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        host=DB_HOST,
+        port=DB_PORT
+    )
+
+
+def _get_pool() -> ThreadedConnectionPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadedConnectionPool(
+                1, DB_POOL_MAX,
+                dbname=DB_NAME, user=DB_USER, password=DB_PASSWORD, host=DB_HOST, port=DB_PORT
+            )
+        return _pool
+
+
+@contextmanager
+def pooled_connection():
+    """
+    Conexão emprestada do pool (para as rotas do app): evita abrir uma conexão
+    nova a cada requisição, o que custaria mais que a própria consulta.
+    """
+    pool = _get_pool()
+    conn = pool.getconn()
+    try:
+        yield conn
+    finally:
+        if not conn.closed:
+            conn.rollback()  # devolve a conexão sem transação aberta
+        pool.putconn(conn, close=bool(conn.closed))
@@ -0,0 +1,97 @@
+"""
+Redução de pontos (level of detail) para séries temporais de telemetria.
+
+- collapse_steps: para dados em degrau (ex: posição), mantém só os pontos onde o
+  valor muda. Sem perda: desenhado como degrau ('steps-post' / stepped: 'after'),
+  o gráfico é idêntico.
+- lttb: Largest-Triangle-Three-Buckets, para séries contínuas com um limite de
+  pontos por série; preserva picos e vales visíveis.
+- downsample: aplica os dois, na ordem, conforme os parâmetros.
+"""
+import os
+
+import numpy as np
+
+# Limite padrão de pontos por série nos gráficos (0 = sem limite)
+PLOT_MAX_POINTS = int(os.getenv("APEX_PLOT_MAX_POINTS", 0))
+
+
+def collapse_steps(x: np.ndarray, y: np.ndarray):
+    """
+    Mantém o primeiro ponto, os pontos onde o valor muda e o último ponto.
+    """
+    if len(y) <= 2:
+        return x, y
+    keep = np.empty(len(y), dtype=bool)
+    keep[0] = keep[-1] = True
+    keep[1:-1] = y[1:-1] != y[:-2]
+    return x[keep], y[keep]
+
+
+def _as_float(values: np.ndarray) -> np.ndarray:
+    if np.issubdtype(values.dtype, np.datetime64) or np.issubdtype(values.dtype, np.timedelta64):
+        return values.astype('int64').astype(np.float64)
+    return values.astype(np.float64)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Índices escolhidos pelo LTTB (Steinarsson, 2013), em ordem crescente.
+    O primeiro e o último ponto sempre ficam; cada um dos max_points - 2 baldes
+    intermediários contribui com o ponto que forma o maior triângulo com o
+    ponto escolhido no balde anterior e a média do balde seguinte.
+    Com max_points=2 ficam só o primeiro e o último; com 1, só o último (o valor final).
+    """
+    if max_points < 1:
+        raise ValueError(f"max_points deve ser >= 1 (recebido {max_points})")
+    n = len(x)
+    if max_points >= n:
+        return np.arange(n)
+    if max_points == 1:
+        return np.array([n - 1], dtype=np.int64)
+    if max_points == 2:
+        return np.array([0, n - 1], dtype=np.int64)
+
+    xf, yf = _as_float(x), _as_float(y)
+    # Limites dos baldes para os pontos 1..n-2
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    # Médias de cada balde de uma vez (o 'próximo' do último balde é o último ponto)
+    counts = np.diff(edges)
+    x_sums = np.add.reduceat(xf[:n - 1], edges[:-1])
+    y_sums = np.add.reduceat(yf[:n - 1], edges[:-1])
+    x_means = np.append(x_sums / counts, xf[-1])
+    y_means = np.append(y_sums / counts, yf[-1])
+
+    chosen = np.empty(max_points, dtype=np.int64)
+    chosen[0], chosen[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(max_points - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        ax, ay = xf[previous], yf[previous]
+        cx, cy = x_means[bucket + 1], y_means[bucket + 1]
+        # Área (x2) do triângulo (a, ponto, c) para todos os pontos do balde
+        areas = np.abs((ax - cx) * (yf[start:stop] - ay) - (ax - xf[start:stop]) * (cy - ay))
+        previous = start + int(np.argmax(areas))
+        chosen[bucket + 1] = previous
+    return chosen
+
+
+def lttb(x: np.ndarray, y: np.ndarray, max_points: int):
+    """Série reduzida a no máximo max_points pontos (LTTB)."""
+    idx = lttb_indices(x, y, max_points)
+    return x[idx], y[idx]
+
+
+def downsample(x: np.ndarray, y: np.ndarray, steps: bool = False, max_points: int | None = None):
+    """
+    steps=True colapsa trechos constantes (sem perda para dados em degrau);
+    max_points limita o tamanho final da série com LTTB (None/0 = sem limite;
+    negativo é ValueError).
+    """
+    if max_points is not None and max_points < 0:
+        raise ValueError(f"max_points deve ser >= 0 (recebido {max_points})")
+    if steps:
+        x, y = collapse_steps(x, y)
+    if max_points and len(x) > max_points:
+        x, y = lttb(x, y, max_points)
+    return x, y
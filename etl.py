@@ -0,0 +1,274 @@
+"""
+Sincronização incremental da OpenF1 para o PostgreSQL.
+
+Uso:
+    python etl.py                # sincroniza apenas o que é novo
+    python etl.py --year 2024    # limita às sessões de um ano
+
+Antes esta carga rodava no import de 'analysis_core' (e portanto na subida do app).
+Agora é um comando separado: guarda um high-water mark por session_key na tabela
+'etl_state' e só busca sessões/posições novas. O high-water mark só avança depois
+que a sessão foi gravada, então uma execução interrompida é retomada do ponto em
+que parou (linhas repetidas são descartadas pelo ON CONFLICT).
+"""
+import argparse
+import os
+from datetime import datetime
+from urllib.parse import quote
+
+import pandas as pd
+import requests
+
+import bulk_loader
+import db
+import standings
+from session_index import session_settled
+
+BASE_API_URL = os.getenv("OPENF1_API_URL", "https://api.openf1.org/v1")
+
+STATE_DDL = """
+CREATE TABLE IF NOT EXISTS etl_state (
+    session_key INTEGER PRIMARY KEY,
+    last_position_date TIMESTAMPTZ,
+    completed BOOLEAN NOT NULL DEFAULT FALSE,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+"""
+
+
+def _as_utc(value) -> datetime:
+    """Converte datas (str/datetime, com ou sem fuso) para datetime UTC."""
+    ts = pd.Timestamp(value)
+    ts = ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+    return ts.to_pydatetime()
+
+
+def _date_filter(value) -> str:
+    """Data UTC em ISO 8601 pronta para a query string ('+00:00' precisa ser escapado)."""
+    return quote(_as_utc(value).isoformat(), safe=":")
+
+
+def sync_drivers(conn) -> int:
+    """🔹 Inserção dos Drivers (apenas os que ainda não existem)."""
+    response = requests.get(f"{BASE_API_URL}/drivers", timeout=60)
+    response.raise_for_status()
+    drivers = response.json()
+
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT driver_id FROM drivers")
+        known = {row[0] for row in cursor.fetchall()}
+        new_drivers = {}
+        for driver in drivers:
+            driver_id = driver.get("driver_number")
+            if driver_id is None or driver_id in known:
+                continue
+            new_drivers[driver_id] = (
+                driver_id,
+                driver.get("full_name"),     # Nome completo
+                driver.get("country_code"),  # Código do país
+                driver.get("dob"),           # Data de nascimento
+            )
+        cursor.executemany(
+            """
+            INSERT INTO drivers (driver_id, name, nationality, birthdate)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (driver_id) DO NOTHING
+            """,
+            list(new_drivers.values())
+        )
+    conn.commit()
+    print(f"✅ Drivers sincronizados: {len(new_drivers)} novos.")
+    return len(new_drivers)
+
+
+def sync_sessions(conn, year: int | None = None) -> int:
+    """
+    🔹 Inserção das Sessões iniciadas a partir da última sessão conhecida
+    (que é buscada de novo e atualizada, caso algum campo tenha mudado).
+    Com `year`, o high-water mark é o do próprio ano: um ano ainda não carregado
+    (backfill) é buscado inteiro, mesmo que temporadas mais novas já estejam no banco.
+    """
+    with conn.cursor() as cursor:
+        if year is None:
+            cursor.execute("SELECT max(date_start) FROM sessions")
+        else:
+            cursor.execute("SELECT max(date_start) FROM sessions WHERE year = %s", (year,))
+        last_start = cursor.fetchone()[0]
+
+    url = f"{BASE_API_URL}/sessions"
+    filters = []
+    if year is not None:
+        filters.append(f"year={year}")
+    if last_start is not None:
+        # A OpenF1 aceita filtros de comparação direto na query (ex: date_start>=...)
+        filters.append(f"date_start>={_date_filter(last_start)}")
+    if filters:
+        url += "?" + "&".join(filters)
+
+    response = requests.get(url, timeout=60)
+    response.raise_for_status()
+    sessions = response.json()
+
+    columns = ("session_key", "meeting_key", "circuit_key", "circuit_short_name",
+               "country_code", "country_key", "country_name", "date_start", "date_end",
+               "gmt_offset", "location", "session_name", "session_type", "year")
+    # Sessões já gravadas são atualizadas: date_end, nome e horário podem mudar
+    # depois do primeiro registro (sessão em andamento, correções da OpenF1)
+    mutable = [c for c in columns if c != "session_key"]
+    with conn.cursor() as cursor:
+        cursor.executemany(
+            f"""
+            INSERT INTO sessions ({", ".join(columns)})
+            VALUES ({", ".join(["%s"] * len(columns))})
+            ON CONFLICT (session_key) DO UPDATE SET
+                {", ".join(f"{c} = EXCLUDED.{c}" for c in mutable)}
+            WHERE ({", ".join(f"sessions.{c}" for c in mutable)})
+                IS DISTINCT FROM ({", ".join(f"EXCLUDED.{c}" for c in mutable)})
+            """,
+            [tuple(session.get(c) for c in columns) for session in sessions]
+        )
+    conn.commit()
+    print(f"✅ Sessões sincronizadas: {len(sessions)} recebidas da API.")
+    return len(sessions)
+
+
+def pending_sessions(conn, year: int | None = None) -> list:
+    """
+    Sessões já iniciadas cujas posições ainda não foram carregadas por completo.
+    Retorna tuplas (session_key, date_end, last_position_date).
+    """
+    query = """
+        SELECT s.session_key::INTEGER, s.date_end, st.last_position_date
+        FROM sessions s
+        LEFT JOIN etl_state st ON st.session_key = s.session_key::INTEGER
+        WHERE COALESCE(st.completed, FALSE) = FALSE
+          AND s.date_start <= now()
+    """
+    params = []
+    if year is not None:
+        query += " AND s.year = %s"
+        params.append(year)
+    query += " ORDER BY s.date_start"
+    with conn.cursor() as cursor:
+        cursor.execute(query, params)
+        return cursor.fetchall()
+
+
+def sync_session_positions(conn, session_key: int, date_end, last_position_date,
+                           batch_size: int = bulk_loader.BATCH_SIZE) -> int:
+    """
+    🔹 Inserção das Posições de uma sessão, a partir do high-water mark.
+    Os lotes são confirmados conforme chegam; o high-water mark é gravado no fim.
+    """
+    url = f"{BASE_API_URL}/position?session_key={session_key}&csv=true"
+    if last_position_date is not None:
+        url += f"&date>{_date_filter(last_position_date)}"
+    # Download em streaming: o CSV é lido em blocos de batch_size linhas conforme chega,
+    # então a memória não cresce com o tamanho da sessão
+    with requests.get(url, timeout=120, stream=True) as response:
+        response.raise_for_status()
+        response.raw.decode_content = True  # descompacta gzip no próprio stream
+
+        marks = []
+
+        def chunks():
+            try:
+                reader = pd.read_csv(response.raw, chunksize=batch_size)
+                for chunk in reader:
+                    # Convertendo data para formato correto
+                    chunk["date"] = pd.to_datetime(chunk["date"], format='ISO8601')
+                    marks.append(chunk["date"].max())
+                    yield chunk
+            except pd.errors.EmptyDataError:
+                return  # nenhuma posição nova
+
+        # Cada lote é confirmado assim que chega; o high-water mark só avança no fim,
+        # já que a API não garante ordem por data (ON CONFLICT cobre a retomada)
+        stats = bulk_loader.copy_positions(conn, chunks(), batch_size=batch_size, commit=True)
+
+    rows = stats["rows"]
+    new_mark = last_position_date
+    if marks:
+        new_mark = max(marks).to_pydatetime()
+        print(f"   session_key {session_key}: {bulk_loader.format_stats(stats)}")
+
+    # A sessão só é marcada como concluída depois que os dados se estabilizam
+    completed = session_settled(date_end)
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            INSERT INTO etl_state (session_key, last_position_date, completed, updated_at)
+            VALUES (%s, %s, %s, now())
+            ON CONFLICT (session_key) DO UPDATE
+            SET last_position_date = EXCLUDED.last_position_date,
+                completed = EXCLUDED.completed,
+                updated_at = now()
+            """,
+            (session_key, new_mark, completed)
+        )
+    conn.commit()
+    return rows
+
+
+def report_top_driver(conn, year_from: int = 2023, year_to: int = 2024) -> None:
+    """🏆 Piloto com Mais Vitórias, Pódios e Pole Positions (pela classificação final de cada sessão)"""
+    top = standings.driver_standings(conn, year_from, year_to, limit=1)
+
+    if top:
+        top_driver = top[0]
+        print(f"🏆 Piloto com mais vitórias, pódios e poles: {top_driver['name'] or top_driver['driver_number']}")
+        print(f"   - Vitórias: {top_driver['wins']}")
+        print(f"   - Pódios: {top_driver['podiums']}")
+        print(f"   - Pole Positions: {top_driver['poles']}")
+    else:
+        print("❌ Nenhum piloto encontrado")
+
+
+def run(year: int | None = None, report: bool = True, batch_size: int = bulk_loader.BATCH_SIZE) -> None:
+    """Executa uma sincronização incremental completa."""
+    conn = db.get_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(STATE_DDL)
+        conn.commit()
+        standings.ensure_schema(conn)
+
+        sync_drivers(conn)
+        sync_sessions(conn, year)
+
+        pending = pending_sessions(conn, year)
+        print(f"Sessões pendentes: {len(pending)}")
+        loaded = 0
+        for i, (session_key, date_end, last_position_date) in enumerate(pending, start=1):
+            try:
+                rows = sync_session_positions(conn, session_key, date_end, last_position_date, batch_size)
+                print(f"[{i}/{len(pending)}] session_key {session_key}: {rows} posições novas.")
+                loaded += rows
+            except Exception as e:
+                # Desfaz só esta sessão; a próxima execução retoma a partir dela
+                conn.rollback()
+                print(f"❌ Erro ao sincronizar session_key {session_key}: {e}")
+
+        if loaded:
+            # Classificação final por sessão usada nas consultas de vitórias/pódios/poles
+            standings.refresh_classification(conn)
+            print("✅ Classificação final das sessões atualizada.")
+
+        if report:
+            report_top_driver(conn)
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sincronização incremental OpenF1 -> PostgreSQL")
+    parser.add_argument("--year", type=int, help="Limita a sincronização a um ano")
+    parser.add_argument("--no-report", action="store_true", help="Não imprime o resumo de vitórias/pódios/poles")
+    parser.add_argument("--batch-size", type=int, default=bulk_loader.BATCH_SIZE,
+                        help="Linhas por lote no COPY de posições")
+    args = parser.parse_args()
+    run(year=args.year, report=not args.no_report, batch_size=args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,126 +1,384 @@
-import requests
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import openf1.utils as f1_utils # Dependência do seu código original
+from matplotlib.figure import Figure
+import numpy as np
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from cache import default_cache, make_key
+import http_client
+import metrics
+import downsampling
+import overtakes
+import pace
+import columnar
+import rendering
+from session_index import SessionIndex, normalize_name, session_settled, settled_at
+from telemetry_store import default_store as telemetry_store
 
-# URL base da API OpenF1
-BASE_API_URL = "https://api.openf1.org/v1"
+# URL base da API OpenF1 (pode apontar para um servidor local de testes)
+BASE_API_URL = os.getenv("OPENF1_API_URL", "https://api.openf1.org/v1")
 
-def _get_session_key(year: int, location: str) -> int | None:
+# A lista de sessões de um ano ainda em andamento muda; os dados de uma sessão encerrada, não.
+SESSIONS_CACHE_TTL = int(os.getenv("OPENF1_SESSIONS_TTL", 6 * 60 * 60))
+
+# Metadados de pilotos (sigla, cor da equipe) raramente mudam depois da sessão
+DRIVERS_CACHE_TTL = int(os.getenv("OPENF1_DRIVERS_TTL", 24 * 60 * 60))
+
+# Dados de uma sessão em andamento (ou ainda não assentada) ficam no cache só por este tempo
+LIVE_SESSION_TTL = int(os.getenv("OPENF1_LIVE_TTL", 60))
+
+# Prefetch da página de telemetria: threads dedicadas e limite de prefetches enfileirados
+PREFETCH_WORKERS = int(os.getenv("APEX_PREFETCH_WORKERS", 2))
+PREFETCH_MAX_PENDING = int(os.getenv("APEX_PREFETCH_MAX_PENDING", 16))
+
+def _fetch_json(endpoint: str, params: dict, timeout: int):
+    """
+    Faz o GET em um endpoint da OpenF1 e retorna o JSON decodificado.
+    Usa a sessão HTTP compartilhada (keep-alive, retentativas, gzip) e
+    junta requisições idênticas simultâneas em uma só.
+    """
+    return http_client.fetch_json(f"{BASE_API_URL}/{endpoint}", params=params, timeout=timeout)
+
+def _cached(endpoint: str, params: dict, fetch, ttl: float | None = None):
+    """
+    Consulta o cache local; em caso de falta, só uma thread executa `fetch`
+    para a mesma chave e as demais aguardam o mesmo resultado (single-flight).
+    """
+    return http_client.single_flight(
+        make_key(endpoint, params), default_cache.get_or_fetch, endpoint, params, fetch, ttl
+    )
+
+def _fetch_sessions(year: int, refresh: bool = False) -> list | None:
+    """
+    Lista de sessões de um ano (com cache local). refresh=True ignora o cache.
+    """
+    params = {'year': year}
+    if refresh:
+        sessions = _fetch_json('sessions', params, timeout=10)
+        if sessions:
+            default_cache.set(make_key('sessions', params), sessions)
+        return sessions
+    return _cached(
+        'sessions', params,
+        lambda: _fetch_json('sessions', params, timeout=10) or None,
+        ttl=SESSIONS_CACHE_TTL
+    )
+
+# Índice (ano, local, tipo) -> session_key, preenchido uma vez por ano
+_session_index = SessionIndex(_fetch_sessions, refresh_interval=SESSIONS_CACHE_TTL)
+
+def _get_session_key(year: int, location: str, session_type: str = 'Race') -> int | None:
     """
     Busca o session_key de uma corrida (ex: 9158)
-    usando o ano e o nome da localização/GP.
+    usando o ano e o nome da localização/GP (aceita apelidos, ex: 'Interlagos').
     """
     print(f"Buscando session_key para: {location} {year}")
     try:
-        # Busca por sessões daquele ano
-        response = requests.get(f"{BASE_API_URL}/sessions?year={year}", timeout=10)
-        response.raise_for_status()
-        sessions = response.json()
-        
-        # Filtra pela localização e tipo 'Race'
-        for session in sessions:
-            if (session['location'].lower() == location.lower() or 
-                session['session_name'].lower() == location.lower() or 
-                session['circuit_short_name'].lower() == location.lower()) and \
-               session['session_type'] == 'Race':
-                
-                key = session['session_key']
-                print(f"Encontrado session_key: {key}")
-                return key
-        
-        print(f"Nenhuma sessão 'Race' encontrada para '{location}' em {year}.")
-        return None
+        with metrics.timer('session_lookup'):
+            key = _session_index.lookup(year, location, session_type)
+        if key is None:
+            print(f"Nenhuma sessão '{session_type}' encontrada para '{location}' em {year}.")
+            return None
+        print(f"Encontrado session_key: {key}")
+        return key
     except Exception as e:
         print(f"Erro ao buscar session_key: {e}")
         return None
 
+def _session_date_end(session_key: int) -> str | None:
+    """date_end de uma sessão (metadados com cache), ou None se desconhecido."""
+    params = {'session_key': session_key}
+    try:
+        sessions = _cached(
+            'sessions', params,
+            lambda: _fetch_json('sessions', params, timeout=10) or None,
+            ttl=SESSIONS_CACHE_TTL
+        )
+    except Exception as e:
+        print(f"Erro ao buscar os dados da sessão {session_key}: {e}")
+        return None
+    return sessions[0].get('date_end') if sessions else None
+
+def is_session_settled(session_key: int) -> bool:
+    """A sessão já terminou e assentou (SESSION_SETTLE_TIME)? Só então os dados são finais."""
+    return session_settled(_session_date_end(session_key))
+
+def _data_ttl(session_key: int) -> float:
+    """
+    TTL no cache dos dados de uma sessão. Até ela assentar, LIVE_SESSION_TTL;
+    depois, o tempo desde que assentou: o que foi gravado antes disso (parcial)
+    expira e o que foi gravado depois vale para sempre.
+    """
+    settled = settled_at(_session_date_end(session_key))
+    now = datetime.now(timezone.utc)
+    if settled is None or settled > now:
+        return LIVE_SESSION_TTL
+    return (now - settled).total_seconds()
+
+def _stored_telemetry(session_key: int, endpoint: str, fetch) -> pd.DataFrame | None:
+    """
+    Telemetria de uma sessão a partir do armazenamento compacto (telemetry_store):
+    colunas em tipos enxutos, mapeadas em memória e compartilhadas entre workers.
+    Na primeira vez depois que a sessão assentou, `fetch()` busca na API e o
+    resultado é gravado uma única vez; se não couber no formato compacto, fica
+    no cache comum. Antes disso os dados são parciais e ficam só no cache, com TTL curto.
+    """
+    df = telemetry_store.read(session_key, endpoint)
+    if df is not None:
+        return df
+    params = {'session_key': session_key}
+    date_end = _session_date_end(session_key)
+    if not session_settled(date_end):
+        return _cached(endpoint, params, fetch, ttl=LIVE_SESSION_TTL)
+    key = make_key(endpoint, params)
+
+    def load():
+        df = telemetry_store.read(session_key, endpoint)
+        if df is None:
+            df = default_cache.get(key, ttl=_data_ttl(session_key))
+        if df is None:
+            df = fetch()
+            if df is None:
+                return None
+            if telemetry_store.write(session_key, endpoint, df, date_end):
+                df = telemetry_store.read(session_key, endpoint)
+            else:
+                default_cache.set(key, df)
+        return df
+
+    return http_client.single_flight(key, load)
+
 def _fetch_position_data(session_key: int) -> pd.DataFrame | None:
     """
     Busca dados de posição para uma session_key.
     (Baseado no seu 'data_fetcher.py')
+    Colunas: date (UTC, sem fuso), driver_number (uint8), position (int8).
     """
     print(f"Buscando dados de posição para session_key: {session_key}...")
-    try:
-        response = requests.get(f"{BASE_API_URL}/position?session_key={session_key}", timeout=30)
-        response.raise_for_status()
-        data = response.json()
+    params = {'session_key': session_key}
+
+    def fetch():
+        data = _fetch_json('position', params, timeout=30)
         if not data:
+            return None
+        with metrics.timer('transform', step='position_frame'):
+            df = pd.DataFrame(data)
+            # Converte data para datetime (necessário para o utils)
+            df['date'] = pd.to_datetime(df['date'], format='ISO8601')
+        return df
+
+    try:
+        df = _stored_telemetry(session_key, 'position', fetch)
+        if df is None:
             print("Nenhum dado de posição retornado.")
             return None
-            
-        df = pd.DataFrame(data)
-        # Converte data para datetime (necessário para o utils)
-        df['date'] = pd.to_datetime(df['date'])
         print("Dados de posição carregados.")
         return df
     except Exception as e:
         print(f"Erro ao buscar dados de posição: {e}")
         return None
 
+def _fetch_laps(session_key: int) -> pd.DataFrame | None:
+    """
+    Todas as voltas de uma sessão (inclusive as de saída dos boxes), no armazenamento compacto.
+    """
+    params = {'session_key': session_key}
+
+    def fetch():
+        data = _fetch_json('laps', params, timeout=30)
+        return pd.DataFrame(data) if data else None
+
+    try:
+        return _stored_telemetry(session_key, 'laps', fetch)
+    except Exception as e:
+        print(f"Erro ao buscar dados de voltas: {e}")
+        return None
+
 def _fetch_overtakes_data(session_key: int) -> pd.DataFrame | None:
     """
     Busca dados de ultrapassagens para uma session_key.
     """
     print(f"Buscando dados de ultrapassagem para session_key: {session_key}...")
+    # O endpoint 'pit' não existe, 'stints' é melhor.
+    # Vamos usar 'laps' para ver as posições; as voltas de saída dos boxes são
+    # filtradas aqui, sobre a mesma busca em cache usada pela tabela de ultrapassagens
+    df = _fetch_laps(session_key)
+    if df is None:
+        print("Nenhum dado de voltas retornado para análise de ultrapassagem.")
+        return None
+    if 'is_pit_out_lap' in df:
+        df = df[~df['is_pit_out_lap'].fillna(False).astype(bool)]
+
+    print("Dados de voltas (para ultrapassagens) carregados.")
+    return df
+
+def _fetch_overtake_events(session_key: int) -> pd.DataFrame | None:
+    """
+    Tabela de ultrapassagens da sessão (overtakes.compute_overtake_events).
+    Calculada uma vez a partir de /position e /laps e guardada no mesmo cache
+    dos dados brutos; as visualizações só leem o resultado.
+    """
+    params = {'session_key': session_key, 'version': overtakes.EVENTS_FORMAT_VERSION}
+
+    def fetch():
+        pos_data = _fetch_position_data(session_key)
+        if pos_data is None:
+            return None
+        laps_data = _fetch_laps(session_key)
+        with metrics.timer('transform', step='overtake_events'):
+            return overtakes.compute_overtake_events(pos_data, laps_data)
+
     try:
-        # O endpoint 'pit' não existe, 'stints' é melhor.
-        # Vamos usar 'laps' para ver as posições
-        response = requests.get(f"{BASE_API_URL}/laps?session_key={session_key}&is_pit_out_lap=false", timeout=30)
-        response.raise_for_status()
-        data = response.json()
-        if not data:
-            print("Nenhum dado de voltas retornado para análise de ultrapassagem.")
+        return _cached('overtake_events', params, fetch, ttl=_data_ttl(session_key))
+    except Exception as e:
+        print(f"Erro ao calcular as ultrapassagens: {e}")
+        return None
+
+def _fetch_stints(session_key: int) -> pd.DataFrame | None:
+    """
+    Stints da sessão (composto, voltas de início/fim, idade do pneu), com cache.
+    """
+    params = {'session_key': session_key}
+
+    def fetch():
+        data = _fetch_json('stints', params, timeout=30)
+        return pd.DataFrame(data) if data else None
+
+    try:
+        return _cached('stints', params, fetch, ttl=_data_ttl(session_key))
+    except Exception as e:
+        print(f"Erro ao buscar os stints: {e}")
+        return None
+
+def _fetch_lap_analytics(session_key: int) -> dict | None:
+    """
+    Ritmo por stint, melhores setores e gap para o líder (pace.compute_lap_analytics).
+    Calculado uma vez por sessão a partir de /laps e /stints e guardado no cache.
+    """
+    params = {'session_key': session_key, 'version': pace.ANALYTICS_FORMAT_VERSION}
+
+    def fetch():
+        laps_data = _fetch_laps(session_key)
+        if laps_data is None:
             return None
-        
-        df = pd.DataFrame(data)
-        print("Dados de voltas (para ultrapassagens) carregados.")
-        return df
+        stints = _fetch_stints(session_key)
+        with metrics.timer('transform', step='lap_analytics'):
+            return pace.compute_lap_analytics(laps_data, stints)
+
+    try:
+        return _cached('lap_analytics', params, fetch, ttl=_data_ttl(session_key))
     except Exception as e:
-        print(f"Erro ao buscar dados de voltas: {e}")
+        print(f"Erro ao calcular o ritmo por stint: {e}")
         return None
 
-# --- CORREÇÃO APLICADA AQUI ---
-# A função agora também recebe year e location para passar para a biblioteca f1_utils
-def _plot_position_changes(pos_data: pd.DataFrame, year: int, location: str) -> plt.Figure | None:
+@dataclass(frozen=True)
+class DriverInfo:
+    """Metadados de um piloto numa sessão (endpoint /drivers)."""
+    tla: str            # sigla, ex: 'VER'
+    color: str | None   # cor da equipe em '#RRGGBB' (None = ciclo de cores padrão)
+    name: str
+
+def _fetch_driver_table(session_key: int) -> dict:
+    """
+    Tabela driver_number -> DriverInfo de uma sessão.
+    Um único GET em /drivers por sessão (com cache e TTL), em vez de duas
+    consultas remotas por piloto a cada gráfico.
+    """
+    params = {'session_key': session_key}
+
+    def fetch():
+        data = _fetch_json('drivers', params, timeout=10)
+        if not data:
+            return None
+        table = {}
+        for row in data:
+            number = row.get('driver_number')
+            if number is None:
+                continue
+            colour = row.get('team_colour')
+            table[int(number)] = DriverInfo(
+                tla=row.get('name_acronym') or f"Piloto {number}",
+                color=f"#{colour.lstrip('#')}" if colour else None,
+                name=row.get('full_name') or row.get('broadcast_name') or f"Piloto {number}",
+            )
+        return table
+
+    try:
+        return _cached('drivers', params, fetch, ttl=DRIVERS_CACHE_TTL) or {}
+    except Exception as e:
+        print(f"Erro ao buscar dados dos pilotos: {e}")
+        return {}
+
+def _driver_info(drivers: dict, driver_number) -> DriverInfo:
+    """Metadados do piloto, ou um rótulo genérico se ele não estiver na tabela."""
+    info = drivers.get(int(driver_number))
+    if info is None:
+        info = DriverInfo(tla=f"Piloto {driver_number}", color=None, name=f"Piloto {driver_number}")
+    return info
+
+def _split_by_driver(df: pd.DataFrame, x_col: str, y_col: str):
+    """
+    Separa as séries (x, y) de cada piloto com uma única ordenação,
+    em vez de um filtro booleano sobre o DataFrame inteiro por piloto.
+    Gera (driver_number, x, y) na ordem de aparição dos pilotos, com x crescente.
+    """
+    codes, drivers = pd.factorize(df['driver_number'])
+    x = df[x_col].to_numpy()
+    y = df[y_col].to_numpy()
+    order = np.lexsort((x, codes))
+    codes, x, y = codes[order], x[order], y[order]
+    bounds = np.flatnonzero(np.diff(codes)) + 1
+    for start, stop in zip(np.r_[0, bounds], np.r_[bounds, len(codes)]):
+        if stop > start and codes[start] >= 0:
+            yield drivers[codes[start]], x[start:stop], y[start:stop]
+
+@metrics.timed('transform', step='position_series')
+def _position_frame(pos_data: pd.DataFrame) -> pd.DataFrame:
+    """(driver_number, date, position) sem linhas vazias, com datas em UTC sem fuso."""
+    dates = pos_data['date']
+    if getattr(dates.dt, 'tz', None) is not None:
+        dates = dates.dt.tz_convert('UTC').dt.tz_localize(None)
+    return pd.DataFrame({
+        'driver_number': pos_data['driver_number'],
+        'date': dates,
+        'position': pos_data['position'],
+    }).dropna()
+
+@metrics.timed('transform', step='lap_frame')
+def _lap_frame(laps_data: pd.DataFrame) -> pd.DataFrame:
+    """Voltas com número, posição e piloto preenchidos (como inteiros)."""
+    df_laps = laps_data.dropna(subset=['lap_number', 'position', 'driver_number'])
+    return df_laps.assign(
+        lap_number=df_laps['lap_number'].astype(int),
+        position=df_laps['position'].astype(int),
+    )
+
+@metrics.timed('figure_build', plot='position_changes')
+def _plot_position_changes(pos_data: pd.DataFrame, year: int, location: str,
+                           drivers: dict | None = None, downsample: bool = True,
+                           max_points: int | None = downsampling.PLOT_MAX_POINTS) -> Figure | None:
     """
     Plota o gráfico de mudança de posições.
     (Baseado no seu 'position_graph.py')
+    Agrupa os pilotos numa única passada e desenha linhas simples (Line2D),
+    sem a agregação estatística do seaborn. downsample=True mantém só as mudanças de posição;
+    max_points limita ainda os pontos por piloto (LTTB).
+    Cores e siglas vêm da tabela de pilotos da sessão (_fetch_driver_table).
     """
     print("Iniciando plotagem de posições...")
     try:
-        # Pega os números dos pilotos
-        driver_numbers = pos_data['driver_number'].unique()
+        data = _position_frame(pos_data)
         
         # Prepara o plot
-        fig, ax = plt.subplots(figsize=(15, 10))
+        fig, ax = rendering.subplots(figsize=(15, 10))
         
-        for driver in driver_numbers:
-            driver_data = pos_data[pos_data['driver_number'] == driver]
-            if driver_data.empty:
-                continue
+        for driver, x, y in _split_by_driver(data, 'date', 'position'):
+            x, y = downsampling.downsample(x, y, steps=downsample, max_points=max_points)
 
-            # --- CORREÇÃO DA CHAMADA ---
-            # A biblioteca f1_utils espera year e location, não session_key, para encontrar os dados.
-            try:
-                driver_color = f"#{f1_utils.get_driver_color(driver, year=year, location=location, session_type='Race')}"
-            except:
-                driver_color = None # Usa cor padrão do Seaborn
-            
-            try:
-                driver_tla = f1_utils.get_driver_tla(driver, year=year, location=location, session_type='Race')
-            except:
-                driver_tla = f"Piloto {driver}"
-
-            sns.lineplot(
-                data=driver_data,
-                x='date', 
-                y='position',
-                color=driver_color,
-                label=driver_tla,
-                ax=ax
-            )
+            info = _driver_info(drivers or {}, driver)
+            ax.plot(x, y, color=info.color, label=info.tla, drawstyle='steps-post')
 
         ax.set_ylim(0.5, 20.5) # Limites de posição
         ax.set_yticks(range(1, 21))
@@ -129,16 +387,16 @@ def _plot_position_changes(pos_data: pd.DataFrame, year: int, location: str) ->
         ax.set_xlabel('Tempo de Corrida')
         ax.set_ylabel('Posição')
         ax.legend(loc='upper left', bbox_to_anchor=(1, 1))
-        plt.tight_layout()
+        fig.tight_layout()
         print("Gráfico de posições criado.")
         return fig
     except Exception as e:
         print(f"Erro ao plotar gráfico de posições: {e}")
         return None
 
-# --- CORREÇÃO APLICADA AQUI ---
-# A função agora também recebe year e location
-def _plot_overtakes(laps_data: pd.DataFrame, year: int, location: str) -> plt.Figure | None:
+@metrics.timed('figure_build', plot='overtakes')
+def _plot_overtakes(laps_data: pd.DataFrame, year: int, location: str,
+                    drivers: dict | None = None) -> Figure | None:
     """
     Plota um gráfico simples de posições por volta.
     (Baseado no seu 'overtakes.py' mas simplificado)
@@ -146,37 +404,13 @@ def _plot_overtakes(laps_data: pd.DataFrame, year: int, location: str) -> plt.Fi
     print("Iniciando plotagem de ultrapassagens (pos. por volta)...")
     try:
         # Foca apenas na posição ao final de cada volta
-        df_laps = laps_data.dropna(subset=['lap_number', 'position', 'driver_number'])
-        df_laps['lap_number'] = df_laps['lap_number'].astype(int)
-        df_laps['position'] = df_laps['position'].astype(int)
-        
-        drivers = df_laps['driver_number'].unique()
+        df_laps = _lap_frame(laps_data)
         
-        fig, ax = plt.subplots(figsize=(15, 10))
+        fig, ax = rendering.subplots(figsize=(15, 10))
         
-        for driver in drivers:
-            driver_laps = df_laps[df_laps['driver_number'] == driver]
-            if driver_laps.empty:
-                continue
-                
-            # --- CORREÇÃO DA CHAMADA ---
-            try:
-                driver_color = f"#{f1_utils.get_driver_color(driver, year=year, location=location, session_type='Race')}"
-                driver_tla = f1_utils.get_driver_tla(driver, year=year, location=location, session_type='Race')
-            except:
-                driver_color = None
-                driver_tla = f"Piloto {driver}"
-                
-            sns.lineplot(
-                data=driver_laps,
-                x='lap_number',
-                y='position',
-                label=driver_tla,
-                color=driver_color,
-                marker='o',
-                markersize=4,
-                ax=ax
-            )
+        for driver, laps, positions in _split_by_driver(df_laps, 'lap_number', 'position'):
+            info = _driver_info(drivers or {}, driver)
+            ax.plot(laps, positions, label=info.tla, color=info.color, marker='o', markersize=4)
             
         ax.set_ylim(0.5, 20.5)
         ax.set_yticks(range(1, 21))
@@ -185,16 +419,185 @@ def _plot_overtakes(laps_data: pd.DataFrame, year: int, location: str) -> plt.Fi
         ax.set_xlabel('Número da Volta')
         ax.set_ylabel('Posição')
         ax.legend(loc='upper left', bbox_to_anchor=(1, 1))
-        plt.tight_layout()
+        fig.tight_layout()
         print("Gráfico de posições por volta criado.")
         return fig
     except Exception as e:
         print(f"Erro ao plotar gráfico de posições por volta: {e}")
         return None
 
+@metrics.timed('figure_build', plot='overtake_events')
+def _plot_overtake_events(events: pd.DataFrame, year: int, location: str,
+                          drivers: dict | None = None) -> Figure | None:
+    """
+    Plota a tabela de ultrapassagens: quantidade por volta (na pista x ligadas a pit stop)
+    e ultrapassagens feitas por piloto.
+    """
+    print("Iniciando plotagem da tabela de ultrapassagens...")
+    try:
+        fig, (ax_laps, ax_drivers) = rendering.subplots(ncols=2, figsize=(15, 8),
+                                                        gridspec_kw={'width_ratios': [3, 1]})
+
+        per_lap = overtakes.summarize_by_lap(events)
+        laps = per_lap.index.to_numpy(dtype=int)
+        ax_laps.bar(laps, per_lap['pista'], label='Na pista')
+        ax_laps.bar(laps, per_lap['pit'], bottom=per_lap['pista'], label='Ligadas a pit stop')
+        ax_laps.set_title(f'Ultrapassagens por Volta ({location} {year})')
+        ax_laps.set_xlabel('Número da Volta')
+        ax_laps.set_ylabel('Ultrapassagens')
+        ax_laps.legend(loc='upper right')
+
+        on_track = events[~events['pit_related']]
+        made = on_track['overtaker'].value_counts().sort_values()
+        infos = [_driver_info(drivers or {}, driver) for driver in made.index]
+        ax_drivers.barh([info.tla for info in infos], made.to_numpy(),
+                        color=[info.color or 'tab:blue' for info in infos])
+        ax_drivers.set_title('Ultrapassagens na pista por piloto')
+        ax_drivers.set_xlabel('Ultrapassagens')
+        fig.tight_layout()
+        print("Gráfico da tabela de ultrapassagens criado.")
+        return fig
+    except Exception as e:
+        print(f"Erro ao plotar a tabela de ultrapassagens: {e}")
+        return None
+
+# Cores dos compostos no gráfico de stints (padrão da Pirelli)
+COMPOUND_COLORS = {
+    'SOFT': '#DA291C', 'MEDIUM': '#FFD12E', 'HARD': '#F0F0EC',
+    'INTERMEDIATE': '#43B02A', 'WET': '#0067AD',
+}
+
+@metrics.timed('figure_build', plot='lap_analytics')
+def _plot_lap_analytics(analytics: dict, year: int, location: str,
+                        drivers: dict | None = None) -> Figure | None:
+    """
+    Plota a estratégia: stints de cada piloto (cor do composto, ritmo médio e
+    degradação no rótulo) e o gap para o líder volta a volta.
+    """
+    print("Iniciando plotagem do ritmo por stint...")
+    try:
+        fig, (ax_stints, ax_gaps) = rendering.subplots(nrows=2, figsize=(15, 14),
+                                                       gridspec_kw={'height_ratios': [1, 1]})
+        stints = analytics['stints']
+        # Pilotos na ordem da melhor volta (mais rápido no topo)
+        order = analytics['sectors']['driver_number'].tolist()[::-1]
+        row = {driver: i for i, driver in enumerate(order)}
+        stints = stints[stints['driver_number'].isin(row)]
+        y = stints['driver_number'].map(row).to_numpy()
+        ax_stints.barh(y, stints['lap_end'] - stints['lap_start'] + 1, left=stints['lap_start'] - 0.5,
+                       color=[COMPOUND_COLORS.get(c, 'lightgray') for c in stints['compound']],
+                       edgecolor='black', linewidth=0.5)
+        for yi, start, end, mean, slope in zip(y, stints['lap_start'], stints['lap_end'],
+                                               stints['mean_pace'], stints['degradation']):
+            if pd.notna(mean):
+                label = f"{mean:.2f}s" + (f" {slope:+.3f}/v" if pd.notna(slope) else "")
+                ax_stints.text((start + end) / 2, yi, label, ha='center', va='center', fontsize=7)
+        ax_stints.set_yticks(range(len(order)))
+        ax_stints.set_yticklabels([_driver_info(drivers or {}, d).tla for d in order])
+        ax_stints.set_title(f'Stints, Ritmo Médio e Degradação ({location} {year})')
+        ax_stints.set_xlabel('Número da Volta')
+
+        for driver, laps, gaps in _split_by_driver(analytics['gaps'], 'lap_number', 'gap'):
+            info = _driver_info(drivers or {}, driver)
+            ax_gaps.plot(laps, gaps, label=info.tla, color=info.color)
+        ax_gaps.invert_yaxis()  # líder no topo
+        ax_gaps.set_title('Diferença para o Líder')
+        ax_gaps.set_xlabel('Número da Volta')
+        ax_gaps.set_ylabel('Gap (s)')
+        ax_gaps.legend(loc='upper left', bbox_to_anchor=(1, 1))
+        fig.tight_layout()
+        print("Gráfico do ritmo por stint criado.")
+        return fig
+    except Exception as e:
+        print(f"Erro ao plotar o ritmo por stint: {e}")
+        return None
+
 # --- Funções Públicas ---
 
-def get_position_plot(year: int, location: str) -> plt.Figure | None:
+def prefetch_session(session_key: int) -> dict:
+    """
+    Busca em paralelo os dados de posição, de voltas, de stints e dos pilotos de uma sessão e os
+    deixa no cache, junto com a tabela de ultrapassagens e o ritmo por stint calculados a partir deles.
+    Os dois gráficos da página de telemetria passam a encontrar tudo pronto
+    (ou aguardam a busca já em andamento, sem repeti-la).
+    """
+    results = http_client.fetch_many({
+        'position': (_fetch_position_data, session_key),
+        'laps': (_fetch_overtakes_data, session_key),
+        'drivers': (_fetch_driver_table, session_key),
+        'stints': (_fetch_stints, session_key),
+    })
+    # Com os dados brutos no cache, a tabela de ultrapassagens e o ritmo por stint
+    # são calculados (e guardados) já aqui
+    results['overtake_events'] = _fetch_overtake_events(session_key)
+    results['lap_analytics'] = _fetch_lap_analytics(session_key)
+    return results
+
+# Dados lidos por cada gráfico da fila de renderização (além da tabela de pilotos)
+_PLOT_DATA = {
+    'position': _fetch_position_data,
+    'overtakes': _fetch_overtakes_data,
+    'overtake_events': _fetch_overtake_events,
+    'stints': _fetch_lap_analytics,
+}
+
+def prefetch_plot(session_key: int, plot: str) -> None:
+    """
+    Busca no processo web os dados de um gráfico antes de o job ir para o pool de
+    renderização: passam pelo single-flight daqui e ficam no cache em disco (ou no
+    armazenamento de telemetria), onde o processo do pool os encontra prontos.
+    """
+    http_client.fetch_many({
+        plot: (_PLOT_DATA[plot], session_key),
+        'drivers': (_fetch_driver_table, session_key),
+    })
+
+# Prefetches pedidos e em andamento: (ano, local normalizado) e session_key
+_prefetching = set()
+_prefetching_lock = threading.Lock()
+_prefetch_executor = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix='openf1-prefetch')
+
+def _claim_prefetch(key) -> bool:
+    """Reserva a chave; False se o mesmo prefetch já está na fila/em andamento (ou a fila está cheia)."""
+    with _prefetching_lock:
+        if key in _prefetching or len(_prefetching) >= PREFETCH_MAX_PENDING:
+            return False
+        _prefetching.add(key)
+        return True
+
+def _release_prefetch(key) -> None:
+    with _prefetching_lock:
+        _prefetching.discard(key)
+
+def prefetch_session_async(year: int, location: str) -> bool:
+    """
+    Dispara prefetch_session em segundo plano a partir de (ano, local).
+    Roda num pool próprio e pequeno (o pool de busca só executa tarefas que não
+    esperam por outras); uma rajada de páginas da mesma sessão dispara um único
+    prefetch, e com PREFETCH_MAX_PENDING na fila os novos são ignorados (o
+    gráfico busca os dados de qualquer forma). Retorna se o prefetch foi agendado.
+    """
+    request = (year, normalize_name(location))
+    if not _claim_prefetch(request):
+        return False
+
+    def run():
+        try:
+            session_key = _get_session_key(year, location)
+            if session_key and _claim_prefetch(session_key):
+                try:
+                    prefetch_session(session_key)
+                finally:
+                    _release_prefetch(session_key)
+        except Exception as e:
+            print(f"Erro no prefetch de {location} {year}: {e}")
+        finally:
+            _release_prefetch(request)
+
+    _prefetch_executor.submit(run)
+    return True
+
+def get_position_plot(year: int, location: str) -> Figure | None:
     """
     Função principal para buscar dados de posição e retornar o gráfico.
     """
@@ -208,12 +611,10 @@ def get_position_plot(year: int, location: str) -> plt.Figure | None:
         print("Falha ao buscar dados de posição.")
         return None
         
-    # --- CORREÇÃO DA CHAMADA ---
-    # Passa year e location para a função de plotagem
-    fig = _plot_position_changes(pos_data, year, location)
+    fig = _plot_position_changes(pos_data, year, location, _fetch_driver_table(session_key))
     return fig
 
-def get_overtakes_plot(year: int, location: str) -> plt.Figure | None:
+def get_overtakes_plot(year: int, location: str) -> Figure | None:
     """
     Função principal para buscar dados de voltas e retornar o gráfico de pos/volta.
     """
@@ -227,7 +628,135 @@ def get_overtakes_plot(year: int, location: str) -> plt.Figure | None:
         print("Falha ao buscar dados de voltas.")
         return None
         
-    # --- CORREÇÃO DA CHAMADA ---
-    # Passa year e location para a função de plotagem
-    fig = _plot_overtakes(laps_data, year, location)
+    fig = _plot_overtakes(laps_data, year, location, _fetch_driver_table(session_key))
+    return fig
+
+def get_overtake_events(year: int, location: str) -> pd.DataFrame | None:
+    """
+    Tabela de ultrapassagens (volta, quem ultrapassou, quem foi ultrapassado,
+    posição, posições ganhas, se teve relação com pit stop) de uma corrida.
+    """
+    session_key = _get_session_key(year, location)
+    if not session_key:
+        print(f"Não foi possível encontrar uma session_key para {location} {year}.")
+        return None
+    return _fetch_overtake_events(session_key)
+
+def get_overtake_events_plot(year: int, location: str) -> Figure | None:
+    """
+    Função principal para o gráfico da tabela de ultrapassagens.
+    """
+    session_key = _get_session_key(year, location)
+    if not session_key:
+        print(f"Não foi possível encontrar uma session_key para {location} {year}.")
+        return None
+
+    events = _fetch_overtake_events(session_key)
+    if events is None:
+        print("Falha ao calcular as ultrapassagens.")
+        return None
+
+    fig = _plot_overtake_events(events, year, location, _fetch_driver_table(session_key))
+    return fig
+
+def _driver_series(driver, drivers: dict, **columns) -> dict:
+    """Uma série por piloto no formato das rotas /api: metadados + colunas em listas."""
+    info = _driver_info(drivers, driver)
+    series = {'driver_number': int(driver), 'tla': info.tla, 'color': info.color, 'name': info.name}
+    series.update({name: values.tolist() for name, values in columns.items()})
+    return series
+
+def get_position_series(year: int, location: str, downsample: bool = True,
+                        max_points: int | None = None) -> dict | None:
+    """
+    Séries de posição por piloto para gráficos no navegador (formato colunar).
+    Tempos em milissegundos desde a primeira amostra ('t0', ISO 8601 UTC).
+    downsample=True mantém só as mudanças de posição (sem perda para dados em degrau);
+    max_points limita os pontos por piloto (LTTB).
+    """
+    session_key = _get_session_key(year, location)
+    if not session_key:
+        return None
+    pos_data = _fetch_position_data(session_key)
+    if pos_data is None:
+        return None
+
+    data = _position_frame(pos_data)
+    if data.empty:
+        return None
+    t0 = data['date'].min()
+    data = data.assign(
+        t=((data['date'] - t0) // pd.Timedelta(milliseconds=1)).astype('int64'),
+        position=data['position'].astype('int64'),
+    )
+    drivers = _fetch_driver_table(session_key)
+    series = []
+    for driver, t, position in _split_by_driver(data, 't', 'position'):
+        t, position = downsampling.downsample(t, position, steps=downsample, max_points=max_points)
+        series.append(_driver_series(driver, drivers, t=t, position=position))
+    return {
+        'session_key': session_key,
+        't0': t0.tz_localize('UTC').isoformat(),
+        'step': 'after',
+        'drivers': series,
+    }
+
+def get_lap_positions(year: int, location: str, max_points: int | None = None) -> dict | None:
+    """
+    Posição de cada piloto ao fim de cada volta (formato colunar, por piloto).
+    max_points limita os pontos por piloto (LTTB).
+    """
+    session_key = _get_session_key(year, location)
+    if not session_key:
+        return None
+    laps_data = _fetch_overtakes_data(session_key)
+    if laps_data is None:
+        return None
+
+    drivers = _fetch_driver_table(session_key)
+    series = []
+    for driver, laps, positions in _split_by_driver(_lap_frame(laps_data), 'lap_number', 'position'):
+        laps, positions = downsampling.downsample(laps, positions, max_points=max_points)
+        series.append(_driver_series(driver, drivers, lap=laps, position=positions))
+    return {'session_key': session_key, 'drivers': series}
+
+def get_lap_analytics_plot(year: int, location: str) -> Figure | None:
+    """
+    Gráfico de stints (composto, ritmo, degradação) e do gap para o líder.
+    """
+    session_key = _get_session_key(year, location)
+    if not session_key:
+        print(f"Não foi possível encontrar uma session_key para {location} {year}.")
+        return None
+
+    analytics = _fetch_lap_analytics(session_key)
+    if analytics is None:
+        print("Falha ao calcular o ritmo por stint.")
+        return None
+
+    fig = _plot_lap_analytics(analytics, year, location, _fetch_driver_table(session_key))
     return fig
+
+def get_lap_analytics(year: int, location: str) -> dict | None:
+    """
+    Ritmo por stint, melhores setores (formato colunar) e gap para o líder
+    (séries por piloto, volta x segundos) para as rotas /api.
+    """
+    session_key = _get_session_key(year, location)
+    if not session_key:
+        return None
+    analytics = _fetch_lap_analytics(session_key)
+    if analytics is None:
+        return None
+
+    drivers = _fetch_driver_table(session_key)
+    gaps = [
+        _driver_series(driver, drivers, lap=laps, gap=np.round(gap, 3))
+        for driver, laps, gap in _split_by_driver(analytics['gaps'], 'lap_number', 'gap')
+    ]
+    return {
+        'session_key': session_key,
+        'stints': columnar.frame_to_columns(analytics['stints']),
+        'sectors': columnar.frame_to_columns(analytics['sectors'].set_index('driver_number')),
+        'gaps': {'drivers': gaps},
+    }
@@ -0,0 +1,122 @@
+import contextvars
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import metrics
+
+# Conexões mantidas por host e threads de busca paralela
+POOL_SIZE = int(os.getenv("APEX_HTTP_POOL_SIZE", 16))
+FETCH_WORKERS = int(os.getenv("APEX_FETCH_WORKERS", 8))
+
+# Retentativas com backoff exponencial (0.5s, 1s, 2s...) para erros transitórios
+RETRY = Retry(
+    total=3,
+    backoff_factor=0.5,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=frozenset({"GET"}),
+    respect_retry_after_header=True,
+)
+
+_local = threading.local()
+_executor = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="openf1-fetch")
+_inflight = {}  # url+params -> Future
+_inflight_lock = threading.Lock()
+
+
+def _new_session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=RETRY)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Accept-Encoding": "gzip, deflate", "Accept": "application/json"})
+    return session
+
+
+def get_session() -> requests.Session:
+    """
+    Sessão HTTP com keep-alive, retentativas e gzip.
+    Uma por thread (requests.Session não é garantidamente thread-safe),
+    reaproveitada entre requisições da mesma thread.
+    """
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = _new_session()
+        _local.session = session
+    return session
+
+
+def get_json(url: str, params: dict | None = None, timeout: float = 30):
+    """GET com a sessão compartilhada; retorna o JSON decodificado."""
+    endpoint = url.split('?', 1)[0].rstrip('/').rsplit('/', 1)[-1]
+    with metrics.timer('http_fetch', endpoint=endpoint):
+        response = get_session().get(url, params=params, timeout=timeout)
+        response.raise_for_status()
+    with metrics.timer('json_parse', endpoint=endpoint):
+        return response.json()
+
+
+def _flight_key(url: str, params: dict | None) -> tuple:
+    return (url, tuple(sorted((params or {}).items())))
+
+
+def single_flight(key, func, *args, **kwargs):
+    """
+    Executa func(*args, **kwargs) uma única vez por chave entre chamadas simultâneas:
+    quem chegar enquanto a primeira execução está em andamento recebe o mesmo resultado
+    (ou a mesma exceção) em vez de repetir a busca.
+    """
+    with _inflight_lock:
+        future = _inflight.get(key)
+        owner = future is None
+        if owner:
+            future = Future()
+            _inflight[key] = future
+    if not owner:
+        metrics.inc('apex_single_flight_joined_total')
+        return future.result()
+
+    try:
+        result = func(*args, **kwargs)
+        future.set_result(result)
+        return result
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+
+def fetch_json(url: str, params: dict | None = None, timeout: float = 30):
+    """get_json com deduplicação de requisições idênticas em andamento."""
+    return single_flight(_flight_key(url, params), get_json, url, params, timeout)
+
+
+def submit(func, *args, **kwargs) -> Future:
+    """
+    Agenda func no pool de busca (para buscas paralelas). Roda numa cópia do
+    contexto de quem agendou: os tempos de http_fetch/json_parse entram no
+    Server-Timing da requisição que disparou a busca.
+    """
+    ctx = contextvars.copy_context()
+    return _executor.submit(ctx.run, func, *args, **kwargs)
+
+
+def fetch_many(calls: dict) -> dict:
+    """
+    Executa em paralelo {nome: (func, args...)} e retorna {nome: resultado}.
+    Exceções ficam no resultado do nome correspondente em vez de interromper as demais.
+    """
+    futures = {name: submit(call[0], *call[1:]) for name, call in calls.items()}
+    results = {}
+    for name, future in futures.items():
+        try:
+            results[name] = future.result()
+        except Exception as e:
+            results[name] = e
+    return results
@@ -0,0 +1,259 @@
+"""
+Modo ao vivo da telemetria: acompanha uma sessão em andamento.
+
+Um único LiveSession por session_key busca /position de forma incremental
+(filtro 'date>' a partir da última amostra vista, menos LIVE_OVERLAP_SECONDS)
+e acumula as amostras em memória; todos os navegadores conectados leem o mesmo
+estado via SSE. N espectadores custam uma requisição à OpenF1 por intervalo, não N.
+
+O id de cada evento SSE é o número de amostras já enviadas: um navegador que
+reconecta (Last-Event-ID) recebe só o que perdeu.
+"""
+import json
+import os
+import threading
+import time
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+import downsampling
+import f1_api
+import http_client
+
+# Intervalo entre buscas incrementais na OpenF1 (segundos)
+LIVE_POLL_SECONDS = float(os.getenv("APEX_LIVE_POLL_SECONDS", 4))
+
+# Sem espectadores por esse tempo, o poller para e o estado da sessão é descartado
+LIVE_IDLE_SECONDS = float(os.getenv("APEX_LIVE_IDLE_SECONDS", 60))
+
+# A OpenF1 ingere os pilotos com atrasos diferentes: uma amostra pode chegar depois
+# de outras mais novas. Cada busca volta este tanto antes da última amostra vista e
+# descarta as repetidas (mesma data e piloto).
+LIVE_OVERLAP_SECONDS = float(os.getenv("APEX_LIVE_OVERLAP_SECONDS", 10))
+
+# Comentário SSE enviado quando não há novidades (mantém proxies e a conexão abertos)
+HEARTBEAT_SECONDS = 15
+
+
+def _fetch_since(session_key: int, last_date: str | None) -> list:
+    """
+    Amostras de /position posteriores a last_date (todas, se None).
+    O filtro vai montado na URL: a OpenF1 lê 'date>valor', que não é um par chave=valor.
+    """
+    query = f"session_key={int(session_key)}"
+    if last_date:
+        query += f"&date%3E{quote(last_date, safe='')}"
+    return http_client.get_json(f"{f1_api.BASE_API_URL}/position?{query}", timeout=10) or []
+
+
+class LiveSession:
+    """
+    Estado em memória de uma sessão ao vivo: amostras (t em ms desde t0, piloto,
+    posição) só crescem, e os espectadores esperam por novas numa Condition.
+    """
+
+    def __init__(self, session_key: int, poll_interval: float = LIVE_POLL_SECONDS):
+        self.session_key = session_key
+        self.poll_interval = poll_interval
+        self.t0 = None              # pd.Timestamp (UTC, sem fuso) da primeira amostra
+        self.last_date = None       # 'date' da última amostra, como veio da API
+        self._latest = None         # pd.Timestamp (UTC, sem fuso) da última amostra
+        self._seen = set()          # (data, piloto) das amostras dentro da janela de sobreposição
+        self._t, self._driver, self._position = [], [], []
+        self._cond = threading.Condition()
+        self._drivers = {}
+        self.subscribers = 0
+        self.idle_since = time.monotonic()
+        self.polls = 0
+        self.errors = 0
+        self._thread = None
+
+    def __len__(self) -> int:
+        return len(self._t)
+
+    # --- Busca incremental ---
+
+    def _since(self) -> str | None:
+        """Início da próxima busca: a última amostra menos a janela de sobreposição."""
+        if self._latest is None:
+            return None
+        since = self._latest - pd.Timedelta(seconds=LIVE_OVERLAP_SECONDS)
+        return since.tz_localize('UTC').isoformat()
+
+    def poll(self) -> int:
+        """
+        Busca as amostras novas e as anexa ao estado. Retorna quantas chegaram.
+        As que chegam atrasadas (data anterior à última vista, dentro da janela)
+        também entram; as que já foram vistas são descartadas.
+        """
+        records = _fetch_since(self.session_key, self._since())
+        self.polls += 1
+        if not records:
+            return 0
+
+        df = pd.DataFrame(records)[['date', 'driver_number', 'position']].dropna()
+        if df.empty:
+            return 0
+        df['parsed'] = pd.to_datetime(df['date'], utc=True, format='ISO8601').dt.tz_localize(None)
+        df = df.sort_values('parsed', kind='stable').drop_duplicates(['parsed', 'driver_number'])
+        keys = list(zip(df['parsed'].tolist(), df['driver_number'].astype('int64').tolist()))
+        new = np.array([key not in self._seen for key in keys], dtype=bool)
+        if not new.any():
+            return 0
+        df = df[new]
+        if self.last_date is None:
+            # Pilotos (sigla e cor) carregados uma vez, junto com a primeira leva
+            self._drivers = f1_api._fetch_driver_table(self.session_key)
+
+        with self._cond:
+            if self.t0 is None:
+                self.t0 = df['parsed'].iloc[0]
+            t = ((df['parsed'] - self.t0) // pd.Timedelta(milliseconds=1)).astype('int64')
+            self._t.extend(t.tolist())
+            self._driver.extend(df['driver_number'].astype('int64').tolist())
+            self._position.extend(df['position'].astype('int64').tolist())
+            if self._latest is None or df['parsed'].iloc[-1] >= self._latest:
+                self._latest = df['parsed'].iloc[-1]
+                self.last_date = df['date'].iloc[-1]
+            self._cond.notify_all()
+
+        # Só as chaves que a próxima busca ainda pode devolver
+        self._seen.update(key for key, is_new in zip(keys, new) if is_new)
+        cutoff = self._latest - pd.Timedelta(seconds=LIVE_OVERLAP_SECONDS)
+        self._seen = {key for key in self._seen if key[0] > cutoff}
+        return len(df)
+
+    def run(self) -> None:
+        """Laço do poller: busca a cada poll_interval até ficar sem espectadores."""
+        while True:
+            try:
+                added = self.poll()
+                if added:
+                    print(f"Ao vivo {self.session_key}: +{added} amostras de posição.")
+            except Exception as e:
+                self.errors += 1
+                print(f"Erro ao buscar posições ao vivo da sessão {self.session_key}: {e}")
+            time.sleep(self.poll_interval)
+            if _release_if_idle(self):
+                print(f"Ao vivo {self.session_key}: sem espectadores, poller encerrado.")
+                return
+
+    # --- Leitura pelos espectadores ---
+
+    def _payload(self, start: int, stop: int, steps: bool) -> dict:
+        """Amostras [start, stop) no formato colunar por piloto de get_position_series."""
+        data = pd.DataFrame({
+            'driver_number': np.asarray(self._driver[start:stop], dtype=np.int64),
+            't': np.asarray(self._t[start:stop], dtype=np.int64),
+            'position': np.asarray(self._position[start:stop], dtype=np.int64),
+        })
+        series = []
+        for driver, t, position in f1_api._split_by_driver(data, 't', 'position'):
+            if steps:
+                t, position = downsampling.collapse_steps(t, position)
+            series.append(f1_api._driver_series(driver, self._drivers, t=t, position=position))
+        return {
+            'session_key': self.session_key,
+            't0': self.t0.tz_localize('UTC').isoformat() if self.t0 is not None else None,
+            'step': 'after',
+            'drivers': series,
+        }
+
+    def snapshot(self) -> tuple:
+        """(id, payload) com tudo o que já chegou (só as mudanças de posição)."""
+        with self._cond:
+            stop = len(self._t)
+        return stop, self._payload(0, stop, steps=True)
+
+    def wait_delta(self, after: int, timeout: float):
+        """
+        Espera amostras além de `after` por até `timeout` segundos.
+        Retorna (id, payload) com as novas, ou None se não chegou nada.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: len(self._t) > after, timeout=timeout)
+            stop = len(self._t)
+        if stop <= after:
+            return None
+        return stop, self._payload(after, stop, steps=False)
+
+
+_sessions = {}  # session_key -> LiveSession com poller ativo
+_sessions_lock = threading.Lock()
+
+
+def subscribe(session_key: int) -> LiveSession:
+    """Registra um espectador, iniciando o poller da sessão se ele não estiver rodando."""
+    with _sessions_lock:
+        session = _sessions.get(session_key)
+        if session is None:
+            session = LiveSession(session_key)
+            _sessions[session_key] = session
+        session.subscribers += 1
+        if session._thread is None:
+            session._thread = threading.Thread(target=session.run, name=f'live-{session_key}', daemon=True)
+            session._thread.start()
+    return session
+
+
+def unsubscribe(session: LiveSession) -> None:
+    with _sessions_lock:
+        session.subscribers -= 1
+        if session.subscribers == 0:
+            session.idle_since = time.monotonic()
+
+
+def _release_if_idle(session: LiveSession) -> bool:
+    """Chamado pelo poller: sai do registro se ficou LIVE_IDLE_SECONDS sem espectadores."""
+    with _sessions_lock:
+        if session.subscribers > 0 or time.monotonic() - session.idle_since < LIVE_IDLE_SECONDS:
+            return False
+        if _sessions.get(session.session_key) is session:
+            del _sessions[session.session_key]
+        return True
+
+
+def _sse(event: str, event_id: int, payload: dict) -> str:
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(payload, separators=(',', ':'))}\n\n"
+
+
+def events(session_key: int, last_event_id: int | None = None):
+    """
+    Gerador do stream SSE de uma sessão: 'snapshot' com o estado atual (ou 'delta'
+    com o que faltou, se last_event_id vier de uma reconexão), depois um 'delta'
+    a cada leva nova de amostras e comentários de heartbeat nos intervalos.
+    """
+    session = subscribe(session_key)
+    try:
+        if last_event_id is not None and 0 <= last_event_id <= len(session):
+            sent = last_event_id
+        else:
+            sent, payload = session.snapshot()
+            yield _sse('snapshot', sent, payload)
+        while True:
+            delta = session.wait_delta(sent, HEARTBEAT_SECONDS)
+            if delta is None:
+                yield ": ping\n\n"
+                continue
+            sent, payload = delta
+            yield _sse('delta', sent, payload)
+    finally:
+        unsubscribe(session)
+
+
+def stats() -> dict:
+    """Sessões acompanhadas agora: espectadores, amostras e buscas feitas na OpenF1."""
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+    return {
+        'sessions': [{
+            'session_key': s.session_key,
+            'subscribers': s.subscribers,
+            'samples': len(s),
+            'polls': s.polls,
+            'errors': s.errors,
+            'last_date': s.last_date,
+        } for s in sessions],
+    }
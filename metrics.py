@@ -0,0 +1,220 @@
+"""
+Instrumentação leve do app: contadores e histogramas de tempo por etapa
+(busca HTTP, parse de JSON/CSV, transformações de DataFrame, montagem da figura,
+codificação do PNG) e de acertos/faltas dos caches.
+
+- render(): tudo no formato texto do Prometheus (rota /metrics).
+- begin_request()/request_timings(): tempos por etapa da requisição atual,
+  enviados no cabeçalho Server-Timing.
+
+Sem dependências externas. Cada processo guarda seus próprios valores (com
+vários workers gunicorn, cada um expõe os seus). Jobs que rodam em outros
+processos (fila de renderização) medem dentro de capture() e devolvem as
+medições para o processo web incorporar com replay().
+"""
+import contextvars
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+# Limites dos baldes dos histogramas (segundos)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Histograma usado por timer()/timed()
+STAGE_METRIC = 'apex_stage_seconds'
+
+HELP = {
+    STAGE_METRIC: 'Tempo por etapa (http_fetch, json_parse, csv_parse, transform, figure_build, png_encode...)',
+    'apex_cache_requests_total': 'Consultas aos caches por resultado (hit/miss)',
+    'apex_single_flight_joined_total': 'Buscas que aguardaram uma busca idêntica já em andamento',
+    'apex_request_seconds': 'Tempo total das requisições HTTP por rota',
+    'apex_requests_total': 'Requisições HTTP por rota, método e status',
+}
+
+_lock = threading.Lock()
+_counters = {}      # (nome, labels) -> valor
+_histograms = {}    # (nome, labels) -> [contagem por balde..., soma, total]
+_gauge_callbacks = []
+
+# Tempos por etapa da requisição atual (stage -> segundos) e medições capturadas
+_request = contextvars.ContextVar('apex_request_timings', default=None)
+_captured = contextvars.ContextVar('apex_captured_metrics', default=None)
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _record(kind: str, name: str, labels: tuple, value: float) -> None:
+    captured = _captured.get()
+    if captured is not None:
+        captured.append((kind, name, labels, value))
+        return
+    with _lock:
+        if kind == 'counter':
+            _counters[(name, labels)] = _counters.get((name, labels), 0) + value
+            return
+        series = _histograms.get((name, labels))
+        if series is None:
+            series = _histograms[(name, labels)] = [0] * len(DEFAULT_BUCKETS) + [0.0, 0]
+        for i, bound in enumerate(DEFAULT_BUCKETS):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += value
+        series[-1] += 1
+
+
+def inc(name: str, value: float = 1, **labels) -> None:
+    """Soma `value` ao contador `name` com os labels dados."""
+    _record('counter', name, _label_key(labels), value)
+
+
+def observe(name: str, seconds: float, **labels) -> None:
+    """Registra uma duração no histograma `name`."""
+    _record('histogram', name, _label_key(labels), seconds)
+
+
+def cache_result(cache: str, result: str) -> None:
+    """Atalho para apex_cache_requests_total{cache, result}."""
+    inc('apex_cache_requests_total', cache=cache, result=result)
+
+
+@contextmanager
+def timer(stage: str, **labels):
+    """
+    Mede o bloco em apex_stage_seconds{stage, ...} e soma o tempo à etapa
+    na requisição atual (Server-Timing), se houver uma.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        observe(STAGE_METRIC, elapsed, stage=stage, **labels)
+        timings = _request.get()
+        if timings is not None:
+            # Buscas paralelas (http_client.submit) somam no mesmo dicionário
+            with _lock:
+                timings[stage] = timings.get(stage, 0.0) + elapsed
+
+
+def timed(stage: str, **labels):
+    """Decorador: mede cada chamada da função como timer(stage, **labels)."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(stage, **labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# --- Por requisição (Server-Timing) ---
+
+def begin_request():
+    """Começa a acumular os tempos por etapa da requisição (retorna o token para end_request)."""
+    return _request.set({})
+
+
+def request_timings() -> dict:
+    """Tempos por etapa acumulados na requisição atual (segundos)."""
+    return dict(_request.get() or {})
+
+
+def end_request(token) -> None:
+    _request.reset(token)
+
+
+def server_timing(timings: dict) -> str:
+    """Valor do cabeçalho Server-Timing (durações em ms)."""
+    return ', '.join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in timings.items())
+
+
+# --- Medições feitas em outros processos ---
+
+@contextmanager
+def capture():
+    """
+    Guarda as medições do bloco numa lista (em vez de registrá-las aqui), para
+    serem devolvidas ao processo principal e incorporadas com replay().
+    """
+    records = []
+    token = _captured.set(records)
+    try:
+        yield records
+    finally:
+        _captured.reset(token)
+
+
+def replay(records: list) -> None:
+    for kind, name, labels, value in records:
+        _record(kind, name, labels, value)
+
+
+# --- Exportação ---
+
+def register_gauges(callback) -> None:
+    """
+    callback() -> [(nome, tipo, ajuda, labels, valor)], avaliado a cada /metrics
+    (valores que já existem em outros módulos: memória, fila, sessões ao vivo).
+    """
+    _gauge_callbacks.append(callback)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels: tuple, extra: tuple = ()) -> str:
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render() -> str:
+    """Todas as métricas no formato texto do Prometheus (0.0.4)."""
+    with _lock:
+        counters = dict(_counters)
+        histograms = {key: list(series) for key, series in _histograms.items()}
+
+    families = {}  # nome -> (tipo, ajuda, [linhas])
+
+    def family(name, kind, help_text=None):
+        return families.setdefault(name, (kind, help_text or HELP.get(name, name), []))[2]
+
+    for (name, labels), value in sorted(counters.items()):
+        family(name, 'counter').append(f"{name}{_labels(labels)} {_number(value)}")
+    for (name, labels), series in sorted(histograms.items()):
+        lines = family(name, 'histogram')
+        for bound, count in zip(DEFAULT_BUCKETS, series):
+            lines.append(f"{name}_bucket{_labels(labels, (('le', str(bound)),))} {count}")
+        lines.append(f"{name}_bucket{_labels(labels, (('le', '+Inf'),))} {series[-1]}")
+        lines.append(f"{name}_sum{_labels(labels)} {_number(series[-2])}")
+        lines.append(f"{name}_count{_labels(labels)} {series[-1]}")
+    for callback in _gauge_callbacks:
+        try:
+            for name, kind, help_text, labels, value in callback():
+                if value is not None:
+                    family(name, kind, help_text).append(f"{name}{_labels(_label_key(labels))} {_number(value)}")
+        except Exception as e:
+            print(f"Erro ao coletar métricas: {e}")
+
+    out = []
+    for name, (kind, help_text, lines) in families.items():
+        out.append(f"# HELP {name} {help_text}")
+        out.append(f"# TYPE {name} {kind}")
+        out.extend(lines)
+    return '\n'.join(out) + '\n'
+
+
+def reset() -> None:
+    """Zera contadores e histogramas (benchmarks)."""
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
@@ -0,0 +1,127 @@
+"""
+Tabela de ultrapassagens de uma sessão, calculada a partir dos feeds
+/position e /laps da OpenF1.
+
+Cada linha é um evento: na volta `lap`, `overtaker` assumiu a posição `position`
+que era de `overtaken`. Tudo é feito com shift/merge vetorizados (sem laço por piloto),
+e o resultado é pequeno o suficiente para ficar no cache junto dos dados brutos.
+"""
+import numpy as np
+import pandas as pd
+
+EVENT_COLUMNS = ['date', 'lap', 'overtaker', 'overtaken', 'position', 'positions_gained', 'pit_related']
+
+# Versão do cálculo; mude quando a lógica mudar para invalidar tabelas já em cache
+EVENTS_FORMAT_VERSION = 2
+
+# Diferença máxima entre o ganho de um piloto e a perda do outro para formar um par
+PAIR_TOLERANCE = pd.Timedelta(seconds=5)
+
+
+def _utc(dates: pd.Series) -> pd.Series:
+    """Datas em UTC com resolução única (merge_asof exige chaves do mesmo tipo)."""
+    return pd.to_datetime(dates, utc=True, format='ISO8601').astype('datetime64[ns, UTC]')
+
+
+def position_changes(pos_data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Amostras de /position em que a posição do piloto mudou,
+    com a posição anterior em 'previous' (a primeira amostra de cada piloto é o grid e sai).
+    """
+    df = pos_data[['date', 'driver_number', 'position']].dropna()
+    df = df.assign(date=_utc(df['date'])).sort_values(['driver_number', 'date'], kind='stable')
+    df['previous'] = df.groupby('driver_number', sort=False)['position'].shift()
+    df = df[df['previous'].notna() & (df['position'] != df['previous'])]
+    return df.astype({'driver_number': 'int64', 'position': 'int64', 'previous': 'int64'})
+
+
+def _lap_table(laps_data: pd.DataFrame) -> pd.DataFrame | None:
+    """
+    (piloto, início da volta, volta, pit) ordenado por data para o merge_asof.
+    'pit' marca a volta de saída dos boxes e a volta anterior a ela (volta de entrada).
+    """
+    if laps_data is None or not {'date_start', 'lap_number', 'driver_number'} <= set(laps_data.columns):
+        return None
+    laps = laps_data[['driver_number', 'lap_number', 'date_start']].dropna()
+    out_lap = laps_data.loc[laps.index, 'is_pit_out_lap'] if 'is_pit_out_lap' in laps_data else False
+    laps = laps.assign(
+        driver_number=laps['driver_number'].astype('int64'),
+        lap_number=laps['lap_number'].astype('int64'),
+        date_start=_utc(laps['date_start']),
+        pit_out=pd.Series(out_lap, index=laps.index).fillna(False).astype(bool),
+    ).sort_values(['driver_number', 'lap_number'])
+    in_lap = laps.groupby('driver_number', sort=False)['pit_out'].shift(-1, fill_value=False)
+    laps['pit'] = laps['pit_out'] | in_lap.astype(bool)
+    return laps.sort_values('date_start')[['driver_number', 'date_start', 'lap_number', 'pit']]
+
+
+def _attach_laps(events: pd.DataFrame, laps: pd.DataFrame, driver_col: str, prefix: str) -> pd.DataFrame:
+    """Volta (e flag de pit) em que `driver_col` estava no instante de cada evento."""
+    lookup = laps.rename(columns={
+        'driver_number': driver_col, 'lap_number': f'{prefix}_lap', 'pit': f'{prefix}_pit',
+    })
+    return pd.merge_asof(events, lookup, left_on='date', right_on='date_start',
+                         by=driver_col, direction='backward').drop(columns='date_start')
+
+
+def compute_overtake_events(pos_data: pd.DataFrame, laps_data: pd.DataFrame | None = None) -> pd.DataFrame:
+    """
+    Tabela de ultrapassagens (EVENT_COLUMNS), em ordem cronológica.
+    Um ganho de posição é pareado com a perda do piloto que ocupava aquela posição
+    (amostra mais próxima dentro de PAIR_TOLERANCE); cada perda forma no máximo um
+    par, com o ganho mais próximo. Sem /laps, 'lap' fica vazio e 'pit_related' é False.
+    """
+    changes = position_changes(pos_data)
+    gains = changes[changes['position'] < changes['previous']]
+    losses = changes[changes['position'] > changes['previous']]
+
+    left = gains.rename(columns={'driver_number': 'overtaker'}).sort_values('date')
+    right = (losses[['date', 'driver_number', 'previous']]
+             .rename(columns={'date': 'lost_at', 'driver_number': 'overtaken', 'previous': 'position'})
+             .sort_values('lost_at'))
+    events = pd.merge_asof(left, right, left_on='date', right_on='lost_at', by='position',
+                           direction='nearest', tolerance=PAIR_TOLERANCE)
+    events = events[events['overtaken'].notna()]
+    # merge_asof pode usar a mesma perda para vários ganhos: fica só o par mais próximo
+    distance = (events['date'] - events['lost_at']).abs()
+    events = (events.assign(distance=distance)
+              .sort_values('distance', kind='stable')
+              .drop_duplicates(subset=['overtaken', 'lost_at'])
+              .sort_values('date', kind='stable'))
+    events = events.assign(
+        overtaken=events['overtaken'].astype('int64'),
+        positions_gained=events['previous'] - events['position'],
+    )
+
+    laps = _lap_table(laps_data)
+    if laps is None or events.empty:
+        events = events.assign(lap=pd.array([pd.NA] * len(events), dtype='Int64'), pit_related=False)
+    else:
+        events = _attach_laps(events, laps, 'overtaker', 'overtaker')
+        events = _attach_laps(events, laps, 'overtaken', 'overtaken')
+        events = events.assign(
+            lap=events['overtaker_lap'].astype('Int64'),
+            pit_related=(events['overtaker_pit'].fillna(False).astype(bool)
+                         | events['overtaken_pit'].fillna(False).astype(bool)),
+        )
+    return events[EVENT_COLUMNS].reset_index(drop=True)
+
+
+def events_to_records(events: pd.DataFrame) -> list:
+    """Eventos como lista de dicts serializáveis em JSON (datas ISO, NA -> None)."""
+    utc = events['date'].dt.tz_convert('UTC').dt.tz_localize(None).to_numpy()
+    out = events.assign(date=np.char.add(np.datetime_as_string(utc, unit='ms'), '+00:00'))
+    out = out.astype(object).where(out.notna(), None)
+    return [
+        {key: (value.item() if isinstance(value, np.generic) else value) for key, value in row.items()}
+        for row in out.to_dict(orient='records')
+    ]
+
+
+def summarize_by_lap(events: pd.DataFrame) -> pd.DataFrame:
+    """Ultrapassagens por volta, separadas em 'pista' e 'pit' (para o gráfico)."""
+    events = events.dropna(subset=['lap'])
+    counts = (events.assign(kind=np.where(events['pit_related'], 'pit', 'pista'))
+              .groupby(['lap', 'kind']).size()
+              .unstack(fill_value=0))
+    return counts.reindex(columns=['pista', 'pit'], fill_value=0)
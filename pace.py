@@ -0,0 +1,172 @@
+"""
+Ritmo de corrida por stint, a partir dos feeds /laps e /stints da OpenF1.
+
+- stint_summary: por (piloto, stint) o composto, as voltas, o ritmo médio e a
+  degradação (inclinação do tempo de volta em função da idade do pneu, s/volta).
+- sector_bests: melhor volta, melhores setores e volta ideal de cada piloto.
+- gap_to_leader: diferença para o líder ao fim de cada volta.
+
+Tudo é calculado com groupby/merge vetorizados (sem laço por piloto). O resultado
+é pequeno e fica no cache por sessão, como a tabela de ultrapassagens.
+"""
+import numpy as np
+import pandas as pd
+
+STINT_COLUMNS = ['driver_number', 'stint_number', 'compound', 'lap_start', 'lap_end', 'laps',
+                 'pace_laps', 'mean_pace', 'best_lap', 'degradation']
+SECTOR_COLUMNS = ['duration_sector_1', 'duration_sector_2', 'duration_sector_3']
+
+# Versão do cálculo; mude quando a lógica mudar para invalidar resultados já em cache
+ANALYTICS_FORMAT_VERSION = 2
+
+# Voltas acima de OUTLIER_FACTOR x a mediana do piloto (safety car, tráfego, erros)
+# ficam fora do ritmo e da degradação
+OUTLIER_FACTOR = 1.07
+
+
+def _lap_table(laps_data: pd.DataFrame) -> pd.DataFrame:
+    """Voltas com piloto/volta inteiros, tempos em float64 e a flag de volta de saída dos boxes."""
+    laps = laps_data.dropna(subset=['driver_number', 'lap_number'])
+    columns = {
+        'driver_number': laps['driver_number'].astype('int64'),
+        'lap_number': laps['lap_number'].astype('int64'),
+        'lap_duration': pd.to_numeric(laps['lap_duration'], errors='coerce').astype('float64'),
+        'pit_out': (laps['is_pit_out_lap'].fillna(False).astype(bool)
+                    if 'is_pit_out_lap' in laps else False),
+    }
+    for column in SECTOR_COLUMNS:
+        columns[column] = (pd.to_numeric(laps[column], errors='coerce').astype('float64')
+                           if column in laps else np.nan)
+    if 'date_start' in laps:
+        columns['date_start'] = pd.to_datetime(laps['date_start'], utc=True, format='ISO8601')
+    table = pd.DataFrame(columns, index=laps.index)
+    return table.sort_values(['driver_number', 'lap_number'], kind='stable').reset_index(drop=True)
+
+
+def assign_stints(laps: pd.DataFrame, stints_data: pd.DataFrame | None) -> pd.DataFrame:
+    """
+    Acrescenta stint_number, compound e tyre_age (voltas do pneu) a cada volta.
+    Sem /stints, cada piloto tem um único stint de composto desconhecido.
+    """
+    required = {'driver_number', 'stint_number', 'lap_start'}
+    if stints_data is None or stints_data.empty or not required <= set(stints_data.columns):
+        first = laps.groupby('driver_number', sort=False)['lap_number'].transform('min')
+        return laps.assign(stint_number=1, compound='UNKNOWN', tyre_age=laps['lap_number'] - first)
+
+    stints = stints_data.dropna(subset=list(required))
+    stints = pd.DataFrame({
+        'driver_number': stints['driver_number'].astype('int64'),
+        'stint_number': stints['stint_number'].astype('int64'),
+        'stint_lap_start': stints['lap_start'].astype('int64'),
+        'compound': stints['compound'].fillna('UNKNOWN').astype(str) if 'compound' in stints else 'UNKNOWN',
+        'age_at_start': (pd.to_numeric(stints['tyre_age_at_start'], errors='coerce').fillna(0)
+                         if 'tyre_age_at_start' in stints else 0),
+    }).sort_values('stint_lap_start')
+
+    # Cada volta pertence ao último stint que começou até ela
+    merged = pd.merge_asof(laps.sort_values('lap_number'), stints, left_on='lap_number',
+                           right_on='stint_lap_start', by='driver_number', direction='backward')
+    merged = merged.sort_values(['driver_number', 'lap_number'], kind='stable').reset_index(drop=True)
+    merged['tyre_age'] = merged['age_at_start'] + merged['lap_number'] - merged['stint_lap_start']
+    merged['stint_number'] = merged['stint_number'].astype('Int64')
+    return merged.drop(columns=['stint_lap_start', 'age_at_start'])
+
+
+def representative_laps(laps: pd.DataFrame) -> pd.Series:
+    """
+    Máscara das voltas que contam para o ritmo: com tempo, fora da largada,
+    sem entrada/saída dos boxes e abaixo de OUTLIER_FACTOR x a mediana do piloto.
+    """
+    by_driver = laps.groupby('driver_number', sort=False)
+    in_lap = by_driver['pit_out'].shift(-1, fill_value=False).astype(bool)
+    median = by_driver['lap_duration'].transform('median')
+    return (laps['lap_duration'].notna()
+            & (laps['lap_number'] > 1)
+            & ~laps['pit_out'] & ~in_lap
+            & (laps['lap_duration'] <= median * OUTLIER_FACTOR))
+
+
+def stint_summary(laps: pd.DataFrame) -> pd.DataFrame:
+    """
+    Uma linha por (piloto, stint) com STINT_COLUMNS. A degradação é a inclinação
+    da regressão linear tempo x idade do pneu (mínimos quadrados a partir de somas
+    por grupo), sem correção do efeito do combustível.
+    """
+    laps = laps.dropna(subset=['stint_number'])
+    keys = ['driver_number', 'stint_number']
+    summary = laps.groupby(keys).agg(
+        compound=('compound', 'first'),
+        lap_start=('lap_number', 'min'),
+        lap_end=('lap_number', 'max'),
+        laps=('lap_number', 'size'),
+    )
+
+    valid = laps[representative_laps(laps)]
+    x, y = valid['tyre_age'].astype('float64'), valid['lap_duration']
+    sums = pd.DataFrame({'x': x, 'y': y, 'xy': x * y, 'xx': x * x, **{k: valid[k] for k in keys}}) \
+        .groupby(keys).agg(n=('y', 'size'), sx=('x', 'sum'), sy=('y', 'sum'), sxy=('xy', 'sum'),
+                           sxx=('xx', 'sum'), best=('y', 'min'))
+    denominator = sums['n'] * sums['sxx'] - sums['sx'] ** 2
+    slope = (sums['n'] * sums['sxy'] - sums['sx'] * sums['sy']) / denominator.where(denominator > 0)
+
+    summary = summary.join(pd.DataFrame({
+        'pace_laps': sums['n'],
+        'mean_pace': sums['sy'] / sums['n'],
+        'best_lap': sums['best'],
+        'degradation': slope,
+    }))
+    summary['pace_laps'] = summary['pace_laps'].fillna(0).astype('int64')
+    return summary.reset_index()[STINT_COLUMNS]
+
+
+def sector_bests(laps: pd.DataFrame) -> pd.DataFrame:
+    """
+    Por piloto: melhor volta, melhor tempo em cada setor, volta ideal (soma dos
+    melhores setores) e a diferença para o melhor setor da sessão.
+    """
+    best = laps.groupby('driver_number')[['lap_duration', *SECTOR_COLUMNS]].min()
+    best = best.rename(columns={'lap_duration': 'best_lap'})
+    best['ideal_lap'] = best[SECTOR_COLUMNS].sum(axis=1, min_count=len(SECTOR_COLUMNS))
+    session_best = best[SECTOR_COLUMNS].min()
+    for column in SECTOR_COLUMNS:
+        best[f'{column}_delta'] = best[column] - session_best[column]
+    return best.sort_values('best_lap').reset_index()
+
+
+def gap_to_leader(laps: pd.DataFrame) -> pd.DataFrame:
+    """
+    (piloto, volta, gap em segundos) para cada volta completada. O fim da volta é
+    o início da seguinte quando ela é a volta consecutiva (senão, início + duração);
+    o líder de cada volta é quem a completou primeiro. Sem date_start, usa a soma
+    dos tempos de volta, só enquanto não falta nenhuma volta do piloto.
+    """
+    by_driver = laps.groupby('driver_number', sort=False)
+    if 'date_start' in laps:
+        origin = laps['date_start'].min()
+        start = (laps['date_start'] - origin).dt.total_seconds()
+        next_start = (by_driver['date_start'].shift(-1) - origin).dt.total_seconds()
+        # Uma volta faltando no /laps faria o "fim" cair no início de outra volta
+        consecutive = by_driver['lap_number'].shift(-1) == laps['lap_number'] + 1
+        finish = next_start.where(consecutive).fillna(start + laps['lap_duration'])
+    else:
+        # Uma volta faltando deixa todas as somas seguintes curtas
+        complete = laps['lap_number'] == by_driver.cumcount() + 1
+        finish = by_driver['lap_duration'].cumsum(skipna=False).where(complete)
+
+    gaps = pd.DataFrame({
+        'driver_number': laps['driver_number'],
+        'lap_number': laps['lap_number'],
+        'finish': finish,
+    }).dropna()
+    gaps['gap'] = gaps['finish'] - gaps.groupby('lap_number')['finish'].transform('min')
+    return gaps[['driver_number', 'lap_number', 'gap']].reset_index(drop=True)
+
+
+def compute_lap_analytics(laps_data: pd.DataFrame, stints_data: pd.DataFrame | None = None) -> dict:
+    """{'stints': stint_summary, 'sectors': sector_bests, 'gaps': gap_to_leader} de uma sessão."""
+    laps = assign_stints(_lap_table(laps_data), stints_data)
+    return {
+        'stints': stint_summary(laps),
+        'sectors': sector_bests(laps),
+        'gaps': gap_to_leader(laps),
+    }
@@ -0,0 +1,69 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+
+# Memória máxima para PNGs renderizados (bytes)
+RENDER_CACHE_MAX_BYTES = int(os.getenv("APEX_RENDER_CACHE_BYTES", 64 * 1024 * 1024))
+
+# Versão do código de renderização/formato das respostas. Entra em todo ETag (e
+# portanto na chave do PngCache): mude a cada deploy que altere gráficos ou payloads,
+# para que navegadores, proxies e o cache não continuem servindo a versão antiga.
+RENDER_VERSION = 1
+
+
+def make_etag(endpoint: str, params: dict, version) -> str:
+    """
+    ETag forte derivado de (endpoint, parâmetros, versão dos dados, RENDER_VERSION).
+    Como a imagem é função determinística dessas entradas, o ETag pode ser
+    calculado (e um 304 respondido) sem renderizar nada.
+    """
+    query = "&".join(f"{k}={params[k]}" for k in sorted(params))
+    canonical = f"{endpoint}?{query}#{version}#r{RENDER_VERSION}"
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+
+
+class PngCache:
+    """
+    Cache LRU em memória de PNGs já codificados, limitado por bytes.
+    Cada entrada guarda (png, last_modified, max_age) indexada pelo ETag; max_age
+    é o Cache-Control da rota que pediu a imagem (curto para sessões ainda não
+    assentadas), reaproveitado quando o PNG é entregue pelo polling.
+    """
+
+    def __init__(self, max_bytes: int = RENDER_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # etag -> (png, last_modified, max_age)
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, etag: str):
+        with self._lock:
+            entry = self._entries.get(etag)
+            if entry is not None:
+                self._entries.move_to_end(etag)
+        metrics.cache_result('png', 'miss' if entry is None else 'hit')
+        return entry
+
+    def put(self, etag: str, png: bytes, last_modified: float | None = None, max_age: int | None = None):
+        entry = (png, last_modified or time.time(), max_age)
+        if len(png) > self.max_bytes:
+            return entry
+        with self._lock:
+            old = self._entries.pop(etag, None)
+            if old is not None:
+                self._size -= len(old[0])
+            self._entries[etag] = entry
+            self._size += len(png)
+            while self._size > self.max_bytes and self._entries:
+                _etag, (evicted, _lm, _max_age) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
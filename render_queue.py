@@ -0,0 +1,211 @@
+"""
+Fila de renderização de gráficos em processos separados.
+
+A renderização Agg é CPU-bound e segura o GIL: feita na thread da requisição,
+um gráfico de telemetria lento trava o worker do Flask. Aqui cada gráfico vira
+um job identificado pelo ETag (endpoint + parâmetros + versão dos dados),
+executado num ProcessPoolExecutor. Jobs idênticos em andamento são unificados,
+e o PNG pronto vai para o PngCache do app.
+"""
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+import metrics
+
+# Processos de renderização (0 = renderiza na própria thread, sem pool)
+RENDER_WORKERS = int(os.getenv("APEX_RENDER_WORKERS", os.cpu_count() or 2))
+
+# 'spawn' não herda threads/locks do processo web (o watcher, o pool HTTP...)
+RENDER_START_METHOD = os.getenv("APEX_RENDER_START_METHOD", "spawn")
+
+# Quantos resultados sem figura/erros recentes são lembrados para o polling
+_FAILED_HISTORY = 256
+
+
+# --- Jobs (funções de módulo: precisam ser importáveis pelos processos do pool) ---
+
+def _measured(job, *args):
+    """
+    Executa o job guardando as medições (metrics.capture) e devolve
+    (png, medições, memória do worker): no processo do pool elas não chegariam
+    ao /metrics do processo web.
+    """
+    import rendering
+    with metrics.capture() as records:
+        with metrics.timer('render_job', job=job.__name__):
+            png = job(*args)
+    return png, records, rendering.memory_stats()
+
+
+def _render(fig):
+    import rendering
+    return rendering.render_png(fig) if fig is not None else None
+
+
+def render_telemetry_position(year: int, location: str):
+    import f1_api
+    return _render(f1_api.get_position_plot(year=year, location=location))
+
+
+def render_telemetry_overtakes(year: int, location: str):
+    import f1_api
+    return _render(f1_api.get_overtakes_plot(year=year, location=location))
+
+
+def render_telemetry_overtake_events(year: int, location: str):
+    import f1_api
+    return _render(f1_api.get_overtake_events_plot(year=year, location=location))
+
+
+def render_telemetry_stints(year: int, location: str):
+    import f1_api
+    return _render(f1_api.get_lap_analytics_plot(year=year, location=location))
+
+
+def render_driver_performance(df_pilotos):
+    import analysis_core
+    return _render(analysis_core.plot_driver_performance_grid(df_pilotos))
+
+
+class RenderError(Exception):
+    """O job falhou (erro na renderização ou worker do pool que morreu)."""
+
+
+class NoFigureError(Exception):
+    """O job terminou sem imagem: não há dados para os parâmetros."""
+
+
+_NO_FIGURE = 'sem dados para os parâmetros'
+
+
+class RenderQueue:
+    """
+    Enfileira jobs de renderização por chave (ETag).
+    submit() devolve o Future do job já pendente para a mesma chave, em vez de
+    renderizar de novo. on_done(key, png, last_modified, max_age) é chamado quando uma imagem fica pronta.
+    """
+
+    def __init__(self, workers: int = RENDER_WORKERS, on_done=None,
+                 start_method: str = RENDER_START_METHOD):
+        self.workers = workers
+        self.on_done = on_done
+        self._start_method = start_method
+        self._executor = None
+        self._pending = {}               # chave -> Future
+        self._failed = OrderedDict()     # chave -> ('failed' | 'empty', mensagem)
+        self._lock = threading.Lock()
+        self._stats = {'submitted': 0, 'deduplicated': 0, 'completed': 0, 'failed': 0}
+        self._worker_memory = {}         # pid -> rendering.memory_stats() do último job
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Criado no primeiro job: importar o módulo não sobe processos
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(self._start_method),
+            )
+        return self._executor
+
+    def submit(self, key: str, job, *args, last_modified: float | None = None,
+               max_age: int | None = None) -> Future:
+        """Agenda job(*args) para a chave, ou retorna o job idêntico já em andamento."""
+        with self._lock:
+            future = self._pending.get(key)
+            if future is not None:
+                self._stats['deduplicated'] += 1
+                return future
+            self._failed.pop(key, None)
+            self._stats['submitted'] += 1
+            if self.workers > 0:
+                try:
+                    future = self._get_executor().submit(_measured, job, *args)
+                except BrokenProcessPool:
+                    # Um processo morreu (ex: falta de memória): sobe um pool novo
+                    self._executor = None
+                    self._worker_memory.clear()
+                    future = self._get_executor().submit(_measured, job, *args)
+            else:
+                future = Future()
+            self._pending[key] = future
+
+        future.add_done_callback(lambda done: self._finish(key, done, last_modified, max_age))
+        if self.workers <= 0:
+            # Sem pool: renderiza aqui mesmo (útil para depuração)
+            try:
+                future.set_result(_measured(job, *args))
+            except Exception as e:
+                future.set_exception(e)
+        return future
+
+    def _finish(self, key: str, future: Future, last_modified: float | None, max_age: int | None) -> None:
+        error = future.exception()
+        png = None
+        if error is None:
+            png, records, memory = future.result()
+            metrics.replay(records)
+            with self._lock:
+                self._worker_memory[memory['pid']] = memory
+        if png is not None and self.on_done is not None:
+            # Publica a imagem antes de tirar o job da lista de pendentes,
+            # para que um polling nunca veja 'nem pendente, nem pronto'
+            self.on_done(key, png, last_modified, max_age)
+        with self._lock:
+            self._pending.pop(key, None)
+            if png is None:
+                self._stats['failed'] += 1
+                self._failed[key] = ('failed', str(error)) if error is not None else ('empty', _NO_FIGURE)
+                while len(self._failed) > _FAILED_HISTORY:
+                    self._failed.popitem(last=False)
+            else:
+                self._stats['completed'] += 1
+        if error is not None:
+            print(f"Erro ao renderizar gráfico ({key}): {error}")
+
+    def wait(self, future: Future, timeout: float):
+        """
+        Espera o job por até `timeout` segundos.
+        Retorna o PNG ou None se ainda está em andamento. Levanta NoFigureError
+        se não há dados para os parâmetros e RenderError se o job falhou.
+        """
+        try:
+            png, _records, _memory = future.result(timeout=timeout)
+        except FutureTimeout:
+            return None
+        except Exception as e:
+            raise RenderError(str(e) or type(e).__name__) from e
+        if png is None:
+            raise NoFigureError(_NO_FIGURE)
+        return png
+
+    def status(self, key: str):
+        """
+        'pending', ('failed', mensagem) se o job falhou, ('empty', mensagem) se
+        terminou sem imagem, ou None (desconhecido/já publicado).
+        """
+        with self._lock:
+            if key in self._pending:
+                return 'pending'
+            return self._failed.get(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['pending'] = len(self._pending)
+        stats['workers'] = self.workers
+        return stats
+
+    def worker_memory(self) -> list:
+        """
+        Memória de cada worker do pool (figuras vivas, RSS e pico), como relatada
+        no fim do último job de cada um. Com workers=0, é o próprio processo web.
+        """
+        with self._lock:
+            return [dict(stats) for _pid, stats in sorted(self._worker_memory.items())]
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
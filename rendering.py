@@ -0,0 +1,91 @@
+import io
+import os
+import resource
+import threading
+import weakref
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+import metrics
+
+# Figuras criadas por este módulo e ainda não liberadas (sem registro global do pyplot)
+_live_figures = weakref.WeakSet()
+_lock = threading.Lock()
+_stats = {'figures_created': 0, 'figures_rendered': 0, 'figures_released': 0}
+
+
+def new_figure(figsize=None, **kwargs) -> Figure:
+    """
+    Cria uma Figura Matplotlib pela API orientada a objetos, já com canvas Agg.
+    Diferente de plt.subplots, a figura não entra no gerenciador do pyplot:
+    quando a última referência some, a memória é liberada.
+    """
+    fig = Figure(figsize=figsize, **kwargs)
+    FigureCanvasAgg(fig)
+    with _lock:
+        _stats['figures_created'] += 1
+        _live_figures.add(fig)
+    return fig
+
+
+def subplots(nrows=1, ncols=1, figsize=None, **kwargs):
+    """Equivalente a plt.subplots, mas sem o estado global do pyplot."""
+    fig = new_figure(figsize=figsize)
+    axes = fig.subplots(nrows, ncols, **kwargs)
+    return fig, axes
+
+
+def release(fig: Figure) -> None:
+    """Libera artistas e buffers da figura (pode ser chamada mais de uma vez)."""
+    if fig is None:
+        return
+    fig.clear()
+    with _lock:
+        if fig in _live_figures:
+            _live_figures.discard(fig)
+            _stats['figures_released'] += 1
+
+
+def render_png(fig: Figure, **kwargs) -> bytes:
+    """
+    Codifica a figura em PNG e a libera em seguida, mesmo em caso de erro.
+    """
+    try:
+        output = io.BytesIO()
+        canvas = fig.canvas if isinstance(fig.canvas, FigureCanvasAgg) else FigureCanvasAgg(fig)
+        with metrics.timer('png_encode'):
+            canvas.print_png(output, **kwargs)
+        with _lock:
+            _stats['figures_rendered'] += 1
+        return output.getvalue()
+    finally:
+        release(fig)
+
+
+def _current_rss_bytes() -> int | None:
+    """RSS atual do processo (Linux: /proc/self/statm)."""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * resource.getpagesize()
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def memory_stats() -> dict:
+    """
+    Métricas de memória da camada de renderização no processo atual (pid):
+    figuras vivas, contadores e o pico (high-water) de RSS do processo.
+    Com a fila de renderização, os valores dos workers chegam ao processo web
+    junto com cada PNG (RenderQueue.worker_memory).
+    """
+    # ru_maxrss vem em KB no Linux
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    with _lock:
+        stats = dict(_stats)
+        stats['live_figures'] = len(_live_figures)
+    stats['rss_bytes'] = _current_rss_bytes()
+    stats['peak_rss_bytes'] = peak_rss
+    stats['pid'] = os.getpid()
+    return stats
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+# Regras de pontuação por temporada (vale a regra com o maior ano <= temporada).
+#   race:   pontos da corrida, da P1 em diante
+#   sprint: pontos extras da Sprint, da P1 em diante
+#   fastest_lap: +1 ponto para a volta mais rápida se terminar no top 10
+SEASON_RULES = {
+    1991: {'race': [10, 6, 4, 3, 2, 1], 'sprint': [], 'fastest_lap': False},
+    2003: {'race': [10, 8, 6, 5, 4, 3, 2, 1], 'sprint': [], 'fastest_lap': False},
+    2010: {'race': [25, 18, 15, 12, 10, 8, 6, 4, 2, 1], 'sprint': [], 'fastest_lap': False},
+    2019: {'race': [25, 18, 15, 12, 10, 8, 6, 4, 2, 1], 'sprint': [], 'fastest_lap': True},
+    2021: {'race': [25, 18, 15, 12, 10, 8, 6, 4, 2, 1], 'sprint': [3, 2, 1], 'fastest_lap': True},
+    2022: {'race': [25, 18, 15, 12, 10, 8, 6, 4, 2, 1], 'sprint': [8, 7, 6, 5, 4, 3, 2, 1], 'fastest_lap': True},
+    2025: {'race': [25, 18, 15, 12, 10, 8, 6, 4, 2, 1], 'sprint': [8, 7, 6, 5, 4, 3, 2, 1], 'fastest_lap': False},
+}
+
+# Sem temporada informada: mesmas regras de analysis_core.calculate_points (2022-2024)
+DEFAULT_SEASON = 2022
+
+
+def rules_for_season(season=None) -> dict:
+    """Retorna as regras de pontuação válidas para a temporada."""
+    if season is None or pd.isna(season):
+        season = DEFAULT_SEASON
+    valid = [year for year in SEASON_RULES if year <= int(season)]
+    return SEASON_RULES[max(valid) if valid else min(SEASON_RULES)]
+
+
+def _lookup_table(points: list) -> np.ndarray:
+    """Vetor indexado pela posição: [0, P1, P2, ..., 0]. O último 0 cobre posições fora da tabela."""
+    return np.array([0, *points, 0], dtype=np.int64)
+
+
+def _points_for_rules(pos: np.ndarray, sprint: np.ndarray, fastest_lap: np.ndarray, rules: dict) -> np.ndarray:
+    race_table = _lookup_table(rules['race'])
+    sprint_table = _lookup_table(rules['sprint'])
+
+    # Só posições inteiras >= 1 pontuam (NaN e valores fracionários caem no índice 0)
+    is_int = np.isfinite(pos) & (pos >= 1) & (pos == np.floor(pos))
+    idx = np.where(is_int, pos, 0).astype(np.int64)
+
+    points = race_table[np.minimum(idx, len(race_table) - 1)]
+    points = points + np.where(sprint, sprint_table[np.minimum(idx, len(sprint_table) - 1)], 0)
+    if rules['fastest_lap']:
+        with np.errstate(invalid='ignore'):
+            points = points + (fastest_lap & (pos <= 10))
+    return points
+
+
+def sprint_points(position, season=None) -> np.ndarray:
+    """Pontos de uma sessão Sprint (só a tabela da Sprint da temporada; zero antes de 2021)."""
+    pos = pd.to_numeric(pd.Series(position), errors='coerce').to_numpy(dtype=float)
+    is_int = np.isfinite(pos) & (pos >= 1) & (pos == np.floor(pos))
+    idx = np.where(is_int, pos, 0).astype(np.int64)
+    table = _lookup_table(rules_for_season(season)['sprint'])
+    return table[np.minimum(idx, len(table) - 1)]
+
+
+def compute_points(position, sprint, fastest_lap, season=None) -> np.ndarray:
+    """
+    Versão vetorizada de analysis_core.calculate_points.
+    Recebe colunas (Series/arrays) de posição, Sprint e Volta Mais Rápida e,
+    opcionalmente, a temporada (escalar ou coluna) para escolher a tabela de pontos.
+    """
+    pos = pd.to_numeric(pd.Series(position), errors='coerce').to_numpy(dtype=float)
+    # Mesma semântica de 'if sprint:' (NaN conta como verdadeiro)
+    sprint = np.asarray(sprint, dtype=bool)
+    fastest_lap = np.asarray(fastest_lap, dtype=bool)
+
+    if season is None or np.ndim(season) == 0:
+        return _points_for_rules(pos, sprint, fastest_lap, rules_for_season(season))
+
+    # Uma passada vetorizada por temporada presente nos dados
+    seasons = pd.Series(season).to_numpy()
+    points = np.zeros(len(pos), dtype=np.int64)
+    for value in pd.unique(seasons):
+        mask = pd.isna(seasons) if pd.isna(value) else seasons == value
+        points[mask] = _points_for_rules(pos[mask], sprint[mask], fastest_lap[mask], rules_for_season(value))
+    return points
@@ -0,0 +1,315 @@
+"""
+Análise em lote de temporadas inteiras a partir da OpenF1.
+
+Uso:
+    python season.py 2023 2024                 # processa e consolida as temporadas
+    python season.py 2023 --workers 8          # mais processos em paralelo
+    python season.py 2023 2024 --force         # refaz também as sessões já processadas
+
+Resolve todas as corridas, Sprints e classificações do intervalo de anos, processa
+cada uma num pool de processos (no máximo `workers` sessões em andamento por vez)
+e grava as tabelas consolidadas em SEASON_DIR:
+
+- classifications.csv: classificação final de cada sessão (posição, grid,
+  posições ganhas, pontos pelas regras da temporada em scoring.py).
+- season_drivers.csv: por (ano, piloto) pontos (corridas + Sprints), vitórias,
+  pódios, poles e posições ganhas.
+
+O resultado de cada sessão fica em SEASON_DIR/sessions-v<N>/<session_key>.csv assim
+que ela termina: uma execução interrompida (ou com falhas) é retomada só com
+as sessões que faltam.
+"""
+import argparse
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import numpy as np
+import pandas as pd
+
+import scoring
+from session_index import session_settled
+
+SEASON_DIR = os.getenv(
+    "APEX_SEASON_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "season")
+)
+
+# Sessões processadas ao mesmo tempo (cada uma num processo; limita também a carga na OpenF1)
+BATCH_WORKERS = int(os.getenv("APEX_BATCH_WORKERS", min(4, os.cpu_count() or 1)))
+
+# 'spawn' não herda threads/locks do processo web (como a fila de renderização)
+BATCH_START_METHOD = os.getenv("APEX_BATCH_START_METHOD", "spawn")
+
+SESSION_NAMES = ('Race', 'Sprint', 'Qualifying')
+
+# Versão dos resultados por sessão em disco; mude quando o cálculo mudar
+SEASON_FORMAT_VERSION = 2
+
+CLASSIFICATION_COLUMNS = ['year', 'session_key', 'location', 'session_name', 'driver_number',
+                          'tla', 'name', 'position', 'grid', 'positions_gained', 'points']
+SEASON_COLUMNS = ['year', 'driver_number', 'tla', 'name', 'races', 'points', 'wins',
+                  'podiums', 'poles', 'positions_gained', 'avg_finish']
+
+
+def season_sessions(year_from: int, year_to: int | None = None) -> list:
+    """Corridas, Sprints e classificações já encerradas (e assentadas) do intervalo de anos."""
+    import f1_api
+
+    sessions = []
+    for year in range(year_from, (year_to or year_from) + 1):
+        for s in f1_api._fetch_sessions(year) or []:
+            # Mesmo critério do etl.py: sessões encerradas há pouco ainda podem mudar
+            if s.get('session_name') not in SESSION_NAMES or not session_settled(s.get('date_end')):
+                continue
+            sessions.append({
+                'session_key': int(s['session_key']),
+                'year': int(s.get('year') or year),
+                'location': s.get('location'),
+                'session_name': s['session_name'],
+                'date_start': s.get('date_start'),
+            })
+    return sorted(sessions, key=lambda s: s['date_start'] or '')
+
+
+def fastest_lap_driver(laps_data: pd.DataFrame | None) -> int | None:
+    """Piloto da volta mais rápida da sessão (None sem tempos de volta)."""
+    if laps_data is None or 'lap_duration' not in laps_data:
+        return None
+    durations = pd.to_numeric(laps_data['lap_duration'], errors='coerce')
+    if durations.notna().sum() == 0:
+        return None
+    return int(laps_data['driver_number'].loc[durations.idxmin()])
+
+
+def classify_session(pos_data: pd.DataFrame, session_name: str, year: int,
+                     fastest_lap: int | None = None) -> pd.DataFrame:
+    """
+    Classificação de uma sessão a partir de /position: posição final (última
+    amostra de cada piloto), grid (primeira amostra) e pontos pelas regras da
+    temporada (scoring.py): na corrida com o ponto da volta mais rápida
+    (piloto `fastest_lap`), na Sprint pela tabela da Sprint.
+    """
+    df = pos_data[['date', 'driver_number', 'position']].dropna().sort_values('date', kind='stable')
+    by_driver = df.groupby('driver_number')['position']
+    table = pd.DataFrame({'position': by_driver.last(), 'grid': by_driver.first()}).astype('int64')
+    table['positions_gained'] = table['grid'] - table['position']
+    if session_name == 'Race':
+        table['points'] = scoring.compute_points(
+            table['position'], sprint=np.zeros(len(table), dtype=bool),
+            fastest_lap=table.index == fastest_lap, season=year,
+        )
+    elif session_name == 'Sprint':
+        table['points'] = scoring.sprint_points(table['position'], season=year)
+    else:
+        table['points'] = 0
+    return table.sort_values('position').reset_index()
+
+
+def process_session(session: dict) -> pd.DataFrame:
+    """
+    Job do pool: busca e classifica uma sessão. Os dados brutos passam pelos
+    caches do f1_api, compartilhados entre os processos (e com o app).
+    """
+    import f1_api
+
+    session_key = session['session_key']
+    pos_data = f1_api._fetch_position_data(session_key)
+    if pos_data is None:
+        raise ValueError(f"sem dados de posição para a sessão {session_key}")
+    fastest_lap = (fastest_lap_driver(f1_api._fetch_laps(session_key))
+                   if session['session_name'] == 'Race' else None)
+    table = classify_session(pos_data, session['session_name'], session['year'], fastest_lap)
+    drivers = f1_api._fetch_driver_table(session_key)
+    infos = [f1_api._driver_info(drivers, n) for n in table['driver_number']]
+    table = table.assign(
+        year=session['year'], session_key=session_key, location=session['location'],
+        session_name=session['session_name'],
+        tla=[info.tla for info in infos], name=[info.name for info in infos],
+    )
+    return table[CLASSIFICATION_COLUMNS]
+
+
+def _session_path(directory: str, session_key: int) -> str:
+    return os.path.join(directory, f'sessions-v{SEASON_FORMAT_VERSION}', f'{session_key}.csv')
+
+
+def _write_csv(df: pd.DataFrame, path: str) -> None:
+    """Grava num arquivo temporário e renomeia: um leitor nunca vê o CSV pela metade."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def season_tables(classifications: pd.DataFrame) -> pd.DataFrame:
+    """
+    Tabela por (ano, piloto) com SEASON_COLUMNS a partir das classificações.
+    Vitórias, pódios e posições são só das corridas; os pontos somam corridas e Sprints.
+    """
+    races = classifications[classifications['session_name'] == 'Race']
+    races = races.assign(win=races['position'] == 1, podium=races['position'] <= 3)
+    keys = ['year', 'driver_number']
+    table = races.groupby(keys).agg(
+        races=('session_key', 'nunique'), wins=('win', 'sum'), podiums=('podium', 'sum'),
+        positions_gained=('positions_gained', 'sum'), avg_finish=('position', 'mean'),
+    )
+    points = classifications.groupby(keys)['points'].sum()
+    quali = classifications[classifications['session_name'] == 'Qualifying']
+    poles = quali[quali['position'] == 1].groupby(keys).size().rename('poles')
+    table = table.join(points, how='outer').join(poles, how='outer')
+    for column in ('races', 'points', 'wins', 'podiums', 'poles', 'positions_gained'):
+        table[column] = table[column].fillna(0).astype('int64')
+    # Sigla/nome da sessão mais recente do piloto (inclusive quem só tem Sprint ou pole)
+    names = classifications.groupby(keys)[['tla', 'name']].last()
+    table = table.join(names)
+    table['avg_finish'] = table['avg_finish'].round(2)
+    table = table.reset_index().sort_values(['year', 'points', 'wins'], ascending=[True, False, False])
+    return table[SEASON_COLUMNS]
+
+
+def consolidate(sessions: list, directory: str = SEASON_DIR) -> tuple:
+    """Junta os resultados por sessão já gravados e grava as tabelas consolidadas."""
+    frames = [pd.read_csv(_session_path(directory, s['session_key']))
+              for s in sessions if os.path.exists(_session_path(directory, s['session_key']))]
+    classifications = (pd.concat(frames, ignore_index=True) if frames
+                       else pd.DataFrame(columns=CLASSIFICATION_COLUMNS))
+    drivers = season_tables(classifications)
+    _write_csv(classifications, os.path.join(directory, 'classifications.csv'))
+    _write_csv(drivers, os.path.join(directory, 'season_drivers.csv'))
+    return classifications, drivers
+
+
+def run_batch(year_from: int, year_to: int | None = None, workers: int = BATCH_WORKERS,
+              directory: str = SEASON_DIR, force: bool = False, on_progress=None) -> dict:
+    """
+    Processa as sessões do intervalo que ainda não têm resultado (todas, com force=True)
+    e consolida as tabelas. on_progress(done, total, session, error) é chamado a cada
+    sessão concluída. Retorna um resumo com as sessões processadas, puladas e com falha.
+    """
+    sessions = season_sessions(year_from, year_to)
+    todo = [s for s in sessions if force or not os.path.exists(_session_path(directory, s['session_key']))]
+    summary = {'sessions': len(sessions), 'skipped': len(sessions) - len(todo),
+               'processed': 0, 'failed': []}
+    print(f"Temporadas {year_from}-{year_to or year_from}: {len(sessions)} sessões, "
+          f"{len(todo)} a processar ({summary['skipped']} já prontas).")
+
+    started = time.perf_counter()
+    if todo:
+        context = multiprocessing.get_context(BATCH_START_METHOD)
+        with ProcessPoolExecutor(max_workers=max(1, workers), mp_context=context) as executor:
+            queue = iter(todo)
+            running = {}
+            done_count = 0
+            # Janela limitada: no máximo `workers` sessões submetidas por vez
+            for session in queue:
+                running[executor.submit(process_session, session)] = session
+                if len(running) >= workers:
+                    break
+            while running:
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    session = running.pop(future)
+                    done_count += 1
+                    error = future.exception()
+                    label = f"{session['year']} {session['location']} {session['session_name']}"
+                    if error is None:
+                        _write_csv(future.result(), _session_path(directory, session['session_key']))
+                        summary['processed'] += 1
+                        print(f"[{done_count}/{len(todo)}] ✅ {label} ({session['session_key']})")
+                    else:
+                        summary['failed'].append({'session_key': session['session_key'], 'error': str(error)})
+                        print(f"[{done_count}/{len(todo)}] ❌ {label} ({session['session_key']}): {error}")
+                    if on_progress is not None:
+                        on_progress(done_count, len(todo), session, error)
+                    next_session = next(queue, None)
+                    if next_session is not None:
+                        running[executor.submit(process_session, next_session)] = next_session
+
+    classifications, drivers = consolidate(sessions, directory)
+    summary['seconds'] = round(time.perf_counter() - started, 2)
+    summary['classification_rows'] = len(classifications)
+    summary['driver_rows'] = len(drivers)
+    if summary['failed']:
+        print(f"⚠️ {len(summary['failed'])} sessões falharam; rode de novo para retomar só elas.")
+    print(f"Tabelas consolidadas em {directory} ({summary['seconds']}s).")
+    return summary
+
+
+def load_season_drivers(year_from: int, year_to: int | None = None, directory: str = SEASON_DIR,
+                        limit: int | None = None) -> list | None:
+    """Linhas de season_drivers.csv no intervalo de anos, ou None se ainda não foi gerado."""
+    path = os.path.join(directory, 'season_drivers.csv')
+    if not os.path.exists(path):
+        return None
+    table = pd.read_csv(path)
+    table = table[table['year'].between(year_from, year_to or year_from)]
+    if limit is not None:
+        table = table.groupby('year', sort=True).head(limit)
+    table = table.astype(object).where(table.notna(), None)
+    return table.to_dict(orient='records')
+
+
+class BatchRunner:
+    """
+    Executa run_batch numa thread em segundo plano (um lote por vez) e guarda o
+    progresso para as rotas /api/season.
+    """
+
+    def __init__(self, directory: str = SEASON_DIR, workers: int = BATCH_WORKERS):
+        self.directory = directory
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._status = {'state': 'idle'}
+
+    def status(self) -> dict:
+        with self._lock:
+            return dict(self._status)
+
+    def start(self, year_from: int, year_to: int | None = None, force: bool = False) -> bool:
+        """Inicia um lote; retorna False se já houver um em andamento."""
+        with self._lock:
+            if self._status['state'] == 'running':
+                return False
+            self._status = {'state': 'running', 'from': year_from, 'to': year_to or year_from,
+                            'done': 0, 'total': None, 'failed': 0, 'current': None}
+        threading.Thread(target=self._run, args=(year_from, year_to, force),
+                         name='season-batch', daemon=True).start()
+        return True
+
+    def _progress(self, done: int, total: int, session: dict, error) -> None:
+        with self._lock:
+            self._status.update(done=done, total=total, current=session['session_key'],
+                                failed=self._status['failed'] + (error is not None))
+
+    def _run(self, year_from: int, year_to: int | None, force: bool) -> None:
+        try:
+            summary = run_batch(year_from, year_to, self.workers, self.directory, force, self._progress)
+            with self._lock:
+                self._status.update(state='done', summary=summary, current=None)
+        except Exception as e:
+            print(f"Erro no processamento em lote das temporadas: {e}")
+            with self._lock:
+                self._status.update(state='error', error=str(e), current=None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Análise em lote de temporadas (OpenF1)")
+    parser.add_argument("year_from", type=int)
+    parser.add_argument("year_to", type=int, nargs="?")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS, help="Sessões processadas em paralelo")
+    parser.add_argument("--out", default=SEASON_DIR, help="Diretório das tabelas consolidadas")
+    parser.add_argument("--force", action="store_true", help="Refaz também as sessões já processadas")
+    args = parser.parse_args()
+
+    summary = run_batch(args.year_from, args.year_to, args.workers, args.out, args.force)
+    for row in load_season_drivers(args.year_from, args.year_to, args.out, limit=5) or []:
+        print(f"{row['year']} {row['tla']}: {row['points']} pts, {row['wins']} vitórias, "
+              f"{row['podiums']} pódios, {row['poles']} poles")
+    if summary['failed']:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+import difflib
+import os
+import threading
+import unicodedata
+from datetime import datetime, timedelta, timezone
+
+# Grupos de nomes equivalentes para um mesmo GP (localização, circuito, nome do GP, apelidos).
+# Todos são normalizados (sem acento, minúsculos) antes de entrar no índice.
+# Nomes de país não entram aqui: um país pode ter mais de um GP no ano (Itália: Imola e
+# Monza; Estados Unidos: Austin, Miami, Las Vegas) e fica em COUNTRY_ALIASES.
+LOCATION_ALIASES = [
+    ['São Paulo', 'Interlagos'],
+    ['Mexico City', 'Hermanos Rodriguez'],
+    ['Monaco', 'Monte Carlo', 'Monte-Carlo'],
+    ['Spa-Francorchamps', 'Spa'],
+    ['Silverstone', 'British'],
+    ['Imola', 'Emilia Romagna', 'Emilia-Romagna'],
+    ['Yas Island', 'Yas Marina', 'Abu Dhabi'],
+    ['Melbourne', 'Albert Park'],
+    ['Montréal', 'Montreal', 'Gilles Villeneuve'],
+    ['Barcelona', 'Catalunya'],
+    ['Spielberg', 'Red Bull Ring'],
+    ['Budapest', 'Hungaroring'],
+    ['Zandvoort', 'Dutch'],
+    ['Marina Bay', 'Singapore', 'Singapura'],
+    ['Austin', 'COTA', 'Circuit of the Americas'],
+]
+
+# Grafias do mesmo país (country_name da OpenF1 e traduções). Um país só resolve
+# quando um único GP do ano acontece nele; com dois ou mais, fica ambíguo e não entra.
+COUNTRY_ALIASES = [
+    ['Brazil', 'Brasil'],
+    ['Mexico', 'México'],
+    ['Belgium', 'Bélgica'],
+    ['United Kingdom', 'Great Britain', 'Inglaterra', 'Reino Unido'],
+    ['Italy', 'Itália'],
+    ['Bahrain', 'Bahrein'],
+    ['Saudi Arabia', 'Arábia Saudita'],
+    ['Australia', 'Austrália'],
+    ['Japan', 'Japão'],
+    ['Canada', 'Canadá'],
+    ['Spain', 'Espanha'],
+    ['Austria', 'Áustria'],
+    ['Hungary', 'Hungria'],
+    ['Netherlands', 'Holanda', 'Países Baixos'],
+    ['Qatar', 'Catar'],
+    ['Azerbaijan', 'Azerbaijão'],
+    ['United States', 'Estados Unidos', 'USA', 'EUA'],
+    ['United Arab Emirates', 'Emirados Árabes Unidos'],
+]
+
+# Similaridade mínima (difflib) para aceitar um nome aproximado (ex: 'Interlago')
+FUZZY_CUTOFF = 0.8
+
+# Intervalo padrão entre atualizações em segundo plano (segundos)
+REFRESH_INTERVAL = 30 * 60
+
+# Depois deste intervalo após o fim da sessão (date_end), os dados são considerados finais
+SESSION_SETTLE_TIME = timedelta(hours=int(os.getenv("ETL_SETTLE_HOURS", 2)))
+
+
+def normalize_name(name) -> str:
+    """
+    Normaliza um nome de local: remove acentos, caixa e separadores repetidos.
+    Ex: 'São  Paulo' -> 'sao paulo', 'Spa-Francorchamps' -> 'spa francorchamps'
+    """
+    if not name:
+        return ''
+    text = unicodedata.normalize('NFKD', str(name))
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    text = text.lower().replace('-', ' ').replace('_', ' ')
+    return ' '.join(text.split())
+
+
+def settled_at(date_end) -> datetime | None:
+    """Instante (UTC) a partir do qual os dados da sessão são finais; None sem date_end."""
+    if not date_end:
+        return None
+    if not isinstance(date_end, datetime):
+        date_end = datetime.fromisoformat(str(date_end).replace('Z', '+00:00'))
+    date_end = date_end.replace(tzinfo=timezone.utc) if date_end.tzinfo is None else date_end.astimezone(timezone.utc)
+    return date_end + SESSION_SETTLE_TIME
+
+
+def session_settled(date_end, now: datetime | None = None) -> bool:
+    """A sessão terminou há mais que SESSION_SETTLE_TIME? (sem date_end: ainda não)"""
+    settled = settled_at(date_end)
+    return settled is not None and settled <= (now or datetime.now(timezone.utc))
+
+
+def _alias_groups(groups: list) -> dict:
+    """Nome normalizado -> conjunto de nomes equivalentes (inclusive ele mesmo)."""
+    aliases = {}
+    for group in groups:
+        names = {normalize_name(n) for n in group}
+        for name in names:
+            aliases.setdefault(name, set()).update(names)
+    return aliases
+
+
+_ALIAS_GROUPS = _alias_groups(LOCATION_ALIASES)
+_COUNTRY_GROUPS = _alias_groups(COUNTRY_ALIASES)
+
+
+class SessionIndex:
+    """
+    Índice em memória (ano, nome normalizado, tipo de sessão) -> session_key.
+    O tipo é o session_name da OpenF1 ('Race', 'Sprint', 'Qualifying'...): o
+    session_type é 'Race' também para a Sprint e 'Qualifying' também para a
+    classificação da Sprint, e só vale quando nenhuma sessão tem aquele nome.
+    Cada ano é carregado uma única vez pelo `loader(year, refresh)` (lista de sessões da OpenF1);
+    depois disso a resolução é uma consulta a dicionário, sem ida à rede.
+    Os anos já carregados são recarregados periodicamente (refresh=True, ignorando caches)
+    por uma thread em segundo plano.
+    """
+
+    def __init__(self, loader, refresh_interval: float = REFRESH_INTERVAL):
+        self.loader = loader
+        self.refresh_interval = refresh_interval
+        self._index = {}   # year -> {(name, session_type): session_key}
+        self._lock = threading.Lock()
+        self._year_locks = {}
+        self._refresher = None
+        self._stop = threading.Event()
+
+    @staticmethod
+    def build(sessions: list) -> dict:
+        """
+        Monta o dicionário de um ano a partir da lista de sessões, um GP (meeting) por vez:
+        os nomes de qualquer sessão do GP valem para todas as sessões dele, e o session_type
+        só responde por um tipo quando o GP não tem sessão com esse session_name
+        (a Sprint, de session_type 'Race', não responde pela corrida).
+        """
+        meetings = {}  # meeting -> {'names': set, 'countries': set, 'named': {}, 'typed': {}}
+        for session in sessions:
+            key = session.get('session_key')
+            session_name = session.get('session_name')
+            session_type = session.get('session_type')
+            if key is None or not (session_name or session_type):
+                continue
+            meeting_id = session.get('meeting_key')
+            if meeting_id is None:
+                meeting_id = (normalize_name(session.get('location')), normalize_name(session.get('country_name')))
+            meeting = meetings.setdefault(meeting_id, {'names': set(), 'countries': set(), 'named': {}, 'typed': {}})
+            for field in ('location', 'circuit_short_name', 'meeting_name'):
+                name = normalize_name(session.get(field))
+                if name:
+                    meeting['names'].add(name)
+                    meeting['names'].update(_ALIAS_GROUPS.get(name, ()))
+            country = normalize_name(session.get('country_name'))
+            if country:
+                meeting['countries'].add(country)
+            if session_name:
+                meeting['named'].setdefault(session_name, key)
+            if session_type:
+                meeting['typed'].setdefault(session_type, key)
+
+        by_country = {}  # país -> [sessões dos GPs do país]
+        entries = {}
+        for meeting in meetings.values():
+            kinds = dict(meeting['named'])
+            for session_type, key in meeting['typed'].items():
+                kinds.setdefault(session_type, key)
+            for name in meeting['names']:
+                for kind, key in kinds.items():
+                    entries.setdefault((name, kind), key)
+            for country in meeting['countries']:
+                by_country.setdefault(country, []).append(kinds)
+
+        for country, meeting_kinds in by_country.items():
+            if len(meeting_kinds) != 1:
+                continue
+            for name in _COUNTRY_GROUPS.get(country, {country}):
+                for kind, key in meeting_kinds[0].items():
+                    entries.setdefault((name, kind), key)
+        return entries
+
+    def _load_year(self, year: int, refresh: bool = False) -> dict | None:
+        sessions = self.loader(year, refresh)
+        if not sessions:
+            return None
+        entries = self.build(sessions)
+        with self._lock:
+            self._index[year] = entries
+        return entries
+
+    def _entries(self, year: int) -> dict | None:
+        entries = self._index.get(year)
+        if entries is not None:
+            return entries
+        # Só uma thread carrega cada ano; as demais esperam pelo resultado
+        with self._lock:
+            year_lock = self._year_locks.setdefault(year, threading.Lock())
+        with year_lock:
+            entries = self._index.get(year)
+            if entries is None:
+                entries = self._load_year(year)
+        self._start_refresher()
+        return entries
+
+    def lookup(self, year: int, location: str, session_type: str = 'Race') -> int | None:
+        """
+        Resolve o session_key. Tenta o nome exato (normalizado/apelido) e,
+        se não encontrar, o nome mais parecido do mesmo ano e tipo de sessão.
+        """
+        entries = self._entries(year)
+        if not entries:
+            return None
+        name = normalize_name(location)
+        key = entries.get((name, session_type))
+        if key is not None:
+            return key
+
+        with self._lock:
+            candidates = [n for (n, t) in entries if t == session_type]
+        matches = difflib.get_close_matches(name, candidates, n=1, cutoff=FUZZY_CUTOFF)
+        if not matches:
+            return None
+        key = entries[(matches[0], session_type)]
+        # Memoriza a grafia aproximada para as próximas consultas
+        with self._lock:
+            entries[(name, session_type)] = key
+        return key
+
+    def years(self) -> list:
+        with self._lock:
+            return list(self._index)
+
+    def refresh(self) -> None:
+        """Recarrega todos os anos já indexados (troca atômica por ano)."""
+        for year in self.years():
+            try:
+                self._load_year(year, refresh=True)
+            except Exception as e:
+                print(f"Erro ao atualizar índice de sessões de {year}: {e}")
+
+    def _start_refresher(self) -> None:
+        if self.refresh_interval <= 0 or self._refresher is not None:
+            return
+        with self._lock:
+            if self._refresher is not None:
+                return
+            self._refresher = threading.Thread(target=self._refresh_loop, name='session-index-refresh', daemon=True)
+            self._refresher.start()
+
+    def _refresh_loop(self) -> None:
+        while not self._stop.wait(self.refresh_interval):
+            self.refresh()
+
+    def stop(self) -> None:
+        self._stop.set()
@@ -0,0 +1,109 @@
+"""
+Vitórias, pódios e poles a partir do PostgreSQL.
+
+Em vez de contar toda amostra de 'positions' com position = 1 (uma corrida gera
+milhares de amostras por piloto), a classificação final de cada sessão fica na
+view materializada 'session_classification': a última posição de cada piloto
+em cada sessão. O ETL atualiza a view depois de cada carga, e as consultas por
+intervalo de anos leem só algumas linhas por sessão.
+"""
+import argparse
+
+# Índices de apoio: a view lê a última amostra por (sessão, piloto) direto do índice
+SCHEMA_DDL = """
+CREATE INDEX IF NOT EXISTS positions_session_driver_date_idx
+    ON positions (session_key, driver_number, date);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS session_classification AS
+SELECT DISTINCT ON (p.session_key, p.driver_number)
+    p.session_key,
+    p.driver_number,
+    p.position,
+    s.year,
+    s.session_name
+FROM positions p
+JOIN sessions s ON s.session_key::INTEGER = p.session_key
+ORDER BY p.session_key, p.driver_number, p.date DESC;
+
+CREATE UNIQUE INDEX IF NOT EXISTS session_classification_key_idx
+    ON session_classification (session_key, driver_number);
+
+CREATE INDEX IF NOT EXISTS session_classification_year_idx
+    ON session_classification (year, session_name, driver_number);
+"""
+
+# CONCURRENTLY: as consultas do app continuam lendo a versão anterior durante a atualização
+REFRESH_SQL = "REFRESH MATERIALIZED VIEW CONCURRENTLY session_classification"
+
+# Corrida principal e classificação (Sprint e Sprint Qualifying/Shootout não contam)
+STANDINGS_SQL = """
+SELECT
+    c.driver_number,
+    d.name,
+    COUNT(*) FILTER (WHERE c.session_name = 'Race' AND c.position = 1) AS wins,
+    COUNT(*) FILTER (WHERE c.session_name = 'Race' AND c.position <= 3) AS podiums,
+    COUNT(*) FILTER (WHERE c.session_name = 'Qualifying' AND c.position = 1) AS poles,
+    COUNT(*) FILTER (WHERE c.session_name = 'Race') AS races
+FROM session_classification c
+LEFT JOIN drivers d ON d.driver_id = c.driver_number
+WHERE c.year BETWEEN %(year_from)s AND %(year_to)s
+  AND c.session_name IN ('Race', 'Qualifying')
+GROUP BY c.driver_number, d.name
+ORDER BY wins DESC, poles DESC, podiums DESC, c.driver_number
+LIMIT %(limit)s
+"""
+
+STANDINGS_COLUMNS = ("driver_number", "name", "wins", "podiums", "poles", "races")
+
+
+def ensure_schema(conn) -> None:
+    """Cria (se preciso) os índices e a view de classificação final."""
+    with conn.cursor() as cursor:
+        cursor.execute(SCHEMA_DDL)
+    conn.commit()
+
+
+def refresh_classification(conn) -> None:
+    """Recalcula a classificação final de todas as sessões (chamado pelo ETL)."""
+    with conn.cursor() as cursor:
+        cursor.execute(REFRESH_SQL)
+    conn.commit()
+
+
+def driver_standings(conn, year_from: int, year_to: int | None = None, limit: int | None = None) -> list:
+    """
+    Vitórias, pódios, poles e corridas por piloto entre year_from e year_to (inclusive),
+    ordenado por vitórias, poles e pódios. Retorna uma lista de dicts (STANDINGS_COLUMNS).
+    """
+    params = {"year_from": year_from, "year_to": year_to if year_to is not None else year_from,
+              "limit": limit}
+    with conn.cursor() as cursor:
+        cursor.execute(STANDINGS_SQL, params)
+        rows = cursor.fetchall()
+    return [dict(zip(STANDINGS_COLUMNS, row)) for row in rows]
+
+
+def main():
+    import db
+
+    parser = argparse.ArgumentParser(description="Vitórias/pódios/poles por intervalo de anos")
+    parser.add_argument("year_from", type=int)
+    parser.add_argument("year_to", type=int, nargs="?")
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--refresh", action="store_true", help="Atualiza a view antes de consultar")
+    args = parser.parse_args()
+
+    conn = db.get_connection()
+    try:
+        ensure_schema(conn)
+        if args.refresh:
+            refresh_classification(conn)
+        for row in driver_standings(conn, args.year_from, args.year_to, args.limit):
+            print(f"{row['name'] or row['driver_number']}: {row['wins']} vitórias, "
+                  f"{row['podiums']} pódios, {row['poles']} poles ({row['races']} corridas)")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Armazenamento binário compacto da telemetria de cada sessão (position e laps).
+
+Cada tabela vira um diretório com um .npy por coluna, em tipos enxutos
+(datas em int64 ns UTC, piloto em uint8, posição em int8, volta em uint16...).
+Os arquivos são gravados uma vez e abertos com np.load(mmap_mode='r'): vários
+workers (gunicorn) compartilham as mesmas páginas do page cache, sem cópia, e
+os DataFrames devolvidos apontam direto para o mapeamento (somente leitura).
+"""
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import metrics
+from session_index import session_settled
+
+TELEMETRY_DIR = os.getenv(
+    "APEX_TELEMETRY_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "telemetry")
+)
+
+# Versão do formato em disco; mude quando os esquemas mudarem
+TELEMETRY_FORMAT_VERSION = 2
+
+# Tabelas abertas mantidas por processo (os dados em si ficam no mapeamento)
+_OPEN_TABLES = 64
+
+# Esquemas: coluna -> tipo em disco. 'datetime' = int64 ns UTC (NaT preservado).
+SCHEMAS = {
+    'position': {
+        'date': 'datetime',
+        'driver_number': 'uint8',
+        'position': 'int8',
+    },
+    'laps': {
+        'date_start': 'datetime',
+        'driver_number': 'uint8',
+        'lap_number': 'uint16',
+        'position': 'int8',
+        'is_pit_out_lap': 'bool',
+        'lap_duration': 'float32',
+        'duration_sector_1': 'float32',
+        'duration_sector_2': 'float32',
+        'duration_sector_3': 'float32',
+    },
+}
+
+# Valor gravado no lugar de ausências nas colunas inteiras (o extremo do tipo que
+# nunca aparece nos dados: piloto/volta não chegam a 255/65535, posição não é negativa)
+_MISSING = {'uint8': 255, 'int8': -128, 'uint16': 65535}
+
+
+def _encode(values: pd.Series, kind: str):
+    """Coluna pandas -> (array no tipo de disco, tem ausências?)."""
+    if kind == 'datetime':
+        dates = pd.to_datetime(values, utc=True, format='ISO8601').dt.tz_localize(None)
+        return dates.astype('datetime64[ns]').to_numpy().view(np.int64), False
+    if kind == 'bool':
+        return values.astype('boolean').fillna(False).to_numpy(dtype=bool), False
+    if kind.startswith('float'):
+        return pd.to_numeric(values, errors='coerce').to_numpy(dtype=kind), False
+
+    numbers = pd.to_numeric(values, errors='coerce')
+    missing = numbers.isna().to_numpy()
+    info = np.iinfo(kind)
+    valid = numbers[~missing]
+    if len(valid) and (valid.min() < info.min or valid.max() > info.max or (valid == _MISSING[kind]).any()):
+        raise ValueError(f"valores fora da faixa de {kind}")
+    return numbers.fillna(_MISSING[kind]).to_numpy(dtype=kind), bool(missing.any())
+
+
+def _decode(array: np.ndarray, kind: str, nullable: bool):
+    """Array mapeado -> coluna para o DataFrame (sem cópia, exceto a máscara de ausências)."""
+    if kind == 'datetime':
+        return array.view('datetime64[ns]')
+    if nullable:
+        return pd.arrays.IntegerArray(array, array == _MISSING[kind])
+    return array
+
+
+class TelemetryStore:
+    """
+    Tabelas por sessão em `directory/<session_key>/<tabela>/`.
+    write() grava num diretório temporário e o renomeia no fim (atômico): um
+    worker nunca vê uma tabela pela metade, e se dois gravarem ao mesmo tempo
+    vale a primeira. Como a gravação é definitiva, só aceita sessões encerradas
+    e assentadas; o date_end fica no meta.json e é conferido na leitura.
+    """
+
+    def __init__(self, directory: str = TELEMETRY_DIR):
+        self.directory = directory
+        self._open = OrderedDict()  # (session_key, tabela) -> DataFrame
+        self._lock = threading.Lock()
+
+    def _path(self, session_key: int, table: str) -> str:
+        return os.path.join(self.directory, str(int(session_key)), table)
+
+    def _meta(self, session_key: int, table: str) -> dict | None:
+        """meta.json da tabela, ou None se ausente, de outra versão ou de sessão não assentada."""
+        try:
+            with open(os.path.join(self._path(session_key, table), 'meta.json')) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get('version') != TELEMETRY_FORMAT_VERSION or not session_settled(meta.get('date_end')):
+            return None
+        return meta
+
+    def has(self, session_key: int, table: str) -> bool:
+        return self._meta(session_key, table) is not None
+
+    def write(self, session_key: int, table: str, df: pd.DataFrame, date_end) -> bool:
+        """
+        Grava as colunas do esquema presentes em df. Retorna False (sem gravar)
+        se a sessão (date_end) ainda não assentou ou se algum valor não couber
+        no tipo compacto.
+        """
+        if not session_settled(date_end):
+            return False
+        schema = SCHEMAS[table]
+        final_path = self._path(session_key, table)
+        try:
+            encoded, nullable = {}, []
+            for column, kind in schema.items():
+                if column not in df:
+                    continue
+                encoded[column], has_missing = _encode(df[column], kind)
+                if has_missing:
+                    nullable.append(column)
+        except (ValueError, TypeError) as e:
+            print(f"Aviso: telemetria de {table}/{session_key} não cabe no formato compacto: {e}")
+            return False
+
+        tmp_path = f"{final_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        os.makedirs(tmp_path, exist_ok=True)
+        try:
+            for column, array in encoded.items():
+                np.save(os.path.join(tmp_path, f'{column}.npy'), np.ascontiguousarray(array))
+            meta = {
+                'version': TELEMETRY_FORMAT_VERSION,
+                'rows': len(df),
+                'columns': list(encoded),
+                'nullable': nullable,
+                'date_end': str(date_end),
+            }
+            with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+                json.dump(meta, f)
+            if os.path.exists(final_path) and not self.has(session_key, table):
+                # Tabela de uma versão anterior do formato: é substituída
+                shutil.rmtree(final_path, ignore_errors=True)
+            try:
+                os.rename(tmp_path, final_path)
+            except OSError:
+                # Outro processo gravou a mesma tabela primeiro
+                if not self.has(session_key, table):
+                    raise
+        finally:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        return True
+
+    def read(self, session_key: int, table: str) -> pd.DataFrame | None:
+        """DataFrame somente leitura apoiado nos arquivos mapeados, ou None se não existir."""
+        key = (int(session_key), table)
+        with self._lock:
+            df = self._open.get(key)
+            if df is not None:
+                self._open.move_to_end(key)
+                metrics.cache_result('telemetry', 'open_hit')
+                return df
+
+        path = self._path(session_key, table)
+        meta = self._meta(session_key, table)
+        if meta is None:
+            metrics.cache_result('telemetry', 'miss')
+            return None
+
+        schema = SCHEMAS[table]
+        columns = {}
+        for column in meta['columns']:
+            array = np.load(os.path.join(path, f'{column}.npy'), mmap_mode='r')
+            columns[column] = _decode(array, schema[column], column in meta['nullable'])
+        df = pd.DataFrame(columns, copy=False)
+        metrics.cache_result('telemetry', 'mmap_hit')
+
+        with self._lock:
+            self._open[key] = df
+            while len(self._open) > _OPEN_TABLES:
+                self._open.popitem(last=False)
+        return df
+
+    def clear(self) -> None:
+        """Remove todas as tabelas (abertas e em disco)."""
+        with self._lock:
+            self._open.clear()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def nbytes(self, session_key: int | None = None) -> int:
+        """Bytes em disco (de uma sessão ou de todas)."""
+        root = self.directory if session_key is None else os.path.join(self.directory, str(int(session_key)))
+        total = 0
+        for folder, _dirs, files in os.walk(root):
+            total += sum(os.path.getsize(os.path.join(folder, name)) for name in files)
+        return total
+
+
+default_store = TelemetryStore()
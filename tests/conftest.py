@@ -0,0 +1,76 @@
+"""
+Configuração comum dos testes.
+
+As configurações dos módulos vêm de variáveis de ambiente lidas na importação,
+então elas são definidas aqui, antes de qualquer import do app: caches em um
+diretório temporário, renderização no próprio processo e sem observar o CSV.
+
+A OpenF1 é substituída pelo FixtureServer dos benchmarks com a corrida
+sintética (benchmarks/synthetic.py): o caminho testado (HTTP, cache, parsing)
+é o mesmo de produção, sem rede.
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+_TMP = tempfile.mkdtemp(prefix='apex-tests-')
+os.environ.setdefault('APEX_CACHE_DIR', os.path.join(_TMP, 'cache'))
+os.environ.setdefault('APEX_TELEMETRY_DIR', os.path.join(_TMP, 'telemetry'))
+os.environ.setdefault('APEX_SEASON_DIR', os.path.join(_TMP, 'season'))
+os.environ['APEX_RENDER_WORKERS'] = '0'
+os.environ['APEX_DATA_POLL_SECONDS'] = '0'
+os.environ['OPENF1_API_URL'] = 'http://127.0.0.1:9/v1'  # nunca a API real
+
+import pytest  # noqa: E402
+
+import f1_api  # noqa: E402
+import synthetic  # noqa: E402
+from cache import DiskCache  # noqa: E402
+from fixtures import FixtureServer  # noqa: E402
+from session_index import SessionIndex  # noqa: E402
+from telemetry_store import TelemetryStore  # noqa: E402
+
+
+@pytest.fixture
+def openf1_responses():
+    """Respostas da corrida sintética (pequena, para os testes serem rápidos)."""
+    return synthetic.make_openf1_session(drivers=6, samples_per_race=200, laps=10, pit_lap=4)
+
+
+@pytest.fixture
+def isolated_f1_api(tmp_path, monkeypatch):
+    """f1_api com cache, armazenamento de telemetria e índice de sessões novos (por teste)."""
+    monkeypatch.setattr(f1_api, 'default_cache', DiskCache(str(tmp_path / 'cache')))
+    monkeypatch.setattr(f1_api, 'telemetry_store', TelemetryStore(str(tmp_path / 'telemetry')))
+    monkeypatch.setattr(f1_api, '_session_index',
+                        SessionIndex(f1_api._fetch_sessions, refresh_interval=f1_api.SESSIONS_CACHE_TTL))
+    return f1_api
+
+
+@pytest.fixture
+def openf1(openf1_responses, isolated_f1_api, monkeypatch):
+    """
+    FixtureServer servindo `openf1_responses` no lugar da OpenF1.
+    Retorna as respostas; os testes podem alterá-las antes da primeira requisição.
+    """
+    with FixtureServer(openf1_responses) as base_url:
+        monkeypatch.setattr(f1_api, 'BASE_API_URL', base_url)
+        yield openf1_responses
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Lista dos endpoints pedidos à OpenF1, na ordem (uma entrada por requisição)."""
+    calls = []
+    fetch_json = f1_api._fetch_json
+
+    def counting(endpoint, params, timeout):
+        calls.append(endpoint)
+        return fetch_json(endpoint, params, timeout)
+
+    monkeypatch.setattr(f1_api, '_fetch_json', counting)
+    return calls
@@ -0,0 +1,214 @@
+"""ETag, 304 e Cache-Control das rotas de gráficos e das APIs JSON."""
+import os
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+import pytest
+
+import app as apex
+import f1_api
+import render_cache
+import synthetic
+from dataset import DatasetStore
+from render_cache import PngCache, make_etag
+
+TELEMETRY = {'year': synthetic.YEAR, 'location': synthetic.LOCATION}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(apex, 'png_cache', PngCache())
+    return apex.app.test_client()
+
+
+@pytest.fixture
+def dataset(tmp_path, monkeypatch):
+    """DatasetStore do app lendo um position.csv sintético."""
+    path = tmp_path / 'position.csv'
+    synthetic.write_position_csv(str(path), seasons=1, drivers=6, races_per_season=4)
+    store = DatasetStore(str(path), poll_interval=0)
+    store.load()
+    monkeypatch.setattr(apex, 'dataset_store', store)
+    return store
+
+
+def _revalidate(client, url, response, **kwargs):
+    return client.get(url, headers={'If-None-Match': response.headers['ETag']}, **kwargs)
+
+
+def test_json_etag_and_304(client, dataset):
+    response = client.get('/api/driver_performance')
+    assert response.status_code == 200
+    assert response.headers['ETag']
+    assert f"max-age={apex.PLOT_MAX_AGE}" in response.headers['Cache-Control']
+
+    cached = _revalidate(client, '/api/driver_performance', response)
+    assert cached.status_code == 304
+    assert cached.data == b''
+    assert cached.headers['ETag'] == response.headers['ETag']
+
+
+def test_json_etag_changes_with_the_data(client, dataset):
+    before = client.get('/api/driver_performance').headers['ETag']
+    with open(dataset.data_file, 'a') as f:
+        f.write('GP 99-99,Piloto 00,1:30.000,1\n')
+    assert dataset.refresh()
+    after = client.get('/api/driver_performance').headers['ETag']
+    assert before != after
+
+
+def test_png_etag_and_304_without_rendering(client, dataset, monkeypatch):
+    response = client.get('/plot/driver_performance.png')
+    assert response.status_code == 200
+    assert response.mimetype == 'image/png'
+    assert response.data.startswith(b'\x89PNG')
+    assert response.last_modified is not None
+
+    # Cache de imagens vazio: o 304 sai do ETag, sem renderizar de novo
+    monkeypatch.setattr(apex, 'png_cache', PngCache())
+
+    def submit(*args, **kwargs):
+        raise AssertionError('renderizou em vez de responder 304')
+
+    monkeypatch.setattr(apex.plot_queue, 'submit', submit)
+    cached = _revalidate(client, '/plot/driver_performance.png', response)
+    assert cached.status_code == 304
+
+
+def test_png_is_served_to_img_tags_and_202_only_to_pollers(client, dataset, monkeypatch):
+    # Renderização que só termina depois de RENDER_WAIT (0 aqui)
+    monkeypatch.setattr(apex, 'RENDER_WAIT', 0)
+    monkeypatch.setattr(apex.plot_queue, 'submit', lambda *args, **kwargs: None)
+    monkeypatch.setattr(apex.plot_queue, 'wait', lambda future, timeout: None if timeout == 0 else b'png')
+
+    pending = client.get('/plot/driver_performance.png', headers={'Accept': 'application/json'})
+    assert pending.status_code == 202
+    assert pending.headers['Location'] == pending.get_json()['poll']
+
+    # Uma tag <img> não faz polling: espera a imagem
+    image = client.get('/plot/driver_performance.png', headers={'Accept': 'image/avif,image/webp,*/*'})
+    assert image.status_code == 200
+    assert image.data == b'png'
+
+
+def test_unknown_render_key(client):
+    assert client.get('/render/desconhecida').status_code == 404
+
+
+def test_etag_includes_the_render_version(monkeypatch):
+    before = make_etag('driver_performance', {}, 1.0)
+    monkeypatch.setattr(render_cache, 'RENDER_VERSION', render_cache.RENDER_VERSION + 1)
+    assert make_etag('driver_performance', {}, 1.0) != before
+
+
+@pytest.mark.parametrize('url', ['/api/telemetry/positions', '/api/telemetry/laps',
+                                 '/api/telemetry/stints', '/api/telemetry/overtakes'])
+def test_telemetry_json_etag_and_304(client, openf1, upstream, url):
+    response = client.get(url, query_string=TELEMETRY)
+    assert response.status_code == 200
+    assert f"max-age={apex.PLOT_MAX_AGE}" in response.headers['Cache-Control']
+    data_requests = len(upstream)
+
+    cached = _revalidate(client, url, response, query_string=TELEMETRY)
+    assert cached.status_code == 304
+    # O 304 não busca nem monta os dados
+    assert len(upstream) == data_requests
+
+
+def test_telemetry_json_etag_depends_on_parameters(client, openf1):
+    full = client.get('/api/telemetry/positions', query_string={**TELEMETRY, 'steps': 0})
+    reduced = client.get('/api/telemetry/positions', query_string={**TELEMETRY, 'max_points': 5})
+    assert full.headers['ETag'] != reduced.headers['ETag']
+    assert all(len(series['t']) <= 5 for series in reduced.get_json()['drivers'])
+
+
+def test_telemetry_json_rejects_negative_max_points(client, openf1):
+    response = client.get('/api/telemetry/positions', query_string={**TELEMETRY, 'max_points': -1})
+    assert response.status_code == 400
+
+
+def test_unsettled_session_gets_a_short_max_age(client, openf1):
+    openf1['sessions'][0]['date_end'] = datetime.now(timezone.utc).isoformat()
+    response = client.get('/api/telemetry/positions', query_string=TELEMETRY)
+    assert response.status_code == 200
+    assert f"max-age={f1_api.LIVE_SESSION_TTL}" in response.headers['Cache-Control']
+
+
+def test_telemetry_json_unknown_location(client, openf1):
+    response = client.get('/api/telemetry/positions', query_string={'year': synthetic.YEAR, 'location': 'Nada'})
+    assert response.status_code == 404
+
+
+def test_render_stats_report_the_workers(client, dataset):
+    assert client.get('/plot/driver_performance.png').status_code == 200
+    stats = client.get('/stats/render').get_json()
+    assert stats['workers'] and stats['workers'][0]['figures_rendered'] >= 1
+    assert 'rss_bytes' in stats['web'] and 'pending' in stats['queue']
+
+    metrics_text = client.get('/metrics').get_data(as_text=True)
+    assert f'apex_render_rss_bytes{{pid="{stats["workers"][0]["pid"]}"}}' in metrics_text
+    assert 'apex_web_rss_bytes' in metrics_text
+
+
+def test_render_failure_is_500_and_missing_data_is_404(client, openf1, monkeypatch):
+    url = '/plot/telemetry/position.png'
+    monkeypatch.setattr(apex.render_queue, 'render_telemetry_position', lambda year, location: None)
+    assert client.get(url, query_string=TELEMETRY).status_code == 404
+
+    def broken(year, location):
+        raise RuntimeError('falha ao desenhar')
+
+    monkeypatch.setattr(apex.render_queue, 'render_telemetry_position', broken)
+    response = client.get(url, query_string=TELEMETRY)
+    assert response.status_code == 500
+    assert b'falha ao desenhar' in response.data
+
+
+def test_polling_a_failed_render(client, monkeypatch):
+    monkeypatch.setitem(apex.plot_queue._failed, 'vazio', ('empty', 'sem dados para os parâmetros'))
+    monkeypatch.setitem(apex.plot_queue._failed, 'quebrado', ('failed', 'falha ao desenhar'))
+    assert client.get('/render/vazio').status_code == 404
+    response = client.get('/render/quebrado')
+    assert response.status_code == 500
+    assert response.get_json() == {'status': 'failed', 'error': 'falha ao desenhar'}
+
+
+@pytest.mark.parametrize('url', ['/api/standings', '/api/season'])
+@pytest.mark.parametrize('query', [
+    {}, {'from': 'x'}, {'from': 2024, 'to': 2023}, {'from': 2023, 'limit': -1}, {'from': 2023, 'limit': 'dez'},
+])
+def test_year_range_arguments_are_validated(client, monkeypatch, url, query):
+    def unexpected(*args, **kwargs):
+        raise AssertionError('consultou com parâmetros inválidos')
+
+    monkeypatch.setattr(apex.db, 'pooled_connection', unexpected)
+    monkeypatch.setattr(apex.season, 'load_season_drivers', unexpected)
+    response = client.get(url, query_string=query)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_season_batch_rejects_reversed_range(client, monkeypatch):
+    monkeypatch.setattr(apex.season_batch, 'start', lambda *args, **kwargs: True)
+    assert client.post('/api/season/batch', data={'from': 2024, 'to': 2023}).status_code == 400
+
+
+def test_web_process_does_not_load_seaborn(tmp_path):
+    # Só os workers de renderização desenham o heatmap
+    code = "import sys, app; sys.exit('seaborn' in sys.modules)"
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join(sys.path)}
+    assert subprocess.run([sys.executable, '-c', code], cwd=tmp_path, env=env).returncode == 0
+
+
+def test_polled_png_keeps_the_short_max_age_of_unsettled_sessions(client, openf1):
+    openf1['sessions'][0]['date_end'] = datetime.now(timezone.utc).isoformat()
+    response = client.get('/plot/telemetry/position.png', query_string=TELEMETRY)
+    assert response.status_code == 200
+    assert f"max-age={f1_api.LIVE_SESSION_TTL}" in response.headers['Cache-Control']
+
+    etag = response.headers['ETag'].strip('"')
+    polled = client.get(f'/render/{etag}')
+    assert polled.status_code == 200
+    assert polled.data == response.data
+    assert f"max-age={f1_api.LIVE_SESSION_TTL}" in polled.headers['Cache-Control']
@@ -0,0 +1,113 @@
+"""COPY para a tabela de staging e incorporação em 'positions' (bulk_loader)."""
+import csv
+import io
+
+import pandas as pd
+import pytest
+
+import bulk_loader
+
+
+class FakeCursor:
+    """Registra os comandos; o MERGE 'insere' as linhas do staging que a tabela ainda não tem."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.rowcount = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.conn.log.append(sql.split()[0])
+        self.rowcount = -1
+        if sql is bulk_loader.MERGE_SQL:
+            new = [row for row in self.conn.staging if tuple(row[:3]) not in self.conn.keys]
+            self.conn.keys.update(tuple(row[:3]) for row in new)
+            self.rowcount = len(new)
+        elif sql.startswith('TRUNCATE'):
+            self.conn.staging = []
+
+    def copy_expert(self, sql, buffer):
+        assert sql == bulk_loader.COPY_SQL
+        self.conn.log.append('COPY')
+        rows = list(csv.reader(io.StringIO(buffer.read())))
+        self.conn.copied.extend(rows)
+        self.conn.staging.extend(rows)
+
+
+class FakeConnection:
+    def __init__(self):
+        self.log = []
+        self.copied = []
+        self.staging = []
+        self.keys = set()   # (date, driver_number, meeting_key) já em 'positions'
+        self.commits = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+
+def _positions(n: int, offset: int = 0) -> pd.DataFrame:
+    dates = pd.date_range('2024-03-02 15:00', periods=n, freq='s', tz='Europe/Rome') + pd.Timedelta(seconds=offset)
+    return pd.DataFrame({
+        'date': dates,
+        'driver_number': [1 + i % 20 for i in range(n)],
+        'meeting_key': 1229,
+        'position': [1 + i % 20 for i in range(n)],
+        'session_key': 9158,
+        'extra': 'ignorada',
+    })
+
+
+def test_copies_in_batches_and_merges_each_one():
+    conn = FakeConnection()
+    stats = bulk_loader.copy_positions(conn, _positions(25), batch_size=10)
+
+    assert stats['rows'] == 25 and stats['batches'] == 3 and stats['inserted'] == 25
+    assert conn.log == ['CREATE'] + ['COPY', 'INSERT', 'TRUNCATE'] * 3
+    assert conn.commits == 0
+    # Só as colunas do COPY, na ordem de POSITION_COLUMNS
+    assert all(len(row) == len(bulk_loader.POSITION_COLUMNS) for row in conn.copied)
+
+
+def test_dates_are_sent_as_utc():
+    conn = FakeConnection()
+    bulk_loader.copy_positions(conn, _positions(1))
+    # 15:00 em Roma (UTC+1 em março) = 14:00 UTC
+    assert conn.copied[0][0] == '2024-03-02T14:00:00.000000+00:00'
+
+
+def test_missing_dates_become_null():
+    conn = FakeConnection()
+    df = _positions(3)
+    df.loc[1, 'date'] = pd.NaT
+    bulk_loader.copy_positions(conn, df)
+
+    # No COPY em formato csv, um campo vazio sem aspas é NULL
+    assert [row[0] for row in conn.copied][1] == ''
+    assert 'NaT' not in ''.join(row[0] for row in conn.copied)
+
+
+def test_rows_already_loaded_are_not_counted_again():
+    conn = FakeConnection()
+    bulk_loader.copy_positions(conn, _positions(10))
+    stats = bulk_loader.copy_positions(conn, [_positions(10), _positions(5, offset=10)], batch_size=4)
+
+    assert stats['rows'] == 15
+    assert stats['inserted'] == 5
+
+
+@pytest.mark.parametrize('commit, expected', [(False, 0), (True, 3)])
+def test_commit_per_batch(commit, expected):
+    conn = FakeConnection()
+    seen = []
+    bulk_loader.copy_positions(conn, _positions(9), batch_size=3, commit=commit, on_batch=seen.append)
+    assert conn.commits == expected
+    assert [len(batch) for batch in seen] == [3, 3, 3]
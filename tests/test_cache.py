@@ -0,0 +1,159 @@
+"""Cache local (DiskCache) e invalidação dos dados de sessões que ainda não assentaram."""
+import os
+import pickle
+import threading
+import time
+import types
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import pytest
+
+import cache
+import f1_api
+import synthetic
+from cache import DiskCache, make_key
+from session_index import SESSION_SETTLE_TIME
+
+
+class Clock:
+    """time.time() controlado pelo teste."""
+
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache, 'time', types.SimpleNamespace(time=clock.time))
+    return clock
+
+
+def test_entries_expire_after_ttl(tmp_path, clock):
+    store = DiskCache(str(tmp_path))
+    store.set('k', {'a': 1})
+    clock.now += 59
+    assert store.get('k', ttl=60) == {'a': 1}
+    clock.now += 2
+    assert store.get('k', ttl=60) is None
+    # Sem ttl, a entrada não expira
+    assert store.get('k') == {'a': 1}
+
+
+def test_entries_survive_a_new_instance(tmp_path, clock):
+    DiskCache(str(tmp_path)).set('k', [1, 2, 3])
+    assert DiskCache(str(tmp_path)).get('k') == [1, 2, 3]
+
+
+def test_get_or_fetch_does_not_store_none(tmp_path, clock):
+    store = DiskCache(str(tmp_path))
+    fetched = []
+
+    def fetch():
+        fetched.append(1)
+        return None if len(fetched) == 1 else 'dados'
+
+    assert store.get_or_fetch('position', {'session_key': 1}, fetch) is None
+    assert store.get_or_fetch('position', {'session_key': 1}, fetch) == 'dados'
+    assert store.get_or_fetch('position', {'session_key': 1}, fetch) == 'dados'
+    assert len(fetched) == 2
+
+
+def test_settled_session_is_stored_once(openf1, upstream):
+    first = f1_api._fetch_position_data(synthetic.SESSION_KEY)
+    assert len(first) == len(openf1['position'])
+    assert f1_api.telemetry_store.has(synthetic.SESSION_KEY, 'position')
+
+    second = f1_api._fetch_position_data(synthetic.SESSION_KEY)
+    assert second.equals(first)
+    assert upstream.count('position') == 1
+
+
+def test_unsettled_session_stays_in_the_short_lived_cache(openf1, upstream, clock):
+    # Sessão que terminou agora: os dados ainda podem mudar
+    openf1['sessions'][0]['date_end'] = datetime.now(timezone.utc).isoformat()
+
+    f1_api._fetch_position_data(synthetic.SESSION_KEY)
+    assert not f1_api.telemetry_store.has(synthetic.SESSION_KEY, 'position')
+
+    clock.now += f1_api.LIVE_SESSION_TTL - 1
+    f1_api._fetch_position_data(synthetic.SESSION_KEY)
+    assert upstream.count('position') == 1
+
+    clock.now += 2
+    f1_api._fetch_position_data(synthetic.SESSION_KEY)
+    assert upstream.count('position') == 2
+
+
+def test_data_ttl_expires_entries_cached_before_the_session_settled(openf1):
+    now = datetime.now(timezone.utc)
+    session = openf1['sessions'][0]
+
+    session['date_end'] = now.isoformat()
+    assert f1_api._data_ttl(synthetic.SESSION_KEY) == f1_api.LIVE_SESSION_TTL
+
+    # Assentou há uma hora: o que foi gravado antes disso expira, o que veio depois vale
+    f1_api.default_cache.clear()
+    session['date_end'] = (now - SESSION_SETTLE_TIME - timedelta(hours=1)).isoformat()
+    assert f1_api._data_ttl(synthetic.SESSION_KEY) == pytest.approx(3600, abs=5)
+
+
+def test_partial_data_cached_before_settling_is_refetched(openf1, upstream, clock):
+    key = make_key('position', {'session_key': synthetic.SESSION_KEY})
+    partial = pd.DataFrame(openf1['position'][:6])
+    f1_api.default_cache.set(key, partial)
+
+    # A entrada acima foi gravada duas horas antes de a sessão assentar
+    settled = datetime.now(timezone.utc) - timedelta(hours=1)
+    openf1['sessions'][0]['date_end'] = (settled - SESSION_SETTLE_TIME).isoformat()
+    clock.now += 3 * 3600
+
+    df = f1_api._fetch_position_data(synthetic.SESSION_KEY)
+    assert len(df) == len(openf1['position'])
+    assert upstream.count('position') == 1
+
+
+def test_slow_disk_read_does_not_block_other_keys(tmp_path, monkeypatch):
+    store = DiskCache(str(tmp_path))
+    store.set('grande', 'telemetria')
+    store.set('pequena', 'sessões')
+    # Só 'grande' sai da memória: o get dela vai ao disco
+    store._memory.pop('grande')
+    reading = threading.Event()
+    release = threading.Event()
+    loads = pickle.loads
+
+    def slow_loads(payload):
+        value = loads(payload)
+        if value[1] == 'telemetria':
+            reading.set()
+            release.wait(5)
+        return value
+
+    monkeypatch.setattr(cache, 'pickle', types.SimpleNamespace(
+        loads=slow_loads, dumps=pickle.dumps, HIGHEST_PROTOCOL=pickle.HIGHEST_PROTOCOL,
+        UnpicklingError=pickle.UnpicklingError))
+    results = {}
+    reader = threading.Thread(target=lambda: results.setdefault('grande', store.get('grande')))
+    reader.start()
+    assert reading.wait(5)
+    try:
+        started = time.monotonic()
+        assert store.get('pequena') == 'sessões'
+        store.set('outra', 1)
+        assert time.monotonic() - started < 1
+    finally:
+        release.set()
+        reader.join(5)
+    assert results['grande'] == 'telemetria'
+
+
+def test_disk_size_is_tracked_across_overwrites(tmp_path):
+    store = DiskCache(str(tmp_path))
+    store.set('k', 'a' * 1000)
+    store.set('k', 'b' * 10)
+    assert store._disk_size == sum(os.path.getsize(p) for p in store._iter_files())
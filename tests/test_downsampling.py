@@ -0,0 +1,93 @@
+"""collapse_steps e LTTB (downsampling), inclusive os limites pequenos."""
+import numpy as np
+import pytest
+
+import downsampling
+
+
+@pytest.fixture
+def series():
+    x = np.arange(100)
+    y = np.sin(x / 7.0) * 10
+    return x, y
+
+
+def test_collapse_steps_keeps_changes_and_endpoints():
+    x = np.arange(8)
+    y = np.array([1, 1, 2, 2, 2, 3, 3, 3])
+    cx, cy = downsampling.collapse_steps(x, y)
+    assert cx.tolist() == [0, 2, 5, 7]
+    assert cy.tolist() == [1, 2, 3, 3]
+
+
+@pytest.mark.parametrize('n', [0, 1, 2])
+def test_collapse_steps_short_series(n):
+    x = np.arange(n)
+    cx, cy = downsampling.collapse_steps(x, x)
+    assert cx.tolist() == list(range(n))
+
+
+@pytest.mark.parametrize('max_points', [3, 10, 50])
+def test_lttb_respects_the_limit(series, max_points):
+    x, y = series
+    idx = downsampling.lttb_indices(x, y, max_points)
+    assert len(idx) == max_points
+    assert idx[0] == 0 and idx[-1] == len(x) - 1
+    assert np.all(np.diff(idx) > 0)
+
+
+def test_lttb_keeps_peaks():
+    x = np.arange(200)
+    y = np.zeros(200)
+    y[137] = 50
+    idx = downsampling.lttb_indices(x, y, 10)
+    assert 137 in idx
+
+
+def test_lttb_two_points_keeps_first_and_last(series):
+    x, y = series
+    assert downsampling.lttb_indices(x, y, 2).tolist() == [0, len(x) - 1]
+
+
+def test_lttb_one_point_keeps_the_last(series):
+    x, y = series
+    assert downsampling.lttb_indices(x, y, 1).tolist() == [len(x) - 1]
+
+
+@pytest.mark.parametrize('max_points', [0, -1])
+def test_lttb_rejects_non_positive_limits(series, max_points):
+    x, y = series
+    with pytest.raises(ValueError):
+        downsampling.lttb_indices(x, y, max_points)
+
+
+def test_lttb_limit_above_length_keeps_everything(series):
+    x, y = series
+    assert downsampling.lttb_indices(x, y, 1_000).tolist() == list(range(len(x)))
+
+
+def test_lttb_accepts_datetime_x():
+    x = np.arange('2024-03-02T15:00', '2024-03-02T16:00', dtype='datetime64[s]')
+    y = np.random.default_rng(0).normal(size=len(x))
+    lx, ly = downsampling.lttb(x, y, 20)
+    assert len(lx) == 20 and lx.dtype == x.dtype
+
+
+@pytest.mark.parametrize('max_points', [None, 0])
+def test_downsample_without_limit(series, max_points):
+    x, y = series
+    dx, _ = downsampling.downsample(x, y, max_points=max_points)
+    assert len(dx) == len(x)
+
+
+@pytest.mark.parametrize('max_points', [1, 2, 5])
+def test_downsample_small_limits(series, max_points):
+    x, y = series
+    dx, _ = downsampling.downsample(x, y, max_points=max_points)
+    assert len(dx) == max_points
+
+
+def test_downsample_rejects_negative_limit(series):
+    x, y = series
+    with pytest.raises(ValueError):
+        downsampling.downsample(x, y, max_points=-5)
@@ -0,0 +1,28 @@
+"""Buscas paralelas do http_client e os tempos da requisição (Server-Timing)."""
+import f1_api
+import http_client
+import metrics
+import synthetic
+
+
+def test_fetch_many_times_count_for_the_calling_request(openf1):
+    url = f"{f1_api.BASE_API_URL}/sessions"
+    token = metrics.begin_request()
+    try:
+        results = http_client.fetch_many({
+            'sessions': (http_client.get_json, url),
+            'drivers': (http_client.get_json, f"{f1_api.BASE_API_URL}/drivers"),
+        })
+        timings = metrics.request_timings()
+    finally:
+        metrics.end_request(token)
+
+    assert results['sessions'][0]['session_key'] == synthetic.SESSION_KEY
+    assert timings['http_fetch'] > 0 and timings['json_parse'] > 0
+
+
+def test_fetch_many_outside_a_request_records_only_the_histogram(openf1):
+    assert metrics.request_timings() == {}
+    results = http_client.fetch_many({'sessions': (http_client.get_json, f"{f1_api.BASE_API_URL}/sessions")})
+    assert not isinstance(results['sessions'], Exception)
+    assert metrics.request_timings() == {}
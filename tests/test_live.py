@@ -0,0 +1,130 @@
+"""Modo ao vivo: poller incremental e stream SSE contra o ReplayServer."""
+import json
+import time
+
+import pandas as pd
+import pytest
+
+import f1_api
+import live
+import synthetic
+from fixtures import ReplayServer
+
+# Velocidade do replay: a corrida sintética de 10 voltas (15 min) passa em 3 s
+SPEED = 300
+DEADLINE = 15
+
+
+@pytest.fixture
+def replay(openf1_responses, isolated_f1_api, monkeypatch):
+    with ReplayServer(openf1_responses, speed=SPEED) as base_url:
+        monkeypatch.setattr(f1_api, 'BASE_API_URL', base_url)
+        yield openf1_responses
+
+
+def _parse(event: str) -> tuple:
+    """(tipo, id, payload) de um evento SSE; ('ping', None, None) para o heartbeat."""
+    if event.startswith(':'):
+        return 'ping', None, None
+    fields = dict(line.split(': ', 1) for line in event.strip().split('\n'))
+    return fields['event'], int(fields['id']), json.loads(fields['data'])
+
+
+def _samples(payload: dict) -> int:
+    return sum(len(series['t']) for series in payload['drivers'])
+
+
+def test_poll_fetches_each_sample_once(replay):
+    total = len(replay['position'])
+    session = live.LiveSession(synthetic.SESSION_KEY, poll_interval=0.05)
+
+    first = session.poll()
+    assert 0 < first < total
+    assert session.t0 is not None
+
+    deadline = time.monotonic() + DEADLINE
+    while len(session) < total and time.monotonic() < deadline:
+        time.sleep(0.05)
+        session.poll()
+
+    # O filtro 'date>' não devolve de novo as amostras já vistas
+    assert len(session) == total
+    assert session.polls > 2
+    assert session.last_date == replay['position'][-1]['date']
+    assert session._t == sorted(session._t)
+
+
+def test_sse_snapshot_then_deltas_and_reconnect(replay, monkeypatch):
+    total = len(replay['position'])
+    session = live.LiveSession(synthetic.SESSION_KEY, poll_interval=0.05)
+    monkeypatch.setitem(live._sessions, synthetic.SESSION_KEY, session)
+    monkeypatch.setattr(live, 'HEARTBEAT_SECONDS', 0.2)
+    monkeypatch.setattr(live, 'LIVE_IDLE_SECONDS', 0)
+
+    stream = live.events(synthetic.SESSION_KEY)
+    kind, sent, _payload = _parse(next(stream))
+    assert kind == 'snapshot'
+    assert session.subscribers == 1
+
+    deadline = time.monotonic() + DEADLINE
+    while sent < total and time.monotonic() < deadline:
+        kind, event_id, payload = _parse(next(stream))
+        if kind == 'ping':
+            continue
+        assert kind == 'delta' and event_id > sent
+        assert _samples(payload) == event_id - sent
+        sent = event_id
+    assert sent == total
+
+    # Reconexão com Last-Event-ID: só o que faltou, sem snapshot
+    resumed = live.events(synthetic.SESSION_KEY, last_event_id=total - 4)
+    kind, event_id, payload = _parse(next(resumed))
+    assert (kind, event_id, _samples(payload)) == ('delta', total, 4)
+    assert session.subscribers == 2
+    resumed.close()
+    stream.close()
+    assert session.subscribers == 0
+
+    # Sem espectadores, o poller sai do registro e termina
+    session._thread.join(timeout=5)
+    assert not session._thread.is_alive()
+    assert synthetic.SESSION_KEY not in live._sessions
+
+
+def test_one_poller_per_session(replay, monkeypatch):
+    session = live.LiveSession(synthetic.SESSION_KEY, poll_interval=0.05)
+    monkeypatch.setitem(live._sessions, synthetic.SESSION_KEY, session)
+    monkeypatch.setattr(live, 'LIVE_IDLE_SECONDS', 0)
+
+    viewers = [live.subscribe(synthetic.SESSION_KEY) for _ in range(3)]
+    assert all(viewer is session for viewer in viewers)
+    assert session.subscribers == 3
+    for viewer in viewers:
+        live.unsubscribe(viewer)
+    session._thread.join(timeout=5)
+    assert not session._thread.is_alive()
+
+
+def test_late_sample_inside_the_overlap_window_is_kept_once(openf1):
+    records = list(openf1['position'])
+    total = len(records)
+    cut = total // 2
+    # Uma amostra anterior à última já publicada só aparece na API depois
+    late = records[cut - 2]
+    assert pd.Timestamp(records[cut - 1]['date']) - pd.Timestamp(late['date']) \
+        < pd.Timedelta(seconds=live.LIVE_OVERLAP_SECONDS)
+    openf1['position'] = [r for r in records[:cut] if r is not late]
+
+    session = live.LiveSession(synthetic.SESSION_KEY, poll_interval=0.05)
+    assert session.poll() == cut - 1
+    # Nada novo: a janela de sobreposição não duplica o que já foi visto
+    assert session.poll() == 0
+
+    openf1['position'] = records
+    assert session.poll() == total - cut + 1
+    assert len(session) == total
+    assert session.last_date == records[-1]['date']
+    assert session.poll() == 0
+
+    samples = set(zip(session._t, session._driver))
+    assert len(samples) == total
@@ -0,0 +1,48 @@
+"""Gap para o líder (pace.gap_to_leader), inclusive com voltas faltando no /laps."""
+import pandas as pd
+import pytest
+
+import pace
+
+START = pd.Timestamp('2024-03-02 15:00', tz='UTC')
+
+
+def _laps(lap_times: dict, missing=(), with_dates: bool = True) -> pd.DataFrame:
+    """Voltas consecutivas com tempo constante por piloto; `missing` = (piloto, volta) ausentes."""
+    rows = []
+    for driver, lap_time in lap_times.items():
+        for lap in range(1, 6):
+            if (driver, lap) in missing:
+                continue
+            row = {'driver_number': driver, 'lap_number': lap, 'lap_duration': float(lap_time)}
+            if with_dates:
+                row['date_start'] = START + pd.Timedelta(seconds=lap_time * (lap - 1))
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def _gaps(laps: pd.DataFrame) -> dict:
+    gaps = pace.gap_to_leader(laps)
+    return {(row.driver_number, row.lap_number): row.gap for row in gaps.itertuples()}
+
+
+@pytest.mark.parametrize('with_dates', [True, False])
+def test_gap_grows_by_the_lap_time_difference(with_dates):
+    gaps = _gaps(_laps({1: 90, 2: 91}, with_dates=with_dates))
+    assert [gaps[(2, lap)] for lap in range(1, 6)] == pytest.approx([1, 2, 3, 4, 5])
+    assert all(gaps[(1, lap)] == 0 for lap in range(1, 6))
+
+
+def test_missing_lap_does_not_shift_the_gap():
+    gaps = _gaps(_laps({1: 90, 2: 91}, missing={(2, 3)}))
+    # A volta 2 termina em início + duração, não no início da volta 4
+    assert gaps[(2, 2)] == pytest.approx(2)
+    assert (2, 3) not in gaps
+    assert gaps[(2, 4)] == pytest.approx(4)
+
+
+def test_missing_lap_without_dates_stops_the_cumulative_gap():
+    gaps = _gaps(_laps({1: 90, 2: 91}, missing={(2, 3)}, with_dates=False))
+    assert gaps[(2, 2)] == pytest.approx(2)
+    # Sem a volta 3, a soma dos tempos das seguintes não é o tempo de prova
+    assert (2, 4) not in gaps and (2, 5) not in gaps
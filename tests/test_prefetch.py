@@ -0,0 +1,68 @@
+"""Prefetch da página de telemetria: um por sessão, num pool limitado."""
+import threading
+import time
+
+import f1_api
+import synthetic
+
+
+def _wait_idle(timeout: float = 5) -> None:
+    deadline = time.monotonic() + timeout
+    while f1_api._prefetching and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not f1_api._prefetching
+
+
+def test_burst_of_page_views_prefetches_once(openf1, monkeypatch):
+    started = []
+    release = threading.Event()
+
+    def prefetch_session(session_key):
+        started.append(session_key)
+        release.wait(5)
+
+    monkeypatch.setattr(f1_api, 'prefetch_session', prefetch_session)
+    threads_before = threading.active_count()
+    scheduled = [f1_api.prefetch_session_async(synthetic.YEAR, synthetic.LOCATION) for _ in range(20)]
+    # Outra caixa do mesmo nome normaliza para o mesmo pedido
+    assert f1_api.prefetch_session_async(synthetic.YEAR, synthetic.LOCATION.upper()) is False
+    time.sleep(0.2)
+
+    assert scheduled.count(True) == 1
+    assert threading.active_count() - threads_before <= f1_api.PREFETCH_WORKERS
+    release.set()
+    _wait_idle()
+    assert started == [synthetic.SESSION_KEY]
+
+    # Terminado o prefetch, uma nova visita agenda outro
+    assert f1_api.prefetch_session_async(synthetic.YEAR, synthetic.LOCATION) is True
+    _wait_idle()
+
+
+def test_same_session_under_two_names_runs_once(openf1, monkeypatch):
+    started = []
+    release = threading.Event()
+
+    def prefetch_session(session_key):
+        started.append(session_key)
+        release.wait(5)
+
+    monkeypatch.setattr(f1_api, 'prefetch_session', prefetch_session)
+    assert f1_api.prefetch_session_async(synthetic.YEAR, synthetic.LOCATION)
+    time.sleep(0.2)
+    # Outro nome que resolve para a mesma session_key
+    assert f1_api.prefetch_session_async(synthetic.YEAR, 'Benchmrk')
+    time.sleep(0.2)
+    release.set()
+    _wait_idle()
+    assert started == [synthetic.SESSION_KEY]
+
+
+def test_pending_prefetches_are_capped(openf1, monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(f1_api, 'prefetch_session', lambda session_key: release.wait(5))
+    monkeypatch.setattr(f1_api, 'PREFETCH_MAX_PENDING', 3)
+    scheduled = [f1_api.prefetch_session_async(synthetic.YEAR, f'Local {i}') for i in range(10)]
+    assert scheduled.count(True) == 3
+    release.set()
+    _wait_idle()
@@ -0,0 +1,52 @@
+"""Fila de renderização: jobs no pool, memória relatada por worker."""
+import os
+
+import pytest
+
+import rendering
+from render_queue import NoFigureError, RenderError, RenderQueue
+
+
+def small_plot():
+    """Job de teste (função de módulo: o pool precisa importá-la)."""
+    fig, ax = rendering.subplots(figsize=(2, 2))
+    ax.plot([0, 1, 2], [2, 0, 1])
+    return rendering.render_png(fig)
+
+
+@pytest.mark.parametrize('workers', [0, 1])
+def test_worker_memory_comes_back_with_each_job(workers):
+    queue = RenderQueue(workers=workers)
+    try:
+        png = queue.wait(queue.submit('k1', small_plot), timeout=60)
+        assert png.startswith(b'\x89PNG')
+        queue.wait(queue.submit('k2', small_plot), timeout=60)
+
+        (worker,) = queue.worker_memory()
+        if workers:
+            assert worker['pid'] != os.getpid()
+        else:
+            assert worker['pid'] == os.getpid()
+        assert worker['figures_rendered'] >= 2
+        assert worker['live_figures'] == 0
+        assert worker['rss_bytes'] > 0 and worker['peak_rss_bytes'] > 0
+    finally:
+        queue.shutdown()
+
+
+def empty_plot():
+    return None
+
+
+def broken_plot():
+    raise RuntimeError('falha ao desenhar')
+
+
+def test_no_figure_and_failure_are_told_apart():
+    queue = RenderQueue(workers=0)
+    with pytest.raises(NoFigureError):
+        queue.wait(queue.submit('vazio', empty_plot), timeout=5)
+    with pytest.raises(RenderError, match='falha ao desenhar'):
+        queue.wait(queue.submit('quebrado', broken_plot), timeout=5)
+    assert queue.status('vazio')[0] == 'empty'
+    assert queue.status('quebrado') == ('failed', 'falha ao desenhar')
@@ -0,0 +1,86 @@
+"""Índice (ano, local, tipo de sessão) -> session_key."""
+import pytest
+
+from session_index import SessionIndex
+
+
+def _meeting(meeting_key, location, country, meeting_name, sessions, circuit=None):
+    """Sessões de um GP; `sessions` = [(session_key, session_name, session_type)]."""
+    return [{
+        'session_key': key, 'meeting_key': meeting_key, 'session_name': name, 'session_type': kind,
+        'location': location, 'country_name': country, 'circuit_short_name': circuit or location,
+        'meeting_name': meeting_name,
+    } for key, name, kind in sessions]
+
+
+SPRINT_WEEKEND = [('Sprint Qualifying', 'Qualifying'), ('Sprint', 'Race'), ('Qualifying', 'Qualifying'),
+                  ('Race', 'Race')]
+
+SESSIONS = (
+    _meeting(1, 'Imola', 'Italy', 'Emilia Romagna Grand Prix',
+             [(11, 'Qualifying', 'Qualifying'), (12, 'Race', 'Race')])
+    + _meeting(2, 'Monza', 'Italy', 'Italian Grand Prix',
+               [(21, 'Qualifying', 'Qualifying'), (22, 'Race', 'Race')])
+    + _meeting(3, 'São Paulo', 'Brazil', 'São Paulo Grand Prix',
+               [(30 + i, name, kind) for i, (name, kind) in enumerate(SPRINT_WEEKEND)], circuit='Interlagos')
+    + _meeting(4, 'Miami', 'United States', 'Miami Grand Prix',
+               [(40 + i, name, kind) for i, (name, kind) in enumerate(SPRINT_WEEKEND)])
+    + _meeting(5, 'Austin', 'United States', 'United States Grand Prix',
+               [(51, 'Race', 'Race')])
+)
+
+
+@pytest.fixture
+def index():
+    return SessionIndex(lambda year, refresh: SESSIONS, refresh_interval=0)
+
+
+@pytest.mark.parametrize('location, expected', [
+    ('Monza', 22), ('Imola', 12), ('Emilia-Romagna', 12), ('Italian Grand Prix', 22),
+    ('Interlagos', 33), ('Sao Paulo', 33), ('Brazil', 33), ('Brasil', 33),
+    ('Miami', 43), ('Austin', 51), ('COTA', 51),
+])
+def test_lookup_race(index, location, expected):
+    assert index.lookup(2024, location) == expected
+
+
+@pytest.mark.parametrize('location', ['Italy', 'Itália', 'United States', 'Estados Unidos'])
+def test_country_with_two_meetings_is_ambiguous(index, location):
+    assert index.lookup(2024, location) is None
+
+
+def test_country_with_one_meeting_resolves_every_session():
+    sessions = _meeting(2, 'Monza', 'Italy', 'Italian Grand Prix',
+                        [(21, 'Qualifying', 'Qualifying'), (22, 'Race', 'Race')])
+    index = SessionIndex(lambda year, refresh: sessions, refresh_interval=0)
+    assert index.lookup(2023, 'Itália') == 22
+    assert index.lookup(2023, 'Italy', 'Qualifying') == 21
+
+
+@pytest.mark.parametrize('session_type, expected', [
+    ('Race', 43), ('Sprint', 41), ('Qualifying', 42), ('Sprint Qualifying', 40),
+])
+def test_sprint_weekend(index, session_type, expected):
+    assert index.lookup(2024, 'Miami', session_type) == expected
+
+
+def test_sprint_does_not_answer_for_the_race_through_its_own_names():
+    # meeting_name presente só na linha da Sprint: continua apontando para a corrida
+    sessions = _meeting(4, 'Miami', 'United States', 'Miami Grand Prix', [(41, 'Sprint', 'Race')])
+    sessions += _meeting(4, 'Miami', 'United States', None, [(43, 'Race', 'Race')])
+    index = SessionIndex(lambda year, refresh: sessions, refresh_interval=0)
+    assert index.lookup(2024, 'Miami Grand Prix') == 43
+    assert index.lookup(2024, 'Miami Grand Prix', 'Sprint') == 41
+
+
+def test_session_type_fallback_only_when_the_meeting_has_no_such_name():
+    # Dados antigos sem session_name 'Race': o session_type responde
+    sessions = _meeting(6, 'Suzuka', 'Japan', 'Japanese Grand Prix', [(61, 'Grand Prix', 'Race')])
+    index = SessionIndex(lambda year, refresh: sessions, refresh_interval=0)
+    assert index.lookup(2018, 'Suzuka') == 61
+    assert index.lookup(2018, 'Japão') == 61
+
+
+def test_fuzzy_match(index):
+    assert index.lookup(2024, 'Interlago') == 33
+    assert index.lookup(2024, 'Nenhum Lugar') is None